@@ -17,6 +17,7 @@ import base64
 import datetime
 import hashlib
 import hmac
+import os
 from typing import Optional
 
 import phantom.app as phantom
@@ -25,6 +26,7 @@ from phantom.action_result import ActionResult
 from phantom.base_connector import BaseConnector
 
 from specteropsbloodhound_consts import *
+from specteropsbloodhound_profiling import ActionProfiler, profiling_requested
 
 
 class RetVal(tuple):
@@ -43,6 +45,7 @@ class SpecteropsbloodhoundConnector(BaseConnector):
         self._scheme = None
         self._start_date = None
         self._end_date = None
+        self._profile_top_functions = DEFAULT_PROFILE_TOP_FUNCTIONS
 
     def _process_empty_response(self, response, action_result):
         if response.status_code == 200:
@@ -668,20 +671,34 @@ class SpecteropsbloodhoundConnector(BaseConnector):
         ret_val = phantom.APP_SUCCESS
         action_id = self.get_action_identifier()
 
-        if action_id == "on_poll":
-            ret_val = self._handle_on_poll(param)
+        profiler = None
+        if profiling_requested(self.get_config().get(PROFILE_ACTIONS)):
+            profiler = ActionProfiler(
+                os.path.join(self.get_state_dir(), f"{self.get_asset_id()}_profiles"), action_id, self._profile_top_functions, MAX_PROFILES
+            )
+            profiler.start()
+
+        try:
+            if action_id == "on_poll":
+                ret_val = self._handle_on_poll(param)
 
-        if action_id == "fetch_asset_information":
-            ret_val = self._handle_fetch_asset_information(param)
+            if action_id == "fetch_asset_information":
+                ret_val = self._handle_fetch_asset_information(param)
 
-        if action_id == "does_path_exist":
-            ret_val = self._handle_does_path_exist(param)
+            if action_id == "does_path_exist":
+                ret_val = self._handle_does_path_exist(param)
 
-        if action_id == "get_object_id":
-            ret_val = self._handle_get_object_id(param)
+            if action_id == "get_object_id":
+                ret_val = self._handle_get_object_id(param)
 
-        if action_id == "test_connectivity":
-            ret_val = self._handle_test_connectivity(param)
+            if action_id == "test_connectivity":
+                ret_val = self._handle_test_connectivity(param)
+        finally:
+            if profiler:
+                profile_summary = profiler.stop()
+                self.debug_print(f"Profile of {action_id} written to {profile_summary['profile_file']}")
+                if self.get_action_results():
+                    self.get_action_results()[-1].update_summary({"profile": profile_summary})
 
         return ret_val
 
@@ -695,6 +712,15 @@ class SpecteropsbloodhoundConnector(BaseConnector):
         self._start_date = config.get("historical_poll_time_range")
         self._end_date = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
 
+        # Numeric asset parameters can arrive as floats, 10.0 is accepted but 10.5 is not
+        try:
+            top_functions = float(config.get(PROFILE_TOP_FUNCTIONS, DEFAULT_PROFILE_TOP_FUNCTIONS))
+        except (TypeError, ValueError):
+            top_functions = 0.0
+        if not top_functions.is_integer() or top_functions <= 0:
+            return self.set_status(phantom.APP_ERROR, PROFILE_TOP_FUNCTIONS_ERROR)
+        self._profile_top_functions = int(top_functions)
+
         return phantom.APP_SUCCESS
 
     def finalize(self):
@@ -28,6 +28,13 @@
 # Define your constants here
 DEFAULT_REQUEST_TIMEOUT = 60  # in seconds
 
+PROFILE_ACTIONS = "profile_actions"
+PROFILE_TOP_FUNCTIONS = "profile_top_functions"
+DEFAULT_PROFILE_TOP_FUNCTIONS = 10
+# Profiles kept in the state directory, the oldest are removed
+MAX_PROFILES = 20
+PROFILE_TOP_FUNCTIONS_ERROR = "Please provide a positive integer value in the profile_top_functions parameter"
+
 DIRECTORY_TYPES = [
     "User",
     "Computer",
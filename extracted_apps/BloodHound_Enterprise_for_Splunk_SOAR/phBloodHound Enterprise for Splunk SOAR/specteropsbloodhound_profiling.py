@@ -0,0 +1,131 @@
+# File: specteropsbloodhound_profiling.py
+#
+# Copyright (c) SpecterOps, 2025
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+#
+# Copy of servicenow_profiling.py of the ServiceNow app, the apps are packaged separately.
+# Keep the code identical apart from PROFILE_ENV_VAR, tests/test_profiling.py of the ServiceNow app checks it.
+
+import glob
+import os
+import time
+
+
+# Frames kept per allocation, enough to tell the caller of json or requests apart
+TRACEMALLOC_FRAMES = 5
+ALLOCATION_SITES = 25
+PROFILE_ENV_VAR = "BLOODHOUND_PROFILE_ACTIONS"
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _allocation_site(traceback):
+    """The innermost frame in the app code, which is more telling than the frame inside json or requests"""
+    for frame in reversed(traceback):
+        if frame.filename.startswith(APP_DIR):
+            return str(frame)
+    return str(traceback[-1])
+
+
+def profiling_requested(config_value):
+    """The asset parameter, or the environment variable for assets that cannot be edited"""
+    return bool(config_value) or os.environ.get(PROFILE_ENV_VAR, "").lower() in ("1", "true", "yes")
+
+
+class ActionProfiler:
+    """CPU profile and allocation sites of one action run.
+    Writes <name>.prof, readable with pstats or snakeviz, and <name>_allocations.txt to the output directory,
+    keeping the files of the last max_profiles runs.
+
+    cProfile only traces the thread that calls start(), the functions run by worker threads (the fetch thread
+    of On Poll, the transport threads) are missing from the CPU profile. tracemalloc is process wide, so their
+    allocations are still listed.
+    """
+
+    def __init__(self, output_dir, name, top_n, max_profiles):
+        # Imported here, the connectors import this module on every action run to check profiling_requested
+        import cProfile
+
+        self.output_dir = output_dir
+        self.name = f"{name}_{time.strftime('%Y%m%dT%H%M%S')}"
+        self.top_n = top_n
+        self.max_profiles = max_profiles
+        self._profile = cProfile.Profile()
+        self._started_tracemalloc = False
+
+    def start(self):
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+            self._started_tracemalloc = True
+        self._profile.enable()
+
+    def stop(self):
+        """Stop profiling, write the files and return the summary of the run"""
+        import pstats
+        import tracemalloc
+
+        self._profile.disable()
+        _, peak_memory = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        profile_file = os.path.join(self.output_dir, f"{self.name}.prof")
+        allocations_file = os.path.join(self.output_dir, f"{self.name}_allocations.txt")
+
+        stats = pstats.Stats(self._profile)
+        stats.dump_stats(profile_file)
+
+        allocations = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics("traceback")
+        with open(allocations_file, "w") as f:
+            for statistic in allocations[:ALLOCATION_SITES]:
+                f.write(f"{statistic.size / 1024:.1f} KiB in {statistic.count} blocks\n")
+                for line in statistic.traceback.format():
+                    f.write(f"{line}\n")
+                f.write("\n")
+
+        self._prune()
+
+        return {
+            "profile_file": profile_file,
+            "allocations_file": allocations_file,
+            "peak_memory_kb": round(peak_memory / 1024, 1),
+            "top_functions": self._top_functions(stats),
+            "top_allocations": [
+                {"location": _allocation_site(statistic.traceback), "size_kb": round(statistic.size / 1024, 1), "count": statistic.count}
+                for statistic in allocations[: self.top_n]
+            ],
+        }
+
+    def _top_functions(self, stats):
+        rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+        top = []
+        for (file_name, line, function), (_, calls, total_time, cumulative_time, _) in rows[: self.top_n]:
+            top.append(
+                {
+                    "function": f"{os.path.basename(file_name)}:{line}({function})",
+                    "calls": calls,
+                    "total_time": round(total_time, 4),
+                    "cumulative_time": round(cumulative_time, 4),
+                }
+            )
+        return top
+
+    def _prune(self):
+        profiles = sorted(glob.glob(os.path.join(self.output_dir, "*.prof")), key=os.path.getmtime)
+        for profile_file in profiles[: -self.max_profiles]:
+            for path in (profile_file, profile_file[: -len(".prof")] + "_allocations.txt"):
+                if os.path.exists(path):
+                    os.remove(path)
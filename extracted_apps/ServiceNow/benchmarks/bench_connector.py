@@ -0,0 +1,311 @@
+# File: bench_connector.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Benchmark ServicenowConnector actions against the local mock server.
+
+Every scenario runs in a fresh interpreter, the way SOAR runs an action, and goes through the real
+`_handle_action` entry point. The connector needs the `phantom` package, so run this where the SOAR
+runtime is importable, e.g. `phenv python bench_connector.py` on a SOAR instance.
+
+Only the platform side is redirected: the local SOAR REST calls, save_container/save_artifacts and the
+vault all talk to the mock server, and the asset state starts empty for every run.
+
+For each scenario and transport the report shows the requests the mock received, the wall time of
+_handle_action and the peak RSS of the action process.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from mock_servicenow import MockServiceNow
+
+
+APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "phServiceNow"))
+
+SCENARIOS = {
+    "on_poll": {
+        "action": "on poll",
+        "parameters": {"container_count": 100},
+        "config": {"first_run_container": 100},
+    },
+    "list_tickets": {
+        "action": "list tickets",
+        "parameters": {"table": "incident", "max_results": 1000},
+    },
+    "get_ticket": {
+        "action": "get ticket",
+        "parameters": {"table": "incident", "id": "INC0000001", "is_sys_id": False},
+    },
+    "get_variables": {
+        "action": "get variables",
+        "parameters": {"sys_id": "{first_request_item}"},
+    },
+    "create_ticket_attachments": {
+        "action": "create ticket",
+        "parameters": {
+            "table": "incident",
+            "short_description": "Benchmark ticket",
+            "vault_id": "v1,v2,v3,v4,v5",
+        },
+    },
+}
+
+
+def build_action_json(scenario, mock_url, transport, extra_config, placeholders):
+    parameters = dict(scenario["parameters"])
+    for key, value in parameters.items():
+        if isinstance(value, str) and value.startswith("{") and value.endswith("}"):
+            parameters[key] = placeholders[value[1:-1]]
+
+    config = {
+        "url": mock_url,
+        "username": "admin",
+        "password": "admin",  # pragma: allowlist secret
+        "transport": transport,
+        "appname": "-",
+        "appid": "a590c3bc-ca41-4a0e-b063-8066ca868794",
+        "directory": APP_DIR,
+        "main_module": "servicenow_connector.py",
+    }
+    config.update(scenario.get("config", {}))
+    config.update(extra_config)
+
+    return {
+        "action": scenario["action"],
+        "identifier": scenario["action"].replace(" ", "_"),
+        "asset_id": "1",
+        "container_id": 1,
+        "config": config,
+        "parameters": [parameters],
+        "debug_level": 0,
+        "environment_variables": {},
+    }
+
+
+def run_child(payload_path):
+    """Entry point of the action process: patch the platform side, run the action and print the measurements"""
+    import resource
+    import types
+
+    import requests
+
+    with open(payload_path) as f:
+        payload = json.load(f)
+    mock_url = payload["mock_url"]
+    in_json = payload["action_json"]
+
+    sys.path.insert(0, APP_DIR)
+    from phantom.base_connector import BaseConnector
+
+    import servicenow_connector
+
+    BaseConnector._get_phantom_base_url = staticmethod(lambda: f"{mock_url}/")
+    BaseConnector.get_phantom_base_url = lambda self: f"{mock_url}/"
+
+    def vault_info(vault_id=None, **kwargs):
+        return True, "", [{"name": f"{vault_id}.bin", "path": payload["vault_file"]}]
+
+    servicenow_connector.phrules = types.SimpleNamespace(vault_info=vault_info)
+
+    def save_container(self, container, fail_on_duplicate=False):
+        r = requests.post(f"{mock_url}/rest/container", json=container)
+        return True, "", r.json()["id"]
+
+    def save_artifacts(self, artifacts):
+        r = requests.post(f"{mock_url}/rest/artifact", json=artifacts)
+        return True, "", r.json()
+
+    connector = servicenow_connector.ServicenowConnector()
+    connector.load_state = lambda: {}
+    connector.save_state = lambda state: None
+    connector.save_container = types.MethodType(save_container, connector)
+    connector.save_artifacts = types.MethodType(save_artifacts, connector)
+
+    start = time.perf_counter()
+    ret_val = connector._handle_action(json.dumps(in_json), None)
+    wall_time = time.perf_counter() - start
+
+    status = "unknown"
+    message = ""
+    try:
+        result = json.loads(ret_val)
+        action_results = result if isinstance(result, list) else [result]
+        status = action_results[-1].get("status", status)
+        message = action_results[-1].get("message", "")
+    except Exception:
+        pass
+
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(
+        json.dumps(
+            {
+                "wall_time": wall_time,
+                "peak_rss_mb": peak_rss_kb / 1024.0,
+                "status": status,
+                "message": message,
+            }
+        )
+    )
+
+
+def run_scenario(mock, scenario_name, transport, extra_config, vault_file):
+    placeholders = {"first_request_item": mock.state.tables["sc_req_item"][0]["sys_id"]}
+    action_json = build_action_json(SCENARIOS[scenario_name], mock.url, transport, extra_config, placeholders)
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(
+            {
+                "mock_url": mock.url,
+                "action_json": action_json,
+                "vault_file": vault_file,
+            },
+            f,
+        )
+        payload_path = f.name
+
+    mock.state.reset_stats()
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", payload_path],
+            capture_output=True,
+            text=True,
+            timeout=1800,
+            check=False,
+        )
+    finally:
+        os.unlink(payload_path)
+
+    stderr_lines = completed.stderr.strip().splitlines()
+    measurement = {
+        "status": "crashed",
+        "message": stderr_lines[-1] if stderr_lines else "",
+        "wall_time": None,
+        "peak_rss_mb": None,
+    }
+    for line in reversed(completed.stdout.strip().splitlines()):
+        try:
+            measurement = json.loads(line)
+            break
+        except ValueError:
+            continue
+
+    stats = mock.state.snapshot()
+    measurement.update(
+        {
+            "scenario": scenario_name,
+            "transport": transport,
+            "requests": stats["total_requests"],
+            "endpoints": stats["endpoints"],
+        }
+    )
+    return measurement
+
+
+def print_report(measurements, verbose=False):
+    header = f"{'scenario':<28} {'transport':<9} {'status':<8} {'requests':>8} {'wall (s)':>9} {'peak RSS (MB)':>14}"
+    print(header)
+    print("-" * len(header))
+    for m in measurements:
+        wall = f"{m['wall_time']:.3f}" if m["wall_time"] is not None else "-"
+        rss = f"{m['peak_rss_mb']:.1f}" if m["peak_rss_mb"] is not None else "-"
+        print(f"{m['scenario']:<28} {m['transport']:<9} {m['status']:<8} {m['requests']:>8} {wall:>9} {rss:>14}")
+        if verbose or m["status"] != "success":
+            if m.get("message"):
+                print(f"    {m['message']}")
+            for endpoint, entry in sorted(m["endpoints"].items(), key=lambda item: -item[1]["count"]):
+                print(f"    {entry['count']:>6}  {endpoint}  statuses={entry['statuses']}")
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Benchmark ServiceNow connector actions against the mock server")
+    argparser.add_argument("--child", help=argparse.SUPPRESS)
+    argparser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="Comma separated scenarios to run",
+    )
+    argparser.add_argument(
+        "--transports",
+        default="sync,async",
+        help="Comma separated transports to compare",
+    )
+    argparser.add_argument(
+        "--records",
+        type=int,
+        default=5000,
+        help="Number of incidents on the mock server",
+    )
+    argparser.add_argument(
+        "--latency-ms",
+        type=float,
+        default=20,
+        help="Latency the mock adds to every request",
+    )
+    argparser.add_argument(
+        "--rate-limit-every",
+        type=int,
+        default=0,
+        help="Have the mock answer every Nth request with a 429",
+    )
+    argparser.add_argument(
+        "--config",
+        default="{}",
+        help="Extra asset configuration as JSON, e.g. '{\"max_concurrent_requests\": 20}'",
+    )
+    argparser.add_argument("--json", action="store_true", help="Print the measurements as JSON")
+    argparser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Show the requests per endpoint for every scenario",
+    )
+    args = argparser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    extra_config = json.loads(args.config)
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    transports = [name.strip() for name in args.transports.split(",") if name.strip()]
+
+    with tempfile.NamedTemporaryFile(suffix=".bin", delete=False) as f:
+        f.write(os.urandom(256 * 1024))
+        vault_file = f.name
+
+    measurements = []
+    try:
+        with MockServiceNow(
+            records=args.records,
+            latency_ms=args.latency_ms,
+            rate_limit_every=args.rate_limit_every,
+        ) as mock:
+            for scenario_name in scenarios:
+                for transport in transports:
+                    measurements.append(run_scenario(mock, scenario_name, transport, extra_config, vault_file))
+    finally:
+        os.unlink(vault_file)
+
+    if args.json:
+        print(json.dumps(measurements, indent=4))
+    else:
+        print_report(measurements, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
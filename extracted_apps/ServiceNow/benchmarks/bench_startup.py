@@ -0,0 +1,257 @@
+# File: bench_startup.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Measure the cold start of ServicenowConnector actions: from the start of a new interpreter to the first
+REST call to ServiceNow, the overhead every action run pays before doing any work.
+
+Like bench_connector.py, every run is a fresh process going through `_handle_action`, against the local mock
+server. The report shows the import time of servicenow_connector, the time to the first request and the
+deferred dependencies that were imported anyway. With --budget-ms, the script exits with 1 when an action
+takes longer than the budget to reach its first request, so it can guard against import-time regressions.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from bench_connector import APP_DIR, build_action_json
+from mock_servicenow import MockServiceNow
+
+
+# Imported by the connector only on the code paths that need them
+DEFERRED_MODULES = [
+    "bs4",
+    "magic",
+    "encryption_helper",
+    "phantom.rules",
+    "phantom.vault",
+    "ast",
+    "zoneinfo",
+    "sqlite3",
+    "cProfile",
+    "tracemalloc",
+    "servicenow_export",
+]
+
+SCENARIOS = {
+    "test_connectivity": {
+        # The identifier of test connectivity is test_asset_connectivity
+        "action": "test asset connectivity",
+        "parameters": {},
+    },
+    "add_comment": {
+        "action": "add comment",
+        "parameters": {
+            "id": "INC0000001",
+            "table_name": "incident",
+            "comment": "Benchmark comment",
+        },
+    },
+    "get_ticket": {
+        "action": "get ticket",
+        "parameters": {"table": "incident", "id": "INC0000001", "is_sys_id": False},
+    },
+    "list_tickets": {
+        "action": "list tickets",
+        "parameters": {"table": "incident", "max_results": 10},
+    },
+    "run_query": {
+        "action": "run query",
+        "parameters": {
+            "query_table": "incident",
+            "query": "sysparm_query=active=true",
+            "max_results": 10,
+        },
+    },
+    "query_users": {
+        "action": "query users",
+        "parameters": {"username": "admin"},
+    },
+}
+
+
+def run_child(payload_path):
+    """Entry point of the action process: import the connector, run the action and print the measurements"""
+    import_start = time.perf_counter()
+    import requests
+    from phantom.base_connector import BaseConnector
+
+    sys.path.insert(0, APP_DIR)
+    import servicenow_connector
+
+    import_time = time.perf_counter() - import_start
+
+    with open(payload_path) as f:
+        payload = json.load(f)
+    mock_url = payload["mock_url"]
+
+    BaseConnector._get_phantom_base_url = staticmethod(lambda: f"{mock_url}/")
+    BaseConnector.get_phantom_base_url = lambda self: f"{mock_url}/"
+
+    first_request = {}
+    send = requests.Session.send
+
+    def timed_send(self, request, **kwargs):
+        if "modules" not in first_request:
+            first_request["time"] = time.time()
+            first_request["modules"] = [name for name in DEFERRED_MODULES if name in sys.modules]
+        return send(self, request, **kwargs)
+
+    requests.Session.send = timed_send
+
+    connector = servicenow_connector.ServicenowConnector()
+    connector.load_state = lambda: {}
+    connector.save_state = lambda state: None
+
+    ret_val = connector._handle_action(json.dumps(payload["action_json"]), None)
+
+    status = "unknown"
+    try:
+        result = json.loads(ret_val)
+        action_results = result if isinstance(result, list) else [result]
+        status = action_results[-1].get("status", status)
+    except Exception:
+        pass
+
+    print(
+        json.dumps(
+            {
+                "status": status,
+                "import_time": import_time,
+                "first_request_time": first_request.get("time"),
+                "deferred_imported": first_request.get(
+                    "modules",
+                    [name for name in DEFERRED_MODULES if name in sys.modules],
+                ),
+            }
+        )
+    )
+
+
+def run_scenario(mock, scenario_name):
+    action_json = build_action_json(SCENARIOS[scenario_name], mock.url, "sync", {}, {})
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump({"mock_url": mock.url, "action_json": action_json}, f)
+        payload_path = f.name
+
+    try:
+        start = time.time()
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", payload_path],
+            capture_output=True,
+            text=True,
+            timeout=300,
+            check=False,
+        )
+    finally:
+        os.unlink(payload_path)
+
+    measurement = {
+        "status": "crashed",
+        "import_time": None,
+        "first_request_time": None,
+        "deferred_imported": [],
+    }
+    for line in reversed(completed.stdout.strip().splitlines()):
+        try:
+            measurement = json.loads(line)
+            break
+        except ValueError:
+            continue
+
+    first_request_time = measurement.pop("first_request_time")
+    measurement["scenario"] = scenario_name
+    measurement["time_to_first_request"] = first_request_time - start if first_request_time else None
+    return measurement
+
+
+def summarize(runs):
+    """Median of the runs of a scenario, cold starts vary with the page cache"""
+
+    def median(values):
+        values = sorted(value for value in values if value is not None)
+        return values[len(values) // 2] if values else None
+
+    return {
+        "scenario": runs[0]["scenario"],
+        "status": runs[-1]["status"],
+        "import_time": median(run["import_time"] for run in runs),
+        "time_to_first_request": median(run["time_to_first_request"] for run in runs),
+        "deferred_imported": sorted({name for run in runs for name in run["deferred_imported"]}),
+    }
+
+
+def print_report(measurements):
+    header = f"{'scenario':<20} {'status':<8} {'import (ms)':>12} {'first request (ms)':>19}  deferred modules imported"
+    print(header)
+    print("-" * len(header))
+    for m in measurements:
+        import_ms = f"{m['import_time'] * 1000:.1f}" if m["import_time"] is not None else "-"
+        first_ms = f"{m['time_to_first_request'] * 1000:.1f}" if m["time_to_first_request"] is not None else "-"
+        print(f"{m['scenario']:<20} {m['status']:<8} {import_ms:>12} {first_ms:>19}  {', '.join(m['deferred_imported']) or '-'}")
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Measure the cold start of ServiceNow connector actions")
+    argparser.add_argument("--child", help=argparse.SUPPRESS)
+    argparser.add_argument(
+        "--scenarios",
+        default=",".join(SCENARIOS),
+        help="Comma separated scenarios to run",
+    )
+    argparser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="Runs per scenario, the median is reported",
+    )
+    argparser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=0,
+        help="Fail when an action takes longer than this to send its first request",
+    )
+    argparser.add_argument("--json", action="store_true", help="Print the measurements as JSON")
+    args = argparser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    measurements = []
+    with MockServiceNow(records=100, latency_ms=0) as mock:
+        for scenario_name in scenarios:
+            measurements.append(summarize([run_scenario(mock, scenario_name) for _ in range(args.repeat)]))
+
+    if args.json:
+        print(json.dumps(measurements, indent=4))
+    else:
+        print_report(measurements)
+
+    if args.budget_ms:
+        over_budget = [
+            m["scenario"] for m in measurements if m["time_to_first_request"] is None or m["time_to_first_request"] * 1000 > args.budget_ms
+        ]
+        if over_budget:
+            print(f"Over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
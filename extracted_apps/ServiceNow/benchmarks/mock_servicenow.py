@@ -0,0 +1,821 @@
+# File: mock_servicenow.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Local stand-in for the parts of the ServiceNow REST API (and of the SOAR REST API) used by the connector.
+
+Only the behaviour the connector depends on is emulated: encoded queries (a useful subset), offset
+pagination with X-Total-Count and Link headers, reference links, attachments, journal fields, text
+search sources, import sets and OAuth. With oauth set, the API only accepts the bearer tokens issued by
+/oauth_token.do and answers the others with a 401, revoke_tokens() expires them all. Latency and 429
+responses can be injected to see how the connector copes.
+With a push URL, every record created or updated through the Table API is also pushed to it the way a Business
+Rule would, which stands in for ServiceNow in front of servicenow_receiver.py.
+
+Run it standalone with `python mock_servicenow.py --port 8090` or start it from a benchmark with MockServiceNow.
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import urllib.request
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlencode, urlparse
+
+
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+SYS_ID_RE = re.compile(r"\b[0-9a-f]{32}\b")
+NUMERIC_ID_RE = re.compile(r"/\d+(?=/|$)")
+CONDITION_RE = re.compile(
+    r"^([A-Za-z0-9_.]+?)(ISEMPTY|ISNOTEMPTY|STARTSWITH|ENDSWITH|NOTLIKE|LIKE|NOT IN|IN|>=|<=|!=|=|>|<)(.*)$",
+    re.DOTALL,
+)
+DATE_GENERATE_RE = re.compile(r"javascript:gs\.dateGenerate\('([^']*)','([^']*)'\)")
+
+# Reference fields are rendered as {"link", "value"} unless sysparm_exclude_reference_link is set
+REFERENCE_FIELDS = {
+    "incident": {
+        "caller_id": "sys_user",
+        "assignment_group": "sys_user_group",
+        "cmdb_ci": "cmdb_ci",
+        "opened_by": "sys_user",
+    },
+    "sc_req_item": {
+        "request": "sc_request",
+        "cat_item": "sc_cat_item",
+        "opened_by": "sys_user",
+    },
+    "sc_item_option_mtom": {
+        "request_item": "sc_req_item",
+        "sc_item_option": "sc_item_option",
+    },
+    "sc_item_option": {"item_option_new": "item_option_new"},
+    "sys_user": {"manager": "sys_user"},
+}
+
+SEVERITIES = [
+    {"id": 1, "name": "low"},
+    {"id": 2, "name": "medium", "is_default": True},
+    {"id": 3, "name": "high"},
+]
+
+
+def new_sys_id():
+    return uuid.uuid4().hex
+
+
+def endpoint_template(path):
+    """Collapse ids in a path so that requests can be counted per endpoint"""
+    return NUMERIC_ID_RE.sub("/{id}", SYS_ID_RE.sub("{sys_id}", path))
+
+
+def parse_condition(term):
+    match = CONDITION_RE.match(term)
+    if not match:
+        raise ValueError(f"Unsupported query term: {term}")
+    field, operator, value = match.groups()
+    value = DATE_GENERATE_RE.sub(lambda m: f"{m.group(1)} {m.group(2)}", value)
+    return field, operator, value
+
+
+def evaluate_condition(record, condition):
+    field, operator, value = condition
+    actual = record.get(field, "")
+    if isinstance(actual, dict):
+        actual = actual.get("value", "")
+    actual = "" if actual is None else str(actual)
+
+    if operator == "=":
+        return actual == value
+    if operator == "!=":
+        return actual != value
+    if operator in (">", ">=", "<", "<="):
+        if not actual:
+            return False
+        if actual.lstrip("-").isdigit() and value.lstrip("-").isdigit():
+            actual, value = int(actual), int(value)
+        return {
+            ">": actual > value,
+            ">=": actual >= value,
+            "<": actual < value,
+            "<=": actual <= value,
+        }[operator]
+    if operator == "IN":
+        return actual in value.split(",")
+    if operator == "NOT IN":
+        return actual not in value.split(",")
+    if operator == "LIKE":
+        return value.lower() in actual.lower()
+    if operator == "NOTLIKE":
+        return value.lower() not in actual.lower()
+    if operator == "STARTSWITH":
+        return actual.lower().startswith(value.lower())
+    if operator == "ENDSWITH":
+        return actual.lower().endswith(value.lower())
+    if operator == "ISEMPTY":
+        return not actual
+    if operator == "ISNOTEMPTY":
+        return bool(actual)
+    return False
+
+
+def parse_encoded_query(query):
+    """Split an encoded query into AND-ed groups of OR-ed conditions and a list of (field, descending) orderings"""
+    groups = []
+    order_by = []
+    if not query:
+        return groups, order_by
+
+    for index, term in enumerate(query.split("^")):
+        if not term or term == "EQ":
+            continue
+        if term.startswith("ORDERBYDESC"):
+            order_by.append((term[len("ORDERBYDESC") :], True))
+        elif term.startswith("ORDERBY"):
+            order_by.append((term[len("ORDERBY") :], False))
+        elif term.startswith("OR") and index and groups:
+            groups[-1].append(parse_condition(term[2:]))
+        else:
+            groups.append([parse_condition(term)])
+    return groups, order_by
+
+
+class MockState:
+    """In-memory tables plus request accounting, shared by all handler threads"""
+
+    def __init__(
+        self,
+        records=1000,
+        seed=1,
+        journal_entries=5,
+        attachments=1,
+        variables=3,
+        latency_ms=0,
+        jitter_ms=0,
+        rate_limit_every=0,
+        push_url=None,
+        push_token=None,
+        oauth=False,
+    ):
+        self.lock = threading.RLock()
+        self.random = random.Random(seed)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_limit_every = rate_limit_every
+        self.push_url = push_url
+        self.push_token = push_token
+        self.push_failures = 0
+        self.oauth = oauth
+        self.oauth_tokens = set()
+        self.tables = defaultdict(list)
+        self.index = defaultdict(dict)
+        self.containers = []
+        self.artifacts = []
+        self.reset_stats()
+        self._populate(records, journal_entries, attachments, variables)
+
+    def reset_stats(self):
+        with self.lock:
+            self.request_count = 0
+            self.stats = defaultdict(
+                lambda: {
+                    "count": 0,
+                    "bytes_in": 0,
+                    "bytes_out": 0,
+                    "statuses": defaultdict(int),
+                }
+            )
+
+    def record_request(self, method, path, status, bytes_in, bytes_out):
+        with self.lock:
+            entry = self.stats[f"{method} {endpoint_template(path)}"]
+            entry["count"] += 1
+            entry["bytes_in"] += bytes_in
+            entry["bytes_out"] += bytes_out
+            entry["statuses"][str(status)] += 1
+
+    def snapshot(self):
+        with self.lock:
+            endpoints = {key: dict(value, statuses=dict(value["statuses"])) for key, value in self.stats.items()}
+            return {
+                "total_requests": sum(value["count"] for value in endpoints.values()),
+                "endpoints": endpoints,
+                "containers": len(self.containers),
+                "artifacts": len(self.artifacts),
+            }
+
+    def insert(self, table, record):
+        with self.lock:
+            record.setdefault("sys_id", new_sys_id())
+            now = datetime.utcnow().strftime(DATETIME_FORMAT)
+            record.setdefault("sys_created_on", now)
+            record.setdefault("sys_updated_on", now)
+            record.setdefault("sys_mod_count", "0")
+            self.tables[table].append(record)
+            self.index[table][record["sys_id"]] = record
+            return record
+
+    def revoke_tokens(self):
+        """Expire every OAuth token issued, the next API request with one of them gets a 401"""
+        with self.lock:
+            self.oauth_tokens.clear()
+
+    def push(self, table, record, operation):
+        """Send the event of a created or updated record to the push URL, like an async Business Rule"""
+        if not self.push_url:
+            return
+        event = {
+            "table": table,
+            "sys_id": record["sys_id"],
+            "sys_mod_count": record.get("sys_mod_count"),
+            "sys_updated_on": record.get("sys_updated_on"),
+            "operation": operation,
+        }
+        request = urllib.request.Request(
+            self.push_url,
+            data=json.dumps(event).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Authorization": f"Bearer {self.push_token}"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=5):  # nosemgrep
+                pass
+        except OSError:
+            with self.lock:
+                self.push_failures += 1
+
+    def _text(self, index):
+        ip = f"10.{index % 250}.{(index * 7) % 250}.{(index * 13) % 250}"
+        digest = hashlib.md5(str(index).encode()).hexdigest()  # nosemgrep
+        return f"Suspicious activity from {ip}, sample {digest} reported at https://intranet.example.com/cases/{index}"
+
+    def _populate(self, records, journal_entries, attachments, variables):
+        start = datetime(2024, 1, 1)
+        # Tables extending task, the dot-walked super_class.name is stored the way sysparm_fields returns it
+        task = self.insert("sys_db_object", {"name": "task", "super_class": "", "super_class.name": ""})
+        for name in ("incident", "problem", "sc_req_item"):
+            self.insert("sys_db_object", {"name": name, "super_class": task["sys_id"], "super_class.name": "task"})
+        users = [
+            self.insert(
+                "sys_user",
+                {
+                    "user_name": f"user{i}",
+                    "name": f"User {i}",
+                    "email": f"user{i}@example.com",
+                },
+            )
+            for i in range(50)
+        ]
+        groups = [self.insert("sys_user_group", {"name": f"Group {i}"}) for i in range(10)]
+        cis = [
+            self.insert(
+                "cmdb_ci",
+                {"name": f"host-{i}", "ip_address": f"192.168.{i // 250}.{i % 250}"},
+            )
+            for i in range(100)
+        ]
+
+        for i in range(records):
+            updated = start + timedelta(minutes=i * 7)
+            incident = self.insert(
+                "incident",
+                {
+                    "number": f"INC{i + 1:07d}",
+                    "short_description": f"Mock incident {i + 1}",
+                    "description": self._text(i) + "\n" + "Lorem ipsum dolor sit amet. " * 20,
+                    "close_notes": "",
+                    "priority": str(1 + i % 5),
+                    "state": str(1 + i % 7),
+                    "caller_id": users[i % len(users)]["sys_id"],
+                    "opened_by": users[(i * 3) % len(users)]["sys_id"],
+                    "assignment_group": groups[i % len(groups)]["sys_id"],
+                    "cmdb_ci": cis[i % len(cis)]["sys_id"],
+                    "sys_created_on": updated.strftime(DATETIME_FORMAT),
+                    "sys_updated_on": updated.strftime(DATETIME_FORMAT),
+                    "sys_mod_count": str(i % 11),
+                },
+            )
+            for j in range(journal_entries):
+                self.insert(
+                    "sys_journal_field",
+                    {
+                        "element_id": incident["sys_id"],
+                        "name": "incident",
+                        "element": "comments" if j % 2 else "work_notes",
+                        "value": f"Journal entry {j} for {incident['number']}. {self._text(i + j)}",
+                        "sys_created_on": (updated + timedelta(seconds=j)).strftime(DATETIME_FORMAT),
+                    },
+                )
+            for j in range(attachments):
+                self.insert(
+                    "sys_attachment",
+                    {
+                        "table_name": "incident",
+                        "table_sys_id": incident["sys_id"],
+                        "file_name": f"evidence_{j}.txt",
+                        "size_bytes": "1024",
+                    },
+                )
+
+        for i in range(max(1, records // 10)):
+            request_item = self.insert(
+                "sc_req_item",
+                {
+                    "number": f"RITM{i + 1:07d}",
+                    "short_description": f"Mock request item {i + 1}",
+                    "opened_by": users[0]["sys_id"],
+                },
+            )
+            for j in range(variables):
+                question = self.insert(
+                    "item_option_new",
+                    {"question_text": f"Question {j}", "name": f"question_{j}"},
+                )
+                option = self.insert(
+                    "sc_item_option",
+                    {"value": f"Answer {j}", "item_option_new": question["sys_id"]},
+                )
+                self.insert(
+                    "sc_item_option_mtom",
+                    {
+                        "request_item": request_item["sys_id"],
+                        "sc_item_option": option["sys_id"],
+                    },
+                )
+
+    def query(self, table, query, params):
+        groups, order_by = parse_encoded_query(query)
+        # Plain name=value parameters act as extra equality filters, like they do on the Table API
+        for key, value in params.items():
+            if not key.startswith("sysparm_") and key != "api":
+                groups.append([(key, "=", value)])
+
+        with self.lock:
+            records = [record for record in self.tables.get(table, []) if all(any(evaluate_condition(record, c) for c in g) for g in groups)]
+
+        for field, descending in reversed(order_by):
+            records.sort(key=lambda record: str(record.get(field, "")), reverse=descending)
+        return records
+
+
+def render_record(base_url, table, record, params):
+    fields = params.get("sysparm_fields")
+    exclude_links = params.get("sysparm_exclude_reference_link", "false").lower() == "true"
+    rendered = {}
+    for key, value in record.items():
+        if fields and key not in fields.split(","):
+            continue
+        reference_table = REFERENCE_FIELDS.get(table, {}).get(key)
+        if reference_table and value and not exclude_links:
+            value = {
+                "link": f"{base_url}/api/now/table/{reference_table}/{value}",
+                "value": value,
+            }
+        rendered[key] = value
+    return rendered
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockServiceNow/1.0"
+    # Buffered, so a response goes out once its request is recorded and the client never sees stale stats
+    wbufsize = -1
+
+    def log_message(self, format, *args):
+        pass
+
+    @property
+    def state(self):
+        return self.server.state
+
+    @property
+    def base_url(self):
+        return f"http://{self.headers.get('Host', 'localhost')}"
+
+    def _read_body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _send(self, status, payload=None, headers=None, content_type="application/json"):
+        body = b""
+        if payload is not None:
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        return len(body)
+
+    def _handle(self, method):
+        parsed = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query, keep_blank_values=True).items()}
+        body = self._read_body()
+
+        state = self.state
+        if state.latency_ms or state.jitter_ms:
+            time.sleep((state.latency_ms + state.random.uniform(0, state.jitter_ms)) / 1000.0)
+
+        with state.lock:
+            state.request_count += 1
+            throttled = state.rate_limit_every and not parsed.path.startswith("/_mock") and state.request_count % state.rate_limit_every == 0
+
+        if throttled:
+            status = 429
+            sent = self._send(
+                status,
+                {
+                    "error": {
+                        "message": "Too many requests",
+                        "detail": "Rate limit exceeded, retry later",
+                    },
+                    "status": "failure",
+                },
+                {"Retry-After": "1"},
+            )
+        else:
+            try:
+                status, sent = self._route(method, parsed.path, params, body)
+            except ValueError as e:
+                status = 400
+                sent = self._send(
+                    status,
+                    {
+                        "error": {
+                            "message": str(e),
+                            "detail": "Mock server could not evaluate the request",
+                        }
+                    },
+                )
+
+        if not parsed.path.startswith("/_mock"):
+            state.record_request(method, parsed.path, status, len(body), sent)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_PATCH(self):
+        self._handle("PATCH")
+
+    def do_DELETE(self):
+        self._handle("DELETE")
+
+    def _route(self, method, path, params, body):
+        if path == "/_mock/stats":
+            return 200, self._send(200, self.state.snapshot())
+        if path == "/_mock/reset":
+            self.state.reset_stats()
+            return 200, self._send(200, {"reset": True})
+        if path == "/_mock/config" and method == "POST":
+            for key, value in json.loads(body or b"{}").items():
+                setattr(self.state, key, value)
+            return 200, self._send(200, {"updated": True})
+
+        if path == "/oauth_token.do":
+            token = {
+                "access_token": uuid.uuid4().hex,
+                "refresh_token": uuid.uuid4().hex,
+                "scope": "useraccount",
+                "expires_in": 1799,
+            }
+            with self.state.lock:
+                self.state.oauth_tokens.add(token["access_token"])
+            return 200, self._send(200, token)
+
+        if path.startswith("/rest/"):
+            return self._route_soar(method, path, params, body)
+
+        for prefix in ("/api/now", "/api/sn_sc"):
+            if path.startswith(prefix):
+                if self.state.oauth and not self._is_token_valid():
+                    return 401, self._send(
+                        401,
+                        {
+                            "error": "invalid_token",
+                            "error_description": "The access token is expired or was not issued by this instance",
+                        },
+                    )
+                return self._route_api(method, path[len(prefix) :], params, body)
+
+        return 404, self._send(
+            404,
+            b"<html><body><h1>Not Found</h1></body></html>",
+            content_type="text/html",
+        )
+
+    def _is_token_valid(self):
+        scheme, _, token = self.headers.get("Authorization", "").partition(" ")
+        with self.state.lock:
+            return scheme == "Bearer" and token in self.state.oauth_tokens
+
+    def _route_api(self, method, path, params, body):
+        parts = [part for part in path.split("/") if part]
+
+        if parts[:1] == ["table"] and len(parts) == 2:
+            return self._table_collection(method, parts[1], params, body)
+        if parts[:1] == ["table"] and len(parts) == 3:
+            return self._table_record(method, parts[1], parts[2], params, body)
+        if parts == ["attachment"]:
+            return self._table_collection("GET", "sys_attachment", params, b"")
+        if parts == ["attachment", "file"] and method == "POST":
+            record = self.state.insert(
+                "sys_attachment",
+                {
+                    "table_name": params.get("table_name", ""),
+                    "table_sys_id": params.get("table_sys_id", ""),
+                    "file_name": params.get("file_name", ""),
+                    "content_type": self.headers.get("Content-Type", ""),
+                    "size_bytes": str(len(body)),
+                },
+            )
+            return 201, self._send(201, {"result": record})
+        if parts == ["search", "sources", "textsearch"]:
+            return self._text_search(params)
+        if parts[:1] == ["import"] and len(parts) == 2 and method == "POST":
+            return self._import_row(parts[1], body)
+        if parts[:1] == ["import"] and len(parts) == 3 and parts[2] == "insertMultiple" and method == "POST":
+            return self._import_multiple(parts[1], body)
+
+        return 400, self._send(
+            400,
+            {
+                "error": {
+                    "message": "Invalid URL",
+                    "detail": f"Unsupported mock endpoint {path}",
+                }
+            },
+        )
+
+    def _table_collection(self, method, table, params, body):
+        if method == "POST":
+            record = self.state.insert(table, json.loads(body or b"{}"))
+            self.state.push(table, record, "insert")
+            return 201, self._send(201, {"result": render_record(self.base_url, table, record, params)})
+
+        records = self.state.query(table, params.get("sysparm_query", ""), params)
+        total = len(records)
+        offset = int(params.get("sysparm_offset") or 0)
+        limit = int(params.get("sysparm_limit") or 10000)
+        page = records[offset : offset + limit]
+
+        headers = {"X-Total-Count": str(total)}
+        links = []
+        if offset + limit < total:
+            next_params = dict(params, sysparm_offset=str(offset + limit))
+            links.append(f'<{self.base_url}/api/now/table/{table}?{urlencode(next_params)}>;rel="next"')
+        if links:
+            headers["Link"] = ",".join(links)
+
+        result = [render_record(self.base_url, table, record, params) for record in page]
+        return 200, self._send(200, {"result": result}, headers)
+
+    def _table_record(self, method, table, sys_id, params, body):
+        record = self.state.index[table].get(sys_id)
+        if record is None:
+            return 404, self._send(
+                404,
+                {
+                    "error": {
+                        "message": "No Record found",
+                        "detail": "Record doesn't exist or ACL restricts the record retrieval",
+                    }
+                },
+            )
+
+        if method in ("PUT", "PATCH"):
+            with self.state.lock:
+                for key, value in json.loads(body or b"{}").items():
+                    if key in ("comments", "work_notes"):
+                        self.state.insert(
+                            "sys_journal_field",
+                            {
+                                "element_id": sys_id,
+                                "name": table,
+                                "element": key,
+                                "value": value,
+                            },
+                        )
+                    record[key] = value
+                record["sys_mod_count"] = str(int(record.get("sys_mod_count", "0")) + 1)
+                record["sys_updated_on"] = datetime.utcnow().strftime(DATETIME_FORMAT)
+            self.state.push(table, record, "update")
+
+        return 200, self._send(200, {"result": render_record(self.base_url, table, record, params)})
+
+    def _text_search(self, params):
+        term = params.get("sysparm_term", "").lower()
+        page = int(params.get("sysparm_page") or 1)
+        limit = int(params.get("sysparm_limit") or 20)
+        sources = [source for source in params.get("sysparm_search_sources", "").split(",") if source]
+
+        results = []
+        result_count = 0
+        for source in sources:
+            matches = [record for record in self.state.tables.get("incident", []) if term in record.get("short_description", "").lower()]
+            result_count += len(matches)
+            records = [
+                {
+                    "sys_id": record["sys_id"],
+                    "table": "incident",
+                    "data": {"number": {"value": record["number"]}},
+                }
+                for record in matches[(page - 1) * limit : page * limit]
+            ]
+            results.append({"name": source, "limit": limit, "page": page, "records": records})
+
+        return 200, self._send(200, {"result": {"result_count": result_count, "search_results": results}})
+
+    def _transform(self, row):
+        """Stand-in for the transform map of every staging table, which creates incidents"""
+        if not row.get("short_description"):
+            return {"status": "error", "error_message": "short_description is mandatory", "table": "incident"}
+        record = self.state.insert("incident", dict(row))
+        return {
+            "transform_map": "Mock incident import",
+            "table": "incident",
+            "display_name": "number",
+            "display_value": record.get("number", ""),
+            "record_link": f"{self.base_url}/api/now/table/incident/{record['sys_id']}",
+            "status": "inserted",
+            "sys_id": record["sys_id"],
+        }
+
+    def _import_row(self, staging_table, body):
+        # A row inserted on its own is transformed before the response, which holds the result of each transform map
+        result = self._transform(json.loads(body or b"{}"))
+        return 201, self._send(
+            201, {"import_set": f"ISET{len(self.state.tables['incident']):07d}", "staging_table": staging_table, "result": [result]}
+        )
+
+    def _import_multiple(self, staging_table, body):
+        # The rows are transformed asynchronously, the response only identifies the import sets
+        for row in json.loads(body or b"{}").get("records", []):
+            self._transform(row)
+        return 201, self._send(201, {"import_set_id": new_sys_id(), "multi_import_set_id": new_sys_id()})
+
+    def _route_soar(self, method, path, params, body):
+        state = self.state
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["rest", "severity"]:
+            return 200, self._send(200, {"count": len(SEVERITIES), "num_pages": 1, "data": SEVERITIES})
+
+        if parts == ["rest", "container"] and method == "GET":
+            sdis = [params.get("_filter_source_data_identifier", "").strip('"')]
+            if "_filter_source_data_identifier__in" in params:
+                sdis = json.loads(params["_filter_source_data_identifier__in"])
+            label = params.get("_filter_label", "").strip('"')
+            with state.lock:
+                matches = [c for c in state.containers if c["source_data_identifier"] in sdis and (not label or c["label"] == label)]
+            return 200, self._send(200, {"count": len(matches), "num_pages": 1, "data": matches})
+
+        if parts == ["rest", "container"] and method == "POST":
+            container = json.loads(body or b"{}")
+            with state.lock:
+                container["id"] = len(state.containers) + 1
+                state.containers.append(container)
+            return 200, self._send(200, {"success": True, "id": container["id"]})
+
+        if len(parts) == 4 and parts[:2] == ["rest", "container"] and parts[3] == "artifacts":
+            container_id = int(parts[2])
+            with state.lock:
+                matches = [a for a in state.artifacts if a.get("container_id") == container_id]
+            return 200, self._send(200, {"count": len(matches), "num_pages": 1, "data": matches})
+
+        if parts[:2] == ["rest", "artifact"] and method == "POST":
+            payload = json.loads(body or b"[]")
+            artifacts = payload if isinstance(payload, list) else [payload]
+            ids = []
+            with state.lock:
+                for artifact in artifacts:
+                    if len(parts) == 3:
+                        existing = next(
+                            (a for a in state.artifacts if a["id"] == int(parts[2])),
+                            None,
+                        )
+                        if existing:
+                            existing.update(artifact)
+                            ids.append(existing["id"])
+                        continue
+                    artifact["id"] = len(state.artifacts) + 1
+                    state.artifacts.append(artifact)
+                    ids.append(artifact["id"])
+            if len(ids) == 1:
+                return 200, self._send(200, {"success": True, "id": ids[0]})
+            return 200, self._send(200, [{"success": True, "id": artifact_id} for artifact_id in ids])
+
+        return 404, self._send(404, {"failed": True, "message": f"Unsupported mock endpoint {path}"})
+
+
+class MockServiceNow:
+    """Runs the mock server on a background thread; usable as a context manager"""
+
+    def __init__(self, host="127.0.0.1", port=0, **state_kwargs):
+        self.state = MockState(**state_kwargs)
+        self.server = ThreadingHTTPServer((host, port), MockHandler)
+        self.server.daemon_threads = True
+        self.server.state = self.state
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Local ServiceNow Table API stand-in")
+    argparser.add_argument("--host", default="127.0.0.1")
+    argparser.add_argument("--port", type=int, default=8090)
+    argparser.add_argument("--records", type=int, default=1000, help="Number of incidents to generate")
+    argparser.add_argument(
+        "--journal-entries",
+        type=int,
+        default=5,
+        help="Comments and work notes per incident",
+    )
+    argparser.add_argument("--attachments", type=int, default=1, help="Attachments per incident")
+    argparser.add_argument("--latency-ms", type=float, default=0, help="Latency added to every request")
+    argparser.add_argument(
+        "--jitter-ms",
+        type=float,
+        default=0,
+        help="Random latency added on top of --latency-ms",
+    )
+    argparser.add_argument(
+        "--rate-limit-every",
+        type=int,
+        default=0,
+        help="Answer every Nth request with a 429",
+    )
+    argparser.add_argument("--push-url", help="Events URL of servicenow_receiver.py to push the created and updated records to")
+    argparser.add_argument("--push-token", help="Token sent with the pushed events")
+    argparser.add_argument("--oauth", action="store_true", help="Only accept the bearer tokens issued by /oauth_token.do")
+    args = argparser.parse_args()
+
+    mock = MockServiceNow(
+        args.host,
+        args.port,
+        records=args.records,
+        journal_entries=args.journal_entries,
+        attachments=args.attachments,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit_every=args.rate_limit_every,
+        push_url=args.push_url,
+        push_token=args.push_token,
+        oauth=args.oauth,
+    )
+    print(f"Mock ServiceNow listening on {mock.url}")
+    try:
+        mock.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# File: servicenow_cache.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import hashlib
+import json
+import time
+
+
+def cache_key(action, table, query, fields=None, limit=None):
+    """Key of a read-only query, the same for identical calls of an action"""
+    key = json.dumps([action, table.lower(), query, fields, limit], sort_keys=True)
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class QueryCache:
+    """Results of read-only queries kept for ttl seconds, shared by the action processes of an asset.
+    Writes to a table drop every cached result of that table.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        # Imported here, the connector imports this module for cache_key on every action run
+        import sqlite3
+
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, table_name TEXT NOT NULL, expires_at REAL NOT NULL, data TEXT NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS results_table_name ON results (table_name)")
+
+    def get(self, key):
+        row = self._connection.execute("SELECT data FROM results WHERE key = ? AND expires_at > ?", (key, time.time())).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, table, records, ttl=None):
+        """Store the records of a query, for ttl seconds instead of the ttl of the cache when given"""
+        now = time.time()
+        with self._connection:
+            self._connection.execute("DELETE FROM results WHERE expires_at <= ?", (now,))
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)", (key, table.lower(), now + (ttl or self.ttl), json.dumps(records))
+            )
+
+    def invalidate(self, table):
+        with self._connection:
+            self._connection.execute("DELETE FROM results WHERE table_name = ?", (table.lower(),))
+
+    def close(self):
+        self._connection.close()
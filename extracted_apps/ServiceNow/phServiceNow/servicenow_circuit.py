@@ -0,0 +1,141 @@
+# File: servicenow_circuit.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the circuit of the asset is open"""
+
+
+class CircuitBreaker:
+    """Circuit breaker of an asset, its state is kept in a file shared by the action processes of the asset.
+    After failure_threshold consecutive connection errors or 5xx responses the circuit opens and requests fail
+    at once. Once reset_timeout seconds have passed, one request goes through as a probe: it closes the circuit
+    when it succeeds and opens it again when it fails.
+
+    The file is read at the first request of the action and kept in memory. While the circuit is closed, requests
+    and successful responses use that copy; the file is only locked, read and written again on failed requests
+    and on state changes. is_closed and is_healthy tell from that copy whether before_request and record(True)
+    need the file, the async transport runs the calls that do in a worker thread instead of its event loop.
+    The threads of an action, e.g. the fetch thread of On Poll, share one breaker: the file is read and written
+    under a lock and the copy in memory is only ever replaced whole.
+    """
+
+    def __init__(self, path, failure_threshold, reset_timeout):
+        self.path = path
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        # Let the requests through even though the circuit is open, e.g. for test connectivity
+        self.force_probe = False
+        self._lock = threading.Lock()
+        # Last state read from or written to the file
+        self._state = None
+
+    @contextmanager
+    def _locked_state(self):
+        """Read the state under an exclusive lock of the file, the changes made to it are written back"""
+        with self._lock, open(self.path, "a+") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                original = dict(state)
+                state.setdefault("state", CIRCUIT_CLOSED)
+                state.setdefault("failures", 0)
+                try:
+                    yield state
+                finally:
+                    self._state = dict(state)
+                if state != original:
+                    f.seek(0)
+                    f.truncate()
+                    f.write(json.dumps(state))
+                    f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def get_state(self):
+        """Current state of the circuit, with the consecutive failures and the time it opened"""
+        if not os.path.exists(self.path):
+            return {"state": CIRCUIT_CLOSED, "failures": 0}
+        with self._locked_state() as state:
+            return dict(state)
+
+    def is_closed(self):
+        """Whether the circuit was closed when last read, before_request then lets the request through without file I/O"""
+        return self._state is not None and self._state["state"] == CIRCUIT_CLOSED
+
+    def is_healthy(self):
+        """Whether the circuit was closed without failures when last read, record(True) then does no file I/O"""
+        return self._state == {"state": CIRCUIT_CLOSED, "failures": 0}
+
+    def before_request(self):
+        """Raise CircuitOpenError when the circuit does not let a request through"""
+        if self.is_closed():
+            return
+
+        with self._locked_state() as state:
+            if state["state"] == CIRCUIT_CLOSED or self.force_probe:
+                return
+
+            now = time.time()
+            if state["state"] == CIRCUIT_HALF_OPEN:
+                # Another request is probing, unless it never reported back
+                if now - state.get("probe_started_at", 0) < self.reset_timeout:
+                    raise CircuitOpenError(self._open_message(state, state["probe_started_at"] + self.reset_timeout))
+            elif now - state.get("opened_at", 0) < self.reset_timeout:
+                raise CircuitOpenError(self._open_message(state, state["opened_at"] + self.reset_timeout))
+
+            state["state"] = CIRCUIT_HALF_OPEN
+            state["probe_started_at"] = now
+
+    def record(self, success):
+        """Record the outcome of a request that was sent"""
+        if success and self.is_healthy():
+            return
+
+        with self._locked_state() as state:
+            if success:
+                if state["state"] != CIRCUIT_CLOSED or state["failures"]:
+                    state.clear()
+                    state.update({"state": CIRCUIT_CLOSED, "failures": 0})
+                return
+
+            state["failures"] += 1
+            if state["state"] == CIRCUIT_HALF_OPEN or state["failures"] >= self.failure_threshold:
+                state["state"] = CIRCUIT_OPEN
+                state["opened_at"] = time.time()
+                state.pop("probe_started_at", None)
+
+    @staticmethod
+    def _open_message(state, retry_at):
+        return (
+            f"The circuit breaker of the asset is open after {state['failures']} consecutive failed requests to ServiceNow, "
+            f"the request was not sent. The next attempt is allowed in {max(0, math.ceil(retry_at - time.time()))} seconds"
+        )
@@ -14,35 +14,87 @@
 # and limitations under the License.
 #
 #
-# Phantom imports
-import phantom.app as phantom
-
-
-try:
-    import phantom.rules as phrules
-except:
-    pass
-import ast
 import codecs
+import hashlib
 import json
+import os
+import queue
 import re
 import sys
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime, timedelta, timezone
 from typing import Any
-from zoneinfo import ZoneInfo
 
-import encryption_helper
-import magic
+import phantom.app as phantom
 import requests
-from bs4 import BeautifulSoup
 from phantom.action_result import ActionResult
 from phantom.base_connector import BaseConnector
 
+from servicenow_cache import QueryCache, cache_key
+from servicenow_circuit import CircuitBreaker
 from servicenow_consts import *
+from servicenow_metrics import RequestMetrics
+from servicenow_profiling import ActionProfiler, profiling_requested
+from servicenow_transport import SUPPORTED_METHODS, create_transport
+
+
+# Every action runs in a new process, so the dependencies only some actions need (HTML error pages,
+# attachments, state encryption, time zones, vault, mirror, export and profiling) are imported where they are used
+phrules = None
+
+
+def _get_phrules():
+    """phantom.rules, imported on first use"""
+    global phrules
+    if phrules is None:
+        import phantom.rules as phrules
+    return phrules
 
 
 DT_STR_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
 
+# Indicators extracted from the ingested tickets, compiled once for every table polled
+URI_REGEX = "[Hh][Tt][Tt][Pp][Ss]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+#]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
+HASH_REGEX = "\\b[0-9a-fA-F]{32}\\b|\\b[0-9a-fA-F]{40}\\b|\\b[0-9a-fA-F]{64}\\b"
+IP_REGEX = "\\d{1,3}\\.\\d{1,3}\\.\\d{1,3}\\.\\d{1,3}"
+IPV6_REGEX = "\\s*((([0-9A-Fa-f]{1,4}:){7}([0-9A-Fa-f]{1,4}|:))|"
+IPV6_REGEX += (
+    "(([0-9A-Fa-f]{1,4}:){6}(:[0-9A-Fa-f]{1,4}|((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\.(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3})|:))"
+)
+IPV6_REGEX += (
+    "|(([0-9A-Fa-f]{1,4}:){5}(((:[0-9A-Fa-f]{1,4}){1,2})|:"
+    "((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\.(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3})|:))|"
+)
+IPV6_REGEX += (
+    "(([0-9A-Fa-f]{1,4}:){4}(((:[0-9A-Fa-f]{1,4}){1,3})|((:[0-9A-Fa-f]{1,4})?:"
+    "((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\."
+    "(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:))|"
+)
+IPV6_REGEX += (
+    "(([0-9A-Fa-f]{1,4}:){3}(((:[0-9A-Fa-f]{1,4}){1,4})|((:"
+    "[0-9A-Fa-f]{1,4}){0,2}:((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\."
+    "(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:))|"
+)
+IPV6_REGEX += (
+    "(([0-9A-Fa-f]{1,4}:){2}(((:[0-9A-Fa-f]{1,4}){1,5})|"
+    "((:[0-9A-Fa-f]{1,4}){0,3}:((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\."
+    "(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:))|"
+)
+IPV6_REGEX += (
+    "(([0-9A-Fa-f]{1,4}:){1}(((:[0-9A-Fa-f]{1,4}){1,6})|"
+    "((:[0-9A-Fa-f]{1,4}){0,4}:((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\."
+    "(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:))|"
+)
+IPV6_REGEX += (
+    "(:(((:[0-9A-Fa-f]{1,4}){1,7})|((:[0-9A-Fa-f]{1,4}){0,5}:((25[0-5]|2[0-4]\\d|1\\d\\d|"
+    "[1-9]?\\d)(\\.(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:)))(%.+)?\\s*"
+)
+URI_REGEXC = re.compile(URI_REGEX)
+HASH_REGEXC = re.compile(HASH_REGEX)
+IP_REGEXC = re.compile(IP_REGEX)
+IPV6_REGEXC = re.compile(IPV6_REGEX)
+
 
 class UnauthorizedOAuthTokenException(Exception):
     pass
@@ -72,6 +124,11 @@ class ServicenowConnector(BaseConnector):
     ACTION_ID_RUN_QUERY = "run_query"
     ACTION_ID_QUERY_USERS = "query_users"
     ACTION_ID_SEARCH_SOURCES = "search_sources"
+    ACTION_ID_EXPORT_RECORDS = "export_records"
+    ACTION_ID_ADD_BULK_NOTE = "add_bulk_note"
+    ACTION_ID_CHECK_TICKETS_CHANGED = "check_tickets_changed"
+    ACTION_ID_SYNC_MIRROR = "sync_mirror"
+    ACTION_ID_BULK_CREATE_TICKETS = "bulk_create_tickets"
 
     def csv_to_list(self, data):
         """Comma separated values to list"""
@@ -87,7 +144,14 @@ class ServicenowConnector(BaseConnector):
         self._try_oauth = False
         self._use_token = False
         self._state = {}
+        # Held for the writes to the state while the fetch thread of the On Poll pipeline runs, it refreshes the token
+        self._state_lock = threading.RLock()
         self._response_headers = {}
+        self._transport = None
+        self._request_metrics = RequestMetrics()
+        self._mirror = None
+        self._query_cache = None
+        self._schema_cache = None
 
     def encrypt_state(self, encrypt_var, token_name):
         """Handle encryption of token.
@@ -95,6 +159,8 @@ class ServicenowConnector(BaseConnector):
         :return: encrypted variable
         """
         self.debug_print(SERVICENOW_ENCRYPT_TOKEN.format(token_name))  # nosemgrep
+        import encryption_helper
+
         return encryption_helper.encrypt(encrypt_var, self.get_asset_id())
 
     def decrypt_state(self, decrypt_var, token_name):
@@ -103,6 +169,8 @@ class ServicenowConnector(BaseConnector):
         :return: decrypted variable
         """
         self.debug_print(SERVICENOW_DECRYPT_TOKEN.format(token_name))  # nosemgrep
+        import encryption_helper
+
         return encryption_helper.decrypt(decrypt_var, self.get_asset_id())
 
     def initialize(self):
@@ -131,11 +199,168 @@ class ServicenowConnector(BaseConnector):
         if phantom.is_fail(ret_val):
             return self.get_status()
 
+        ret_val, self._backfill_days = self._validate_integers(
+            self, config.get(SERVICENOW_JSON_BACKFILL_DAYS, 0), SERVICENOW_JSON_BACKFILL_DAYS, True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._backfill_slice_hours = self._validate_integers(
+            self, config.get(SERVICENOW_JSON_BACKFILL_SLICE_HOURS, SERVICENOW_DEFAULT_BACKFILL_SLICE_HOURS), SERVICENOW_JSON_BACKFILL_SLICE_HOURS
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._backfill_slices_per_poll = self._validate_integers(
+            self,
+            config.get(SERVICENOW_JSON_BACKFILL_SLICES_PER_POLL, SERVICENOW_DEFAULT_BACKFILL_SLICES_PER_POLL),
+            SERVICENOW_JSON_BACKFILL_SLICES_PER_POLL,
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._poll_time_budget = self._validate_integers(
+            self, config.get(SERVICENOW_JSON_POLL_TIME_BUDGET, 0), SERVICENOW_JSON_POLL_TIME_BUDGET, True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._poll_page_seconds = self._validate_integers(
+            self, config.get(SERVICENOW_JSON_POLL_PAGE_SECONDS, SERVICENOW_DEFAULT_POLL_PAGE_SECONDS), SERVICENOW_JSON_POLL_PAGE_SECONDS
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._query_cache_ttl = self._validate_integers(
+            self, config.get(SERVICENOW_JSON_QUERY_CACHE_TTL, 0), SERVICENOW_JSON_QUERY_CACHE_TTL, True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._mirror_reconcile_hours = self._validate_integers(
+            self,
+            config.get(SERVICENOW_JSON_MIRROR_RECONCILE_HOURS, SERVICENOW_DEFAULT_MIRROR_RECONCILE_HOURS),
+            SERVICENOW_JSON_MIRROR_RECONCILE_HOURS,
+            True,
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._schema_cache_ttl = self._validate_integers(
+            self, config.get(SERVICENOW_JSON_SCHEMA_CACHE_TTL, 0), SERVICENOW_JSON_SCHEMA_CACHE_TTL, True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._profile_top_functions = self._validate_integers(
+            self,
+            config.get(SERVICENOW_JSON_PROFILE_TOP_FUNCTIONS, SERVICENOW_DEFAULT_PROFILE_TOP_FUNCTIONS),
+            SERVICENOW_JSON_PROFILE_TOP_FUNCTIONS,
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        self._ingestion_profile = config.get(SERVICENOW_JSON_INGESTION_PROFILE, SERVICENOW_INGESTION_PROFILE_FULL)
+        if self._ingestion_profile not in SERVICENOW_INGESTION_PROFILES:
+            return self.set_status(
+                phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_INGESTION_PROFILE.format(", ".join(SERVICENOW_INGESTION_PROFILES))
+            )
+
+        self._cef_fields = self.csv_to_list(config.get(SERVICENOW_JSON_CEF_FIELDS) or SERVICENOW_DEFAULT_CEF_FIELDS)
+
+        ret_val, self._max_field_length = self._validate_integers(
+            self, config.get(SERVICENOW_JSON_MAX_FIELD_LENGTH, SERVICENOW_DEFAULT_MAX_FIELD_LENGTH), SERVICENOW_JSON_MAX_FIELD_LENGTH, True
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, self._push_fallback_poll_interval = self._validate_integers(
+            self,
+            config.get(SERVICENOW_JSON_PUSH_FALLBACK_POLL_INTERVAL, SERVICENOW_DEFAULT_PUSH_FALLBACK_POLL_INTERVAL),
+            SERVICENOW_JSON_PUSH_FALLBACK_POLL_INTERVAL,
+            True,
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+        # Versions of the tickets/records ingested, kept in push mode only
+        self._push_versions = None
+
+        self._ingestion_priority = []
+        for entry in self.csv_to_list(config.get(SERVICENOW_JSON_INGESTION_PRIORITY) or ""):
+            if not re.match(r"^-?[\w.]+$", entry):
+                return self.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_INGESTION_PRIORITY.format(entry))
+            self._ingestion_priority.append((entry.lstrip("-"), entry.startswith("-")))
+
+        self._enrichment_mode = config.get(SERVICENOW_JSON_ENRICHMENT_MODE, SERVICENOW_ENRICHMENT_MODE_ARTIFACT)
+        if self._enrichment_mode not in SERVICENOW_ENRICHMENT_MODES:
+            return self.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_ENRICHMENT_MODE.format(", ".join(SERVICENOW_ENRICHMENT_MODES)))
+
         if config.get("severity"):
             severity = config.get("severity", "medium").lower()
             if len(severity) > 20:
                 return self.set_status(phantom.APP_ERROR, "Severity length must be less than equal to 20 characters")
 
+        transport = config.get(SERVICENOW_JSON_TRANSPORT, SERVICENOW_DEFAULT_TRANSPORT)
+        if transport not in SERVICENOW_TRANSPORTS:
+            return self.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_TRANSPORT.format(", ".join(SERVICENOW_TRANSPORTS)))
+
+        ret_val, self._max_concurrent_requests = self._validate_integers(
+            self,
+            config.get(SERVICENOW_JSON_MAX_CONCURRENT_REQUESTS, SERVICENOW_DEFAULT_MAX_CONCURRENT_REQUESTS),
+            SERVICENOW_JSON_MAX_CONCURRENT_REQUESTS,
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, request_connect_timeout = self._validate_integers(
+            self,
+            config.get(SERVICENOW_JSON_REQUEST_CONNECT_TIMEOUT, SERVICENOW_DEFAULT_REQUEST_CONNECT_TIMEOUT),
+            SERVICENOW_JSON_REQUEST_CONNECT_TIMEOUT,
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, request_read_timeout = self._validate_integers(
+            self,
+            config.get(SERVICENOW_JSON_REQUEST_READ_TIMEOUT, SERVICENOW_DEFAULT_REQUEST_READ_TIMEOUT),
+            SERVICENOW_JSON_REQUEST_READ_TIMEOUT,
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        self._transport, transport_error = create_transport(
+            transport, self._max_concurrent_requests, (request_connect_timeout, request_read_timeout)
+        )
+        if transport_error:
+            self.save_progress(transport_error)
+            self.debug_print(transport_error)
+        self._transport.observer = self._request_metrics.record
+
+        ret_val, circuit_failure_threshold = self._validate_integers(
+            self,
+            config.get(SERVICENOW_JSON_CIRCUIT_FAILURE_THRESHOLD, SERVICENOW_DEFAULT_CIRCUIT_FAILURE_THRESHOLD),
+            SERVICENOW_JSON_CIRCUIT_FAILURE_THRESHOLD,
+            True,
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        ret_val, circuit_reset_timeout = self._validate_integers(
+            self,
+            config.get(SERVICENOW_JSON_CIRCUIT_RESET_TIMEOUT, SERVICENOW_DEFAULT_CIRCUIT_RESET_TIMEOUT),
+            SERVICENOW_JSON_CIRCUIT_RESET_TIMEOUT,
+        )
+        if phantom.is_fail(ret_val):
+            return self.get_status()
+
+        # Shared by the action processes of the asset, so a degraded instance fails the queued actions fast
+        self._circuit_breaker = None
+        if circuit_failure_threshold:
+            self._circuit_breaker = CircuitBreaker(
+                os.path.join(self.get_state_dir(), f"{self.get_asset_id()}_circuit.json"), circuit_failure_threshold, circuit_reset_timeout
+            )
+            self._transport.breaker = self._circuit_breaker
+
         self._host = self._base_url[self._base_url.find("//") + 2 :]
         self._headers = {"Accept": "application/json"}
         # self._headers.update({'X-no-response-body': 'true'})
@@ -172,6 +397,20 @@ class ServicenowConnector(BaseConnector):
         return phantom.APP_SUCCESS
 
     def finalize(self):
+        if self._transport:
+            self._transport.close()
+
+        if self._mirror:
+            self._mirror.close()
+
+        if self._query_cache:
+            self._query_cache.close()
+        if self._schema_cache:
+            self._schema_cache.close()
+
+        for line in self._request_metrics.format_lines():
+            self.debug_print(line)
+
         if self._use_token:
             try:
                 if self._access_token:
@@ -315,6 +554,8 @@ class ServicenowConnector(BaseConnector):
         status_code = response.status_code
 
         try:
+            from bs4 import BeautifulSoup
+
             soup = BeautifulSoup(response.text, "html.parser")
             # Remove the script, style, footer and navigation part from the HTML message
             for element in soup(["script", "style", "footer", "nav"]):
@@ -394,7 +635,8 @@ class ServicenowConnector(BaseConnector):
         resp_json = None
 
         try:
-            r = requests.post(
+            r = self._transport.request(
+                "post",
                 f"{self._base_url}{self._api_uri}{endpoint}",  # nosemgrep: python.requests.best-practice.use-timeout.use-timeout
                 auth=auth,
                 data=data,
@@ -415,7 +657,7 @@ class ServicenowConnector(BaseConnector):
 
         try:
             request_url = "{}{}".format(self._base_url, "/oauth_token.do")
-            r = requests.post(request_url, data=data)  # nosemgrep
+            r = self._transport.request("post", request_url, data=data)  # nosemgrep
         except Exception as e:
             error_message = self._get_error_message_from_exception(e)
             return (
@@ -435,13 +677,14 @@ class ServicenowConnector(BaseConnector):
             headers.update({"Content-Type": "application/json"})
 
         resp_json = None
-        request_func = getattr(requests, method)
 
-        if not request_func:
-            action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_API_UNSUPPORTED_METHOD, method=method)
+        if method not in SUPPORTED_METHODS:
+            return RetVal(action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_API_UNSUPPORTED_METHOD), resp_json)
 
         try:
-            r = request_func(f"{self._base_url}{self._api_uri}{endpoint}", auth=auth, json=data, headers=headers, params=params)
+            r = self._transport.request(
+                method, f"{self._base_url}{self._api_uri}{endpoint}", auth=auth, json=data, headers=headers, params=params
+            )
         except Exception as e:
             error_message = self._get_error_message_from_exception(e)
             return (
@@ -461,6 +704,7 @@ class ServicenowConnector(BaseConnector):
             self.debug_print("UnauthorizedOAuthTokenException")
             if self._try_oauth:
                 self._try_oauth = False
+                self._request_metrics.record_retry(method, endpoint)
                 ret_val, auth, headers = self._get_authorization_credentials(action_result, force_new=True)
                 if phantom.is_fail(ret_val):
                     return RetVal(phantom.APP_ERROR, None)
@@ -476,12 +720,93 @@ class ServicenowConnector(BaseConnector):
             self.debug_print("UnauthorizedOAuthTokenException")
             if self._try_oauth:
                 self._try_oauth = False
+                self._request_metrics.record_retry("post", endpoint)
                 ret_val, auth, headers = self._get_authorization_credentials(action_result, force_new=True)
                 if phantom.is_fail(ret_val):
                     return RetVal(phantom.APP_ERROR, None)
                 return self._upload_file_helper(action_result, endpoint, params=params, data=data, headers=headers, auth=auth)
             return RetVal(action_result.set_status(phantom.APP_ERROR, "Unable to authorize with OAuth token"), None)
 
+    def _prepare_batch_request(self, call, auth, headers):
+        request_headers = dict(headers)
+        request_headers.update(call.get("headers", {}))
+        request_headers.update(self._headers)
+
+        request = {
+            "method": call.get("method", "get"),
+            "url": f"{self._base_url}{self._api_uri}{call['endpoint']}",
+            "auth": auth,
+            "headers": request_headers,
+            "params": call.get("params"),
+        }
+        if call.get("upload"):
+            request["data"] = call.get("data")
+        else:
+            request_headers.setdefault("Content-Type", "application/json")
+            request["json"] = call.get("data", {})
+        return request
+
+    def _make_rest_calls_helper(self, action_result, calls, auth=None, headers=None):
+        """Run several REST calls through the configured transport, concurrently where it allows.
+        Every response goes through the same processing and OAuth retry as _make_rest_call_helper.
+        :param action_result: Action result used for calls that do not carry their own
+        :param calls: list of dicts with the endpoint and optionally params, data, method, headers,
+                      upload (send data as raw bytes) and action_result of each call
+        :return: list of RetVal in the order of calls, the response headers are stored on each call
+        """
+        if headers is None:
+            headers = {}
+
+        results = [None] * len(calls)
+        pending = list(range(len(calls)))
+        retried = False
+
+        while pending:
+            requests_list = [self._prepare_batch_request(calls[index], auth, headers) for index in pending]
+            responses = self._transport.request_many(requests_list)
+
+            unauthorized = []
+            for index, r in zip(pending, responses):
+                call_action_result = calls[index].get("action_result", action_result)
+                if isinstance(r, Exception):
+                    error_message = self._get_error_message_from_exception(r)
+                    results[index] = RetVal(
+                        call_action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_SERVER_CONNECTION.format(error_message=error_message)),
+                        None,
+                    )
+                    continue
+
+                calls[index]["response_headers"] = r.headers
+                calls[index]["response_size"] = len(r.content or b"")
+                try:
+                    results[index] = self._process_response(r, call_action_result)
+                except UnauthorizedOAuthTokenException:
+                    unauthorized.append(index)
+
+            pending = []
+            if not unauthorized:
+                break
+
+            # Same as _make_rest_call_helper, the token is regenerated once and only the rejected calls are sent again
+            self.debug_print("UnauthorizedOAuthTokenException")
+            if self._try_oauth and not retried:
+                self._try_oauth = False
+                retried = True
+                ret_val, auth, headers = self._get_authorization_credentials(action_result, force_new=True)
+                if phantom.is_fail(ret_val):
+                    for index in unauthorized:
+                        results[index] = RetVal(phantom.APP_ERROR, None)
+                    break
+                for index in unauthorized:
+                    self._request_metrics.record_retry(calls[index].get("method", "get"), calls[index]["endpoint"])
+                pending = unauthorized
+            else:
+                for index in unauthorized:
+                    call_action_result = calls[index].get("action_result", action_result)
+                    results[index] = RetVal(call_action_result.set_status(phantom.APP_ERROR, "Unable to authorize with OAuth token"), None)
+
+        return results
+
     def _get_new_oauth_token(self, action_result, first_try=True):
         """Generate a new oauth token using the refresh token, if available"""
         params = {}
@@ -504,13 +829,7 @@ class ServicenowConnector(BaseConnector):
 
         if phantom.is_fail(ret_val) and params["grant_type"] == "refresh_token" and first_try:
             self.debug_print("Unable to generate new key with refresh token")
-            if "first_run" in self._state:
-                if "last_time" in self._state:
-                    self._state = {"first_run": self._state.get("first_run"), "last_time": self._state.get("last_time")}
-                else:
-                    self._state = {"first_run": self._state.get("first_run")}
-            else:
-                self._state = {}
+            self._reset_state()
 
             # Try again, using a password
             return self._get_new_oauth_token(action_result, first_try=False)
@@ -522,19 +841,14 @@ class ServicenowConnector(BaseConnector):
 
         self._access_token = response_json[SERVICENOW_ACCESS_TOKEN_STRING]
         self._refresh_token = response_json[SERVICENOW_REFRESH_TOKEN_STRING]
-        self._state["oauth_token"] = response_json
-        self._state["retrieval_time"] = datetime.now().strftime(DT_STR_FORMAT)
+        with self._state_lock:
+            self._state["oauth_token"] = response_json
+            self._state["retrieval_time"] = datetime.now().strftime(DT_STR_FORMAT)
 
         try:
             return RetVal(phantom.APP_SUCCESS, response_json["access_token"])
         except Exception as e:
-            if "first_run" in self._state:
-                if "last_time" in self._state:
-                    self._state = {"first_run": self._state.get("first_run"), "last_time": self._state.get("last_time")}
-                else:
-                    self._state = {"first_run": self._state.get("first_run")}
-            else:
-                self._state = {}
+            self._reset_state()
             error_message = self._get_error_message_from_exception(e)
             return RetVal(action_result.set_status(phantom.APP_ERROR, f"Unable to parse access token. {error_message}"), None)
 
@@ -577,6 +891,20 @@ class ServicenowConnector(BaseConnector):
 
         return ret_val, auth, headers
 
+    def _make_local_rest_call(self, method, url, **kwargs):
+        """Call the SOAR REST API of this instance, recording the call with the other request metrics"""
+        start = time.perf_counter()
+        r = error = None
+        try:
+            r = requests.request(method, url, verify=False, **kwargs)  # nosemgrep
+            return r
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            body = r.request.body if r is not None else None
+            self._request_metrics.record(method, url, time.perf_counter() - start, r, error, len(body) if body else 0)
+
     def _check_for_existing_container(self, sdi, label):
         uri = "rest/container?page_size=0&_filter_source_data_identifier="
         filter = "&_filter_label="
@@ -584,7 +912,7 @@ class ServicenowConnector(BaseConnector):
         request_str = f'{self.get_phantom_base_url()}{uri}"{sdi}"{filter}"{label}"{prefix}'
 
         try:
-            r = requests.get(request_str, verify=False)  # nosemgrep
+            r = self._make_local_rest_call("get", request_str)
         except Exception as e:
             self.error_print(f"Error making local rest call: {self._get_error_message_from_exception(e)}")
             return 0, None, None, None
@@ -611,10 +939,59 @@ class ServicenowConnector(BaseConnector):
             self.debug_print(resp_json)
         return 0, None, None, None
 
+    def _get_existing_artifacts(self, container_id):
+        """Artifacts of a container by source data identifier, the newest one for the SDIs of older ingestions"""
+        request_str = f"{self.get_phantom_base_url()}rest/container/{container_id}/artifacts?page_size=0&sort=id&order=asc"
+
+        try:
+            r = self._make_local_rest_call("get", request_str)
+            resp_json = r.json()
+        except Exception as e:
+            self.error_print(f"Error fetching the artifacts of container {container_id}: {self._get_error_message_from_exception(e)}")
+            return {}
+
+        if not isinstance(resp_json, dict) or resp_json.get("failed"):
+            return {}
+
+        return {artifact["source_data_identifier"]: artifact for artifact in resp_json.get("data", []) if artifact.get("source_data_identifier")}
+
+    def _upsert_artifacts(self, artifacts, existing_artifacts):
+        """Update the artifacts of the container that changed and skip the unchanged ones, returns the new artifacts"""
+        new_artifacts = []
+        updated = skipped = 0
+        for artifact in artifacts:
+            existing = existing_artifacts.get(artifact["source_data_identifier"])
+            if not existing:
+                new_artifacts.append(artifact)
+                continue
+
+            if existing.get("cef") == artifact.get("cef") and (existing.get("data") or {}) == (artifact.get("data") or {}):
+                skipped += 1
+                continue
+
+            try:
+                r = self._make_local_rest_call("post", f"{self.get_phantom_base_url()}rest/artifact/{existing['id']}", json=artifact)
+                resp_json = r.json()
+            except Exception as e:
+                self.error_print(f"Error updating artifact {existing['id']}: {self._get_error_message_from_exception(e)}")
+                continue
+
+            if resp_json.get("failed"):
+                self.error_print(f"Error updating artifact {existing['id']}: {resp_json.get('message')}")
+                continue
+            updated += 1
+
+        self.debug_print(f"{updated} artifact(s) updated, {skipped} unchanged artifact(s) skipped")
+        return new_artifacts
+
     def _test_connectivity(self, param):
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
         action_result = self.add_action_result(ActionResult(dict(param)))
 
+        if self._circuit_breaker:
+            self.save_progress(SERVICENOW_CIRCUIT_STATE_MESSAGE.format(**self._circuit_breaker.get_state()))
+            self._circuit_breaker.force_probe = True
+
         ret_val, auth, headers = self._get_authorization_credentials(action_result, force_new=True)
         if phantom.is_fail(ret_val):
             return action_result.get_status()
@@ -629,6 +1006,12 @@ class ServicenowConnector(BaseConnector):
             action_result, SERVICENOW_TEST_CONNECTIVITY_ENDPOINT, params=request_params, headers=headers, auth=auth
         )
 
+        # Test connectivity always reaches the instance and acts as the probe of an open circuit
+        if self._circuit_breaker:
+            circuit_state = self._circuit_breaker.get_state()
+            self.save_progress(SERVICENOW_CIRCUIT_STATE_MESSAGE.format(**circuit_state))
+            action_result.update_summary({"circuit_breaker": circuit_state})
+
         if phantom.is_fail(ret_val):
             self.debug_print(action_result.get_message())
             message = action_result.get_message()
@@ -667,6 +1050,9 @@ class ServicenowConnector(BaseConnector):
         if not isinstance(fields, dict):
             return RetVal(action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_FIELDS_JSON_PARSE), None)
 
+        if phantom.is_fail(self._validate_fields(action_result, table, fields)):
+            return action_result.get_status()
+
         data = dict()
         data.update(fields)
 
@@ -699,6 +1085,7 @@ class ServicenowConnector(BaseConnector):
             return phantom.APP_ERROR
         if not response.get("result"):
             return action_result.set_status(phantom.APP_ERROR, SERVICENOW_INVALID_PARAMETER_MESSAGE)
+        self._invalidate_query_cache(table)
         created_ticket_id = response.get("result", {}).get("sys_id")
         res = response.get("result")
 
@@ -717,17 +1104,45 @@ class ServicenowConnector(BaseConnector):
         action_result.add_data(res)
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _add_attachment(self, action_result, table, ticket_id, vault_id):
-        if not vault_id:
-            return (phantom.APP_SUCCESS, None)
+    def _read_vault_rows(self, action_result, vault_id):
+        """Read the rows of a vault file, either a JSON list of objects or a CSV file with a header row"""
+        try:
+            _, _, file_info = _get_phrules().vault_info(vault_id=vault_id)
+            file_info = next(iter(file_info))
+        except IndexError:
+            return RetVal(action_result.set_status(phantom.APP_ERROR, "Vault file could not be found with supplied Vault ID"), None)
+        except Exception:
+            return RetVal(action_result.set_status(phantom.APP_ERROR, "Vault ID not valid"), None)
 
-        ret_val, auth, headers = self._get_authorization_credentials(action_result)
-        if phantom.is_fail(ret_val):
-            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE), None
+        try:
+            with open(file_info.get("path"), encoding="utf-8-sig", newline="") as f:
+                text = f.read()
+
+            if text.lstrip().startswith(("[", "{")):
+                rows = json.loads(text)
+                if isinstance(rows, dict):
+                    rows = rows.get("records")
+            else:
+                import csv
+
+                rows = list(csv.DictReader(text.splitlines()))
+        except Exception as e:
+            return RetVal(
+                action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_BULK_ROWS.format(self._get_error_message_from_exception(e))), None
+            )
 
+        if not rows or not isinstance(rows, list) or not all(isinstance(row, dict) and row for row in rows):
+            return RetVal(
+                action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_BULK_ROWS.format("Every row must be a non-empty object")), None
+            )
+
+        return RetVal(phantom.APP_SUCCESS, rows)
+
+    def _prepare_attachment_upload(self, action_result, table, ticket_id, vault_id):
+        """Look up the vault file and build the upload call for it, the upload itself is done by the caller"""
         # Check for file in vault
         try:
-            success, message, file_info = phrules.vault_info(vault_id=vault_id)
+            success, message, file_info = _get_phrules().vault_info(vault_id=vault_id)
             file_info = next(iter(file_info))
         except IndexError:
             return action_result.set_status(phantom.APP_ERROR, "Vault file could not be found with supplied Vault ID"), None
@@ -737,61 +1152,83 @@ class ServicenowConnector(BaseConnector):
         filename = file_info.get("name", vault_id)
         filepath = file_info.get("path")
 
+        import magic
+
         mime = magic.Magic(mime=True)
         magic_str = mime.from_file(filepath)
-        headers.update({"Content-Type": magic_str})
 
         try:
-            data = open(filepath, "rb").read()
+            with open(filepath, "rb") as f:
+                data = f.read()
         except Exception as e:
             self._dump_error_log(e, "Error reading the file")
             return (action_result.set_status(phantom.APP_ERROR, "Failed to read file from Vault"), None)
 
-        # Was not detonated before
-        self.save_progress("Uploading the file")
-
         params = {"table_name": table, "table_sys_id": ticket_id, "file_name": filename}
 
-        ret_val, response = self._upload_file_helper(action_result, "/attachment/file", headers=headers, params=params, data=data, auth=auth)
-
-        if phantom.is_fail(ret_val):
-            return (action_result.get_status(), response)
-
-        return (phantom.APP_SUCCESS, response)
+        call = {
+            "endpoint": "/attachment/file",
+            "method": "post",
+            "headers": {"Content-Type": magic_str},
+            "params": params,
+            "data": data,
+            "upload": True,
+            "action_result": action_result,
+        }
+        return phantom.APP_SUCCESS, call
 
     def _handle_multiple_attachements(self, action_result, table, ticket_id, vault_ids) -> tuple[bool, list[dict[str, Any]]]:
         attachment_count = 0
         vault_error = {}
         vault_ids = self.csv_to_list(vault_ids)
         responses = []
+
+        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        if phantom.is_fail(ret_val):
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE), []
+
+        def add_vault_error(message, vault_id):
+            vault_error.setdefault(message, []).append(vault_id)
+
+        upload_calls = []
+        upload_vault_ids = []
         for vault_id in vault_ids:
-            if vault_id:
-                self.save_progress(f"Attaching file to the ticket with vault id {vault_id}")
+            self.save_progress(f"Attaching file to the ticket with vault id {vault_id}")
+            # Each file gets its own action result so that the failure messages do not overwrite each other
+            vault_action_result = ActionResult()
 
-                try:
-                    ret_val, response = self._add_attachment(action_result, table, ticket_id, vault_id)
-                    responses.append(response.get("result", {}))
+            try:
+                ret_val, call = self._prepare_attachment_upload(vault_action_result, table, ticket_id, vault_id)
+            except Exception as e:
+                error_message = self._get_error_message_from_exception(e)
+                return action_result.set_status(
+                    phantom.APP_ERROR,
+                    f"Invalid Vault ID, please enter \
+                                    valid Vault ID. {error_message}",
+                ), []
 
-                except Exception as e:
-                    error_message = self._get_error_message_from_exception(e)
-                    return action_result.set_status(
-                        phantom.APP_ERROR,
-                        f"Invalid Vault ID, please enter \
-                                        valid Vault ID. {error_message}",
-                    ), []
+            if phantom.is_fail(ret_val):
+                add_vault_error(vault_action_result.get_message(), vault_id)
+                continue
 
-                if phantom.is_success(ret_val):
-                    attachment_count += 1
-                else:
-                    if vault_error.get(action_result.get_message()):
-                        values = vault_error.get(action_result.get_message())
-                        values.append(vault_id)
-                        vault_error.update({f"{action_result.get_message()}": values})
-                    else:
-                        vault_error[action_result.get_message()] = [vault_id]
+            upload_calls.append(call)
+            upload_vault_ids.append(vault_id)
+
+        if upload_calls:
+            self.save_progress(f"Uploading {len(upload_calls)} file(s)")
+
+        upload_results = self._make_rest_calls_helper(action_result, upload_calls, auth=auth, headers=headers)
+        for vault_id, call, (ret_val, response) in zip(upload_vault_ids, upload_calls, upload_results):
+            if phantom.is_success(ret_val):
+                attachment_count += 1
+                responses.append(response.get("result", {}))
+            else:
+                add_vault_error(call["action_result"].get_message(), vault_id)
 
         action_result.update_summary({"successfully_added_attachments_count": attachment_count})
         if vault_error:
+            # Surface one of the failures on the action result itself, as the single attachment flow did
+            action_result.set_status(phantom.APP_ERROR, next(iter(vault_error)))
             action_result.update_summary({"vault_failure_details": vault_error})
             return phantom.APP_ERROR, []
 
@@ -808,6 +1245,32 @@ class ServicenowConnector(BaseConnector):
         except Exception:
             return action_result.set_status(phantom.APP_ERROR, SERVICENOW_INVALID_PARAMETER_MESSAGE)
 
+        fields = param.get(SERVICENOW_JSON_FIELDS, "{}")
+
+        try:
+            fields = json.loads(fields)
+        except json.JSONDecodeError as e:
+            error_message = str(e)
+            return RetVal(
+                action_result.set_status(
+                    phantom.APP_ERROR,
+                    f"Error building fields dictionary: {error_message}. \
+                        Please ensure that provided input is in valid JSON format",
+                ),
+                None,
+            )
+
+        if not isinstance(fields, dict):
+            return RetVal(action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_FIELDS_JSON_PARSE), None)
+
+        vault_ids = param.get(SERVICENOW_JSON_VAULT_ID)
+        if not fields and not vault_ids:
+            return action_result.set_status(phantom.APP_ERROR, "Please specify at-least one of fields or vault_id parameter")
+
+        # Fields that cannot be written fail before any request about the ticket
+        if phantom.is_fail(self._validate_fields(action_result, table, fields)):
+            return action_result.get_status()
+
         ret_val, auth, headers = self._get_authorization_credentials(action_result)
         if phantom.is_fail(ret_val):
             return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
@@ -834,28 +1297,6 @@ class ServicenowConnector(BaseConnector):
 
         endpoint = SERVICENOW_TICKET_ENDPOINT.format(table, ticket_id)
 
-        fields = param.get(SERVICENOW_JSON_FIELDS, "{}")
-
-        try:
-            fields = json.loads(fields)
-        except json.JSONDecodeError as e:
-            error_message = str(e)
-            return RetVal(
-                action_result.set_status(
-                    phantom.APP_ERROR,
-                    f"Error building fields dictionary: {error_message}. \
-                        Please ensure that provided input is in valid JSON format",
-                ),
-                None,
-            )
-
-        if not isinstance(fields, dict):
-            return RetVal(action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_FIELDS_JSON_PARSE), None)
-
-        vault_ids = param.get(SERVICENOW_JSON_VAULT_ID)
-        if not fields and not vault_ids:
-            return action_result.set_status(phantom.APP_ERROR, "Please specify at-least one of fields or vault_id parameter")
-
         res = {}
         if fields:
             self.save_progress("Updating ticket with the provided fields")
@@ -864,6 +1305,7 @@ class ServicenowConnector(BaseConnector):
             if phantom.is_fail(ret_val):
                 return action_result.get_status()
 
+            self._invalidate_query_cache(table)
             action_result.update_summary({"fields_updated": True})
             res.update(response.get("result", {}))
 
@@ -881,7 +1323,7 @@ class ServicenowConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _get_ticket_details(self, action_result, table, sys_id, is_sys_id=True):
+    def _get_ticket_details(self, action_result, table, sys_id, is_sys_id=True, max_journal_entries=None, journal_since=None):
         ret_val, auth, headers = self._get_authorization_credentials(action_result)
         if phantom.is_fail(ret_val):
             return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
@@ -922,45 +1364,56 @@ class ServicenowConnector(BaseConnector):
 
         ticket_sys_id = ticket.get("sys_id")
 
-        params = {"sysparm_query": f"table_sys_id={ticket_sys_id}"}
-
-        # get the attachment details
-        ret_val, attach_resp = self._make_rest_call_helper(action_result, "/attachment", auth=auth, headers=headers, params=params)
+        # The attachment and journal lookups are independent, so they are paged together
+        attachment_query = {
+            "endpoint": "/attachment",
+            "params": {"sysparm_query": f"table_sys_id={ticket_sys_id}"},
+            "limit": SERVICENOW_DEFAULT_LIMIT,
+            "action_result": ActionResult(),
+        }
+        # Newest entries first and only the fields read below, a ticket can have thousands of entries
+        journal_filter = "element=comments^ORelement=work_notes"
+        if journal_since:
+            journal_filter += "^sys_created_on>=javascript:gs.dateGenerate('{}','{}')".format(
+                *self._get_cursor_time(self.get_config(), journal_since).split(" ")
+            )
+        journal_filter += "^ORDERBYDESCsys_created_on"
+        journal_query = {
+            "endpoint": SERVICENOW_SYS_JOURNAL_FIELD_ENDPOINT,
+            "params": {"element_id": sys_id, "sysparm_query": journal_filter, "sysparm_fields": "element,value"},
+            "limit": max_journal_entries or SERVICENOW_DEFAULT_MAX_JOURNAL_ENTRIES,
+            "action_result": ActionResult(),
+        }
+        attach_details, journal_items = self._paginate_many(action_result, [attachment_query, journal_query])
 
         # is some versions of servicenow fail the attachment query if not present
         # some pass it with no data if not present, so only add data if present and valid
-        if phantom.is_success(ret_val):
-            try:
-                attach_details = attach_resp["result"]
-                ticket["attachment_details"] = attach_details
-            except Exception:
-                pass
+        if attach_details is not None:
+            ticket["attachment_details"] = attach_details
 
-        params = {}
-        params["element_id"] = sys_id
-        params["sysparm_query"] = "element=comments^ORelement=work_notes"
-        ret_val, response = self._make_rest_call_helper(
-            action_result, SERVICENOW_SYS_JOURNAL_FIELD_ENDPOINT, auth=auth, headers=headers, params=params
-        )
-
-        if phantom.is_fail(ret_val):
+        if journal_items is None:
             self.debug_print(
                 f"Unable to fetch comments and work_notes for \
-                    the ticket with sys ID: {ticket_sys_id}. Details: {action_result.get_message()}"
+                    the ticket with sys ID: {ticket_sys_id}. Details: {journal_query['action_result'].get_message()}"
             )
+            journal_items = []
 
+        # The entries are listed oldest first, as they were before only the newest ones were fetched
         comment_section = []
         worknotes_section = []
-        if response.get("result", []):
-            for item in response.get("result", []):
-                if item["element"] == "comments":
-                    comment_section.append(item.get("value", ""))
-                elif item["element"] == "work_notes":
-                    worknotes_section.append(item.get("value", ""))
+        for item in reversed(journal_items):
+            if item["element"] == "comments":
+                comment_section.append(item.get("value", ""))
+            elif item["element"] == "work_notes":
+                worknotes_section.append(item.get("value", ""))
 
         ticket["comments_section"] = comment_section
         ticket["worknotes_section"] = worknotes_section
 
+        journal_entries = len(comment_section) + len(worknotes_section)
+        total_journal_entries = journal_query.get("total_count", journal_entries)
+        action_result.update_summary({"journal_entries": journal_entries, "total_journal_entries": total_journal_entries})
+
         action_result.add_data(ticket)
 
         return phantom.APP_SUCCESS
@@ -976,7 +1429,24 @@ class ServicenowConnector(BaseConnector):
         except Exception:
             return action_result.set_status(phantom.APP_ERROR, SERVICENOW_INVALID_PARAMETER_MESSAGE)
 
-        ret_val = self._get_ticket_details(action_result, table_name, ticket_id, is_sys_id=is_sys_id)
+        ret_val, max_journal_entries = self._validate_integers(
+            action_result,
+            param.get(SERVICENOW_JSON_MAX_JOURNAL_ENTRIES, SERVICENOW_DEFAULT_MAX_JOURNAL_ENTRIES),
+            SERVICENOW_JSON_MAX_JOURNAL_ENTRIES,
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        journal_since = param.get(SERVICENOW_JSON_JOURNAL_SINCE)
+        if journal_since:
+            try:
+                journal_since = datetime.strptime(journal_since.strip(), SERVICENOW_DATETIME_FORMAT).strftime(SERVICENOW_DATETIME_FORMAT)
+            except ValueError:
+                return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_JOURNAL_SINCE)
+
+        ret_val = self._get_ticket_details(
+            action_result, table_name, ticket_id, is_sys_id=is_sys_id, max_journal_entries=max_journal_entries, journal_since=journal_since
+        )
 
         if phantom.is_fail(ret_val):
             return action_result.get_status()
@@ -989,47 +1459,278 @@ class ServicenowConnector(BaseConnector):
         return action_result.set_status(phantom.APP_SUCCESS)
 
     def _paginator(self, endpoint, action_result, payload=None, limit=None):
+        return self._paginate_many(action_result, [{"endpoint": endpoint, "params": payload, "limit": limit}])[0]
+
+    def _paginate_many(self, action_result, queries):
+        """Page through several queries together. The first pages of all the queries go out in one batch and
+        tell how many records each has, then all the remaining pages go out in a second batch.
+        :param action_result: Action result used for queries that do not carry their own
+        :param queries: list of dicts with the endpoint, params, limit and optionally action_result of each query,
+            the X-Total-Count of a query is set in its total_count
+        :return: list with the records of every query in order, or None for the queries that failed
+        """
         ret_val, auth, headers = self._get_authorization_credentials(action_result)
         if phantom.is_fail(ret_val):
-            action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
-            return None
-
-        items_list = list()
-        if not payload:
-            payload = dict()
+            for query in queries:
+                query.get("action_result", action_result).set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
+            return [None] * len(queries)
+
+        first_calls = []
+        for query in queries:
+            payload = dict(query.get("params") or {})
+            payload["sysparm_offset"] = SERVICENOW_DEFAULT_OFFSET
+            payload["sysparm_limit"] = min(query["limit"], SERVICENOW_DEFAULT_LIMIT)
+            first_calls.append({"endpoint": query["endpoint"], "params": payload, "action_result": query.get("action_result", action_result)})
+
+        items_lists = [None] * len(queries)
+        page_calls = []
+        page_queries = []
+        first_results = self._make_rest_calls_helper(action_result, first_calls, auth=auth, headers=headers)
+        for index, (call, (ret_val, items)) in enumerate(zip(first_calls, first_results)):
+            if phantom.is_fail(ret_val):
+                continue
 
-        payload["sysparm_offset"] = SERVICENOW_DEFAULT_OFFSET
-        payload["sysparm_limit"] = min(limit, SERVICENOW_DEFAULT_LIMIT)
+            items_lists[index] = self._get_result_list(items)
+            total_item_count = 1
+            if call.get("response_headers"):
+                total_item_count = int(call["response_headers"].get("X-Total-Count", 1))
+                queries[index]["total_count"] = total_item_count
 
-        while True:
-            ret_val, items = self._make_rest_call_helper(action_result, endpoint, auth=auth, headers=headers, params=payload)
+            limit = queries[index]["limit"]
+            if limit and len(items_lists[index]) >= limit:
+                continue
 
+            # Request all the remaining pages at once, the transport decides how many are in flight
+            item_count = min(limit, total_item_count)
+            offset = call["params"]["sysparm_offset"] + call["params"]["sysparm_limit"]
+            while offset < item_count:
+                page_payload = dict(call["params"])
+                page_payload["sysparm_offset"] = offset
+                page_payload["sysparm_limit"] = min(item_count - offset, SERVICENOW_DEFAULT_LIMIT)
+                page_calls.append({"endpoint": call["endpoint"], "params": page_payload, "action_result": call["action_result"]})
+                page_queries.append(index)
+                offset += page_payload["sysparm_limit"]
+
+        page_results = self._make_rest_calls_helper(action_result, page_calls, auth=auth, headers=headers)
+        for index, (ret_val, items) in zip(page_queries, page_results):
+            if items_lists[index] is None:
+                continue
             if phantom.is_fail(ret_val):
-                return None
+                items_lists[index] = None
+                continue
+            items_lists[index].extend(self._get_result_list(items))
+
+        return [items_list[: query["limit"]] if items_list is not None else None for query, items_list in zip(queries, items_lists)]
+
+    def _iter_poll_pages(self, action_result, queries, deadline):
+        """Page through the queries of a poll with one page per query in flight. The page size of every table adapts
+        to the latency and size of its pages and is kept in its cursor for the next poll. A failed page is requested
+        again with half the records. No page is requested after the deadline, the queries cut short are left
+        with complete set to False. The page size of every query starts at its page_size and is set back to the
+        size reached, the caller keeps it in the cursor of the table.
+        :return: generator of the index of the query and the records of each page, in the order of the pages of
+                 every query. The records are None when the query failed, no page of it follows
+        """
+        from servicenow_paging import PageSizeController
 
-            # get total record count from headers
-            if self._response_headers:
-                total_item_count = int(self._response_headers.get("X-Total-Count", 1))
+        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        if phantom.is_fail(ret_val):
+            for query in queries:
+                query["action_result"].set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
+            for index in range(len(queries)):
+                yield index, None
+            return
+
+        controllers = {}
+        for query in queries:
+            query["offset"] = SERVICENOW_DEFAULT_OFFSET
+            query["complete"] = False
+            if query["table"] not in controllers:
+                controllers[query["table"]] = PageSizeController(
+                    query.get("page_size", SERVICENOW_POLL_INITIAL_PAGE_SIZE),
+                    SERVICENOW_POLL_MIN_PAGE_SIZE,
+                    SERVICENOW_DEFAULT_LIMIT,
+                    self._poll_page_seconds,
+                    SERVICENOW_POLL_MAX_PAGE_BYTES,
+                )
 
-            # if result is found
-            result = items.get("result")
-            if result:
-                items_list.extend(result if isinstance(result, list) else [result])
+        active = [index for index, query in enumerate(queries) if query["limit"]]
+        for index in range(len(queries)):
+            if index not in active:
+                queries[index]["complete"] = True
 
-            # extend item list if data is present on that page
-            if limit and len(items_list) >= limit:
-                return items_list[:limit]
+        try:
+            while active:
+                if deadline and time.monotonic() >= deadline:
+                    self.debug_print(f"Time budget of the poll reached, {len(active)} table queries left unfinished")
+                    break
 
-            if total_item_count <= limit:
-                if total_item_count <= SERVICENOW_DEFAULT_LIMIT:
-                    return items_list
+                calls = []
+                for index in active:
+                    query = queries[index]
+                    page_limit = min(controllers[query["table"]].page_size, query["limit"] - query["offset"])
+                    params = dict(query["params"], sysparm_offset=query["offset"], sysparm_limit=page_limit)
+                    calls.append({"endpoint": query["endpoint"], "params": params, "action_result": query["action_result"]})
+
+                start = time.monotonic()
+                results = self._make_rest_calls_helper(action_result, calls, auth=auth, headers=headers)
+                elapsed = time.monotonic() - start
+
+                still_active = []
+                for index, call, (ret_val, items) in zip(active, calls, results):
+                    query = queries[index]
+                    controller = controllers[query["table"]]
+                    if phantom.is_fail(ret_val):
+                        if controller.shrink():
+                            self.debug_print(f"Page of table {query['table']} failed, requesting it again with {controller.page_size} records")
+                            still_active.append(index)
+                        else:
+                            yield index, None
+                        continue
+
+                    records = self._get_result_list(items)
+                    controller.observe(len(records), elapsed, call.get("response_size", 0))
+                    query["offset"] += len(records)
+
+                    total_count = sys.maxsize
+                    if call.get("response_headers"):
+                        total_count = int(call["response_headers"].get("X-Total-Count", total_count))
+                    if len(records) < call["params"]["sysparm_limit"] or query["offset"] >= min(query["limit"], total_count):
+                        query["complete"] = True
+                    else:
+                        still_active.append(index)
+                    if records:
+                        yield index, records
+                active = still_active
+        finally:
+            # Also when the pipeline stops reading the pages
+            for query in queries:
+                query["page_size"] = controllers[query["table"]].page_size
+
+    def _fetch_poll_pages(self, action_result, queries, deadline):
+        """Fetch all the pages of the queries of a poll, see _iter_poll_pages
+        :return: list with the records of every query in order, or None for the queries that failed
+        """
+        issues_lists = [[] for _ in queries]
+        for index, records in self._iter_poll_pages(action_result, queries, deadline):
+            if records is None:
+                issues_lists[index] = None
+            else:
+                issues_lists[index].extend(records)
+        return issues_lists
 
-            # exit if the total number of records are less than limit or else it has fetched all the pages
-            if (payload["sysparm_offset"] + payload["sysparm_limit"]) == total_item_count:
-                return items_list
+    def _poll_pages(self, action_result, queries, deadline):
+        """Fetch stage of the poll pipeline, the pages of the queries as they come in. With a priority order the keys
+        of the pending tickets are scanned and the selected records come as one page per query.
+        """
+        if not self._ingestion_priority:
+            yield from self._iter_poll_pages(action_result, queries, deadline)
+            return
+
+        issues_lists = self._select_priority_issues(action_result, queries, self._fetch_poll_pages(action_result, queries, deadline))
+        for index, issues in enumerate(issues_lists):
+            if issues is None or issues:
+                yield index, issues
+
+    def _run_poll_pipeline(self, action_result, queries, label, severity, config, enrichment_fields, deadline):
+        """Ingest the issues of the queries of a poll in two overlapping stages, so the next page downloads while
+        the previous one is being saved. A thread fetches the pages, resolves their references and builds the
+        containers and artifacts of every chunk of issues, the calling thread saves the chunks in the order they
+        were fetched. The fetch thread stays at most SERVICENOW_POLL_PIPELINE_CHUNKS chunks ahead.
+        The fetch thread does not write the state, apart from a new OAuth token under _state_lock. The page sizes
+        reached are kept in the table cursors once it is done.
+        Every query gets the number of issues fetched, complete is set to False for the queries not entirely saved
+        by the deadline and failed to True for the queries with a failed page.
+        :return: list with the issues saved for every query, in order, and the number of issues that failed
+        """
+        stop = threading.Event()
+        chunks = queue.Queue(maxsize=SERVICENOW_POLL_PIPELINE_CHUNKS)
+        done = object()
+        fetch_errors = []
+
+        def put(item):
+            # The saving stage stops reading at the deadline, the fetch thread must not block on a full queue then
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=SERVICENOW_POLL_PIPELINE_WAIT_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
 
-            payload["sysparm_offset"] += payload["sysparm_limit"]
-            payload["sysparm_limit"] = min(total_item_count - payload["sysparm_offset"], SERVICENOW_DEFAULT_LIMIT)
+        def fetch():
+            pages = self._poll_pages(action_result, queries, deadline)
+            try:
+                for index, issues in pages:
+                    if issues is None:
+                        queries[index]["failed"] = True
+                        continue
+
+                    references = None
+                    if enrichment_fields:
+                        references = self._resolve_references(action_result, issues, enrichment_fields)
+                    queries[index]["fetched"] += len(issues)
+                    for offset in range(0, len(issues), SERVICENOW_POLL_INGEST_CHUNK_SIZE):
+                        chunk = issues[offset : offset + SERVICENOW_POLL_INGEST_CHUNK_SIZE]
+                        payloads = [self._build_issue_payloads(issue, label, severity, config, references) for issue in chunk]
+                        if not put((index, chunk, payloads)):
+                            return
+            except Exception as e:
+                fetch_errors.append(e)
+            finally:
+                pages.close()
+                put(done)
+
+        cursors = self._state.setdefault("table_cursors", {})
+        for query in queries:
+            query["fetched"] = 0
+            query["page_size"] = cursors.setdefault(query["table"], {}).get("page_size", SERVICENOW_POLL_INITIAL_PAGE_SIZE)
+        ingested = [[] for _ in queries]
+        failed = 0
+        fetcher = threading.Thread(target=fetch, daemon=True)
+        fetcher.start()
+        try:
+            while True:
+                item = chunks.get()
+                if item is done:
+                    break
+                if deadline and time.monotonic() >= deadline:
+                    self.debug_print("Time budget of the poll reached, the issues left are ingested on the next poll")
+                    break
+
+                index, chunk, payloads = item
+                if not ingested[index]:
+                    self.save_progress(f"Ingesting issues from table {queries[index]['table']}")
+                for issue, (container, artifacts) in zip(chunk, payloads):
+                    # In push mode, the tickets/records already ingested from the spool are skipped
+                    if self._is_version_ingested(issue):
+                        continue
+                    issue_failed = self._save_issue(issue, container, artifacts, label)
+                    if not issue_failed:
+                        self._remember_version(issue)
+                    failed += issue_failed
+                ingested[index].extend(chunk)
+        finally:
+            stop.set()
+            fetcher.join()
+
+        for query in queries:
+            self._state["table_cursors"][query["table"]]["page_size"] = query["page_size"]
+
+        if fetch_errors:
+            raise fetch_errors[0]
+
+        for query, issues in zip(queries, ingested):
+            if len(issues) < query["fetched"]:
+                query["complete"] = False
+        return ingested, failed
+
+    @staticmethod
+    def _get_result_list(items):
+        result = items.get("result") if items else None
+        if not result:
+            return []
+        return result if isinstance(result, list) else [result]
 
     def _describe_service_catalog(self, param):
         action_result = self.add_action_result(ActionResult(dict(param)))
@@ -1223,6 +1924,11 @@ class ServicenowConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    @staticmethod
+    def _unescape_text(text):
+        """Turn the escape sequences typed in a note back into the characters"""
+        return text.replace("\\n", "\n").replace("\\'", "'").replace('\\"', '"').replace("\\b", "\b")
+
     def _add_work_note(self, param):
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
         action_result = self.add_action_result(ActionResult(dict(param)))
@@ -1263,7 +1969,7 @@ class ServicenowConnector(BaseConnector):
         work_note = param.get("work_note")
 
         endpoint = SERVICENOW_TICKET_ENDPOINT.format(table_name, sys_id)
-        data = {"work_notes": work_note.replace("\\n", "\n").replace("\\'", "'").replace('\\"', '"').replace("\\b", "\b")}
+        data = {"work_notes": self._unescape_text(work_note)}
 
         request_params = {}
         request_params["sysparm_display_value"] = True
@@ -1275,6 +1981,7 @@ class ServicenowConnector(BaseConnector):
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
+        self._invalidate_query_cache(table_name)
         if response.get("result", {}).get("work_notes"):
             response["result"]["work_notes"] = response["result"]["work_notes"].replace("\n\n", "\n, ").strip(", ")
 
@@ -1282,6 +1989,198 @@ class ServicenowConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS, "Added the work note successfully")
 
+    def _add_bulk_note(self, param):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        ticket_ids = self.csv_to_list(param.get(SERVICENOW_JSON_IDS, ""))
+        table_name = param.get("table_name", SERVICENOW_DEFAULT_TABLE)
+        is_sys_id = param.get("is_sys_id", False)
+        note_type = param.get(SERVICENOW_JSON_NOTE_TYPE, SERVICENOW_NOTE_TYPE_COMMENT)
+        note = param.get(SERVICENOW_JSON_NOTE)
+
+        if not ticket_ids or not note:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_INVALID_PARAMETER_MESSAGE)
+
+        if note_type not in SERVICENOW_NOTE_TYPES:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_NOTE_TYPE.format(", ".join(SERVICENOW_NOTE_TYPES)))
+
+        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        if phantom.is_fail(ret_val):
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
+
+        # All the ticket numbers are resolved with one IN query instead of one lookup per ticket
+        sys_ids = {ticket_id: ticket_id for ticket_id in ticket_ids}
+        if not is_sys_id:
+            ret_val, records = self._query_in(action_result, table_name, "number", ticket_ids, "sys_id,number", auth=auth, headers=headers)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+            numbers = {record["number"]: record["sys_id"] for record in records}
+            sys_ids = {ticket_id: numbers.get(ticket_id) for ticket_id in ticket_ids}
+
+        # Only the fields below come back, the full rendered record is not needed for the result
+        data = {SERVICENOW_NOTE_TYPES[note_type]: self._unescape_text(note)}
+        request_params = {"sysparm_fields": "sys_id,number,sys_updated_on", "sysparm_exclude_reference_link": "true"}
+        calls = []
+        for ticket_id in ticket_ids:
+            if not sys_ids[ticket_id]:
+                continue
+            calls.append(
+                {
+                    "endpoint": SERVICENOW_TICKET_ENDPOINT.format(table_name, sys_ids[ticket_id]),
+                    "params": request_params,
+                    "data": data,
+                    "method": "put",
+                    "action_result": ActionResult(),
+                    "ticket_id": ticket_id,
+                }
+            )
+        responses = {
+            call["ticket_id"]: (call, response)
+            for call, response in zip(calls, self._make_rest_calls_helper(action_result, calls, auth=auth, headers=headers))
+        }
+        if calls:
+            self._invalidate_query_cache(table_name)
+
+        succeeded = 0
+        for ticket_id in ticket_ids:
+            result = {"id": ticket_id, "sys_id": sys_ids[ticket_id]}
+            if ticket_id not in responses:
+                result.update({"status": "failed", "message": SERVICENOW_ERROR_TICKET_NOT_FOUND})
+            else:
+                call, (ret_val, response) = responses[ticket_id]
+                if phantom.is_fail(ret_val):
+                    result.update({"status": "failed", "message": call["action_result"].get_message()})
+                else:
+                    succeeded += 1
+                    result.update(response.get("result", {}))
+                    result.update({"status": "success", "message": SERVICENOW_SUCCESS_NOTE_ADDED})
+            action_result.add_data(result)
+
+        action_result.update_summary(
+            {SERVICENOW_JSON_TOTAL_TICKETS: len(ticket_ids), "successful_tickets": succeeded, "failed_tickets": len(ticket_ids) - succeeded}
+        )
+
+        if not succeeded:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_BULK_NOTE)
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _bulk_create_tickets(self, param):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        table = param.get(SERVICENOW_JSON_TABLE, SERVICENOW_DEFAULT_TABLE)
+        staging_table = param.get(SERVICENOW_JSON_STAGING_TABLE)
+
+        ret_val, rows = self._read_vault_rows(action_result, param[SERVICENOW_JSON_VAULT_ID])
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        if phantom.is_fail(ret_val):
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
+
+        if staging_table:
+            results, tables = self._import_rows(action_result, staging_table, rows, auth, headers)
+        else:
+            results, tables = self._insert_rows(action_result, table, rows, auth, headers)
+
+        for written_table in tables:
+            self._invalidate_query_cache(written_table)
+
+        succeeded = 0
+        for result in results:
+            succeeded += result["status"] == "success"
+            action_result.add_data(result)
+
+        action_result.update_summary({"total_rows": len(rows), "successful_rows": succeeded, "failed_rows": len(rows) - succeeded})
+
+        if not succeeded:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_BULK_CREATE)
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _insert_rows(self, action_result, table, rows, auth, headers):
+        """Create one record per row with the Table API, the requests run concurrently"""
+        footnote = f"{SERVICENOW_TICKET_FOOTNOTE}{self.get_container_id()}"
+        calls = []
+        for row in rows:
+            data = dict(row)
+            data["description"] = f"{data.get('description', '')}\n\n{footnote}"
+            calls.append(
+                {
+                    "endpoint": SERVICENOW_TABLE_ENDPOINT.format(table),
+                    "params": {"sysparm_fields": "sys_id,number", "sysparm_exclude_reference_link": "true"},
+                    "data": data,
+                    "method": "post",
+                    "action_result": ActionResult(),
+                }
+            )
+
+        results = []
+        for index, (call, (ret_val, response)) in enumerate(
+            zip(calls, self._make_rest_calls_helper(action_result, calls, auth=auth, headers=headers))
+        ):
+            result = {"row": index, "table": table}
+            if phantom.is_fail(ret_val):
+                result.update({"status": "failed", "message": call["action_result"].get_message()})
+            else:
+                record = response.get("result", {})
+                result.update({"status": "success", "sys_id": record.get("sys_id"), "number": record.get("number"), "message": "inserted"})
+            results.append(result)
+        return results, [table]
+
+    def _import_rows(self, action_result, staging_table, rows, auth, headers):
+        """Load the rows into an import set staging table, its transform map creates the records.
+        One request per row, they run concurrently: the Import Set API transforms a row inserted on its own before
+        it answers and returns the record created, where insertMultiple transforms later and only returns the import set.
+        """
+        calls = [
+            {
+                "endpoint": SERVICENOW_IMPORT_ENDPOINT.format(staging_table),
+                "data": row,
+                "method": "post",
+                "action_result": ActionResult(),
+            }
+            for row in rows
+        ]
+
+        results = []
+        tables = set()
+        for index, (call, (ret_val, response)) in enumerate(
+            zip(calls, self._make_rest_calls_helper(action_result, calls, auth=auth, headers=headers))
+        ):
+            result = {"row": index}
+            if phantom.is_fail(ret_val):
+                result.update({"status": "failed", "message": call["action_result"].get_message()})
+                results.append(result)
+                continue
+
+            result["import_set_id"] = response.get("import_set")
+            # One result per transform map of the staging table, the first one creates the ticket
+            row_results = self._get_result_list(response)
+            if not row_results:
+                result.update({"status": "failed", "message": SERVICENOW_ERROR_IMPORT_ROW_MISSING})
+                results.append(result)
+                continue
+
+            row_result = row_results[0]
+            state = row_result.get("status")
+            result.update(
+                {
+                    "status": "success" if state in SERVICENOW_IMPORT_SUCCESS_STATES else "failed",
+                    "table": row_result.get("table"),
+                    "sys_id": row_result.get("sys_id"),
+                    "number": row_result.get("display_value"),
+                    "message": row_result.get("error_message") or row_result.get("status_message") or state,
+                }
+            )
+            if row_result.get("table"):
+                tables.add(row_result["table"])
+            results.append(result)
+        return results, tables
+
     def _request_catalog_item(self, param):
         self.save_progress(f"In action handler for: {self.get_action_identifier()}")
         action_result = self.add_action_result(ActionResult(dict(param)))
@@ -1303,6 +2202,8 @@ class ServicenowConnector(BaseConnector):
 
         if variables_param:
             try:
+                import ast
+
                 variables_param = ast.literal_eval(variables_param)
             except Exception as e:
                 error_message = self._get_error_message_from_exception(e)
@@ -1414,7 +2315,7 @@ class ServicenowConnector(BaseConnector):
 
         comment = param.get("comment")
         endpoint = SERVICENOW_TICKET_ENDPOINT.format(table_name, sys_id)
-        data = {"comments": comment.replace("\\n", "\n").replace("\\'", "'").replace('\\"', '"').replace("\\b", "\b")}
+        data = {"comments": self._unescape_text(comment)}
 
         request_params = {}
         request_params["sysparm_display_value"] = True
@@ -1425,6 +2326,7 @@ class ServicenowConnector(BaseConnector):
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
+        self._invalidate_query_cache(table_name)
         if response.get("result", {}).get("comments"):
             response["result"]["comments"] = response["result"]["comments"].replace("\n\n", "\n, ").strip(", ")
         message = "Added the comment successfully"
@@ -1448,19 +2350,201 @@ class ServicenowConnector(BaseConnector):
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
+        key = cache_key(self.get_action_identifier(), table_name, request_params["sysparm_query"], limit=limit)
+        tickets = self._get_cached_result(action_result, key)
+
+        if tickets is None:
+            ret_val, auth, headers = self._get_authorization_credentials(action_result)
+            if phantom.is_fail(ret_val):
+                return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
+
+            tickets = self._paginator(endpoint, action_result, payload=request_params, limit=limit)
+
+            if tickets is None:
+                return action_result.get_status()
+
+            self._cache_result(key, table_name, tickets)
+
+        for ticket in tickets:
+            action_result.add_data(ticket)
+
+        action_result.update_summary({SERVICENOW_JSON_TOTAL_TICKETS: action_result.get_data_size()})
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _stream_pages(self, action_result, endpoint, params, limit, auth, headers, consume):
+        """Fetch the pages of a query a few at a time and hand them to consume in order.
+        Only max_concurrent_requests pages are held in memory at once, whatever the number of records.
+        :param limit: maximum number of records, 0 for all of them
+        """
+        page_size = min(limit, SERVICENOW_EXPORT_PAGE_SIZE) if limit else SERVICENOW_EXPORT_PAGE_SIZE
+        first_call = {"endpoint": endpoint, "params": dict(params, sysparm_offset=SERVICENOW_DEFAULT_OFFSET, sysparm_limit=page_size)}
+        [(ret_val, items)] = self._make_rest_calls_helper(action_result, [first_call], auth=auth, headers=headers)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        records = self._get_result_list(items)
+        item_count = len(records)
+        if first_call.get("response_headers"):
+            item_count = int(first_call["response_headers"].get("X-Total-Count", item_count))
+        if limit:
+            item_count = min(limit, item_count)
+        consume(records[:item_count])
+
+        offset = SERVICENOW_DEFAULT_OFFSET + page_size
+        while offset < item_count:
+            page_calls = []
+            while offset < item_count and len(page_calls) < self._max_concurrent_requests:
+                page_limit = min(page_size, item_count - offset)
+                page_calls.append({"endpoint": endpoint, "params": dict(params, sysparm_offset=offset, sysparm_limit=page_limit)})
+                offset += page_limit
+
+            for ret_val, items in self._make_rest_calls_helper(action_result, page_calls, auth=auth, headers=headers):
+                if phantom.is_fail(ret_val):
+                    return action_result.get_status()
+                consume(self._get_result_list(items))
+
+        return phantom.APP_SUCCESS
+
+    def _export_records(self, param):
+        import tempfile
+
+        from phantom.vault import Vault
+
+        from servicenow_export import EXPORT_FORMAT_NDJSON, EXPORT_FORMATS, ExportWriter, export_file_name
+
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        table_name = param.get(SERVICENOW_JSON_TABLE, SERVICENOW_DEFAULT_TABLE)
+        endpoint = SERVICENOW_TABLE_ENDPOINT.format(table_name)
+
+        export_format = param.get(SERVICENOW_JSON_EXPORT_FORMAT, EXPORT_FORMAT_NDJSON).lower()
+        if export_format not in EXPORT_FORMATS:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_EXPORT_FORMAT.format(", ".join(EXPORT_FORMATS)))
+
+        compress = param.get(SERVICENOW_JSON_COMPRESS, False)
+        fields = self.csv_to_list(param.get(SERVICENOW_JSON_FIELDS, ""))
+        file_name = param.get(SERVICENOW_JSON_FILE_NAME) or export_file_name(table_name, export_format, compress)
+
+        ret_val, limit = self._validate_integers(action_result, param.get(SERVICENOW_JSON_MAX_RESULTS, 0), SERVICENOW_JSON_MAX_RESULTS, True)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
         ret_val, auth, headers = self._get_authorization_credentials(action_result)
         if phantom.is_fail(ret_val):
             return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
 
-        tickets = self._paginator(endpoint, action_result, payload=request_params, limit=limit)
+        # Offsets are only stable with a total ordering, sys_id breaks the ties of the filter's own ordering
+        query = param.get(SERVICENOW_JSON_FILTER, "")
+        query = f"{query}^ORDERBYsys_id" if query else "ORDERBYsys_id"
+        params = {"sysparm_query": query, "sysparm_exclude_reference_link": "true"}
+        if fields:
+            params["sysparm_fields"] = ",".join(fields)
 
-        if tickets is None:
-            return action_result.get_status()
+        fd, path = tempfile.mkstemp(dir=Vault.get_vault_tmp_dir(), suffix=f"_{file_name}")
+        os.close(fd)
+        try:
+            with ExportWriter(path, export_format, compress, fields) as writer:
+                ret_val = self._stream_pages(action_result, endpoint, params, limit, auth, headers, writer.write)
+            if phantom.is_fail(ret_val):
+                return action_result.get_status()
+
+            file_size = os.path.getsize(path)
+            success, message, vault_id = _get_phrules().vault_add(container=self.get_container_id(), file_location=path, file_name=file_name)
+            if not success:
+                return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_EXPORT_VAULT.format(message))
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_EXPORT_VAULT.format(error_message))
+        finally:
+            if os.path.exists(path):
+                os.remove(path)
+
+        action_result.add_data(
+            {
+                "vault_id": vault_id,
+                "file_name": file_name,
+                "file_size": file_size,
+                "format": export_format,
+                "compressed": bool(compress),
+                "total_records": writer.count,
+            }
+        )
+        action_result.update_summary({SERVICENOW_JSON_TOTAL_RECORDS: writer.count, "vault_id": vault_id})
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _parse_known_tickets(self, action_result, tickets):
+        """Return the last known version of every ticket as a dict of sys_id to (sys_mod_count, sys_updated_on).
+        The tickets are a JSON list of objects with the sys_id and sys_mod_count and/or sys_updated_on, or a JSON object of sys_id to sys_mod_count.
+        """
+        try:
+            tickets = json.loads(tickets)
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return RetVal(action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_KNOWN_TICKETS.format(error_message)), None)
 
+        if isinstance(tickets, dict):
+            tickets = [{"sys_id": sys_id, "sys_mod_count": sys_mod_count} for sys_id, sys_mod_count in tickets.items()]
+
+        if not isinstance(tickets, list) or not all(isinstance(ticket, dict) and ticket.get("sys_id") for ticket in tickets):
+            return RetVal(
+                action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_KNOWN_TICKETS.format("Every ticket needs a sys_id")), None
+            )
+
+        known_tickets = {}
         for ticket in tickets:
-            action_result.add_data(ticket)
+            sys_mod_count = ticket.get("sys_mod_count")
+            known_tickets[ticket["sys_id"]] = (str(sys_mod_count) if sys_mod_count is not None else None, ticket.get("sys_updated_on"))
+        return RetVal(phantom.APP_SUCCESS, known_tickets)
 
-        action_result.update_summary({SERVICENOW_JSON_TOTAL_TICKETS: action_result.get_data_size()})
+    def _check_tickets_changed(self, param):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        table_name = param.get(SERVICENOW_JSON_TABLE, SERVICENOW_DEFAULT_TABLE)
+
+        ret_val, known_tickets = self._parse_known_tickets(action_result, param.get(SERVICENOW_JSON_TICKETS, ""))
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        if phantom.is_fail(ret_val):
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
+
+        # Only the version fields are fetched, one IN query for up to 100 tickets
+        ret_val, records = self._query_in(
+            action_result, table_name, "sys_id", list(known_tickets), "sys_id,sys_mod_count,sys_updated_on", auth=auth, headers=headers
+        )
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        current_tickets = {record["sys_id"]: record for record in records}
+        for sys_id, (sys_mod_count, sys_updated_on) in known_tickets.items():
+            record = current_tickets.get(sys_id)
+            if record is None:
+                change = "deleted"
+            elif sys_mod_count is not None and str(record.get("sys_mod_count")) != sys_mod_count:
+                change = "modified"
+            elif sys_updated_on is not None and record.get("sys_updated_on") != sys_updated_on:
+                change = "modified"
+            else:
+                continue
+
+            record = record or {}
+            action_result.add_data(
+                {
+                    "sys_id": sys_id,
+                    "change": change,
+                    "sys_mod_count": record.get("sys_mod_count"),
+                    "sys_updated_on": record.get("sys_updated_on"),
+                    "previous_sys_mod_count": sys_mod_count,
+                    "previous_sys_updated_on": sys_updated_on,
+                }
+            )
+
+        action_result.update_summary({SERVICENOW_JSON_TOTAL_TICKETS: len(known_tickets), "changed_tickets": action_result.get_data_size()})
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
@@ -1579,19 +2663,35 @@ class ServicenowConnector(BaseConnector):
         if phantom.is_fail(ret_val):
             return action_result.get_status()
 
-        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        source = param.get(SERVICENOW_JSON_SOURCE, SERVICENOW_SOURCE_REMOTE)
+        if source not in SERVICENOW_SOURCES:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_SOURCE.format(", ".join(SERVICENOW_SOURCES)))
 
-        if phantom.is_fail(ret_val):
-            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
+        if source == SERVICENOW_SOURCE_LOCAL:
+            return self._run_local_query(action_result, lookup_table, query, limit, summary_text, strip_props)
 
-        tickets = self._paginator(endpoint, action_result, limit=limit)
+        # The fields are part of the query parameters, so the whole query string keys the cache
+        key = cache_key(self.get_action_identifier(), lookup_table, query, limit=limit)
+        tickets = self._get_cached_result(action_result, key)
 
         if tickets is None:
-            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_INVALID_PARAMETER_MESSAGE)
+            ret_val, auth, headers = self._get_authorization_credentials(action_result)
+
+            if phantom.is_fail(ret_val):
+                return action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
+
+            tickets = self._paginator(endpoint, action_result, limit=limit)
+
+            if tickets is None:
+                return action_result.set_status(phantom.APP_ERROR, SERVICENOW_INVALID_PARAMETER_MESSAGE)
+
+            for ticket in tickets:
+                for prop_to_strip in strip_props:
+                    ticket.pop(prop_to_strip, None)
+
+            self._cache_result(key, lookup_table, tickets)
 
         for ticket in tickets:
-            for prop_to_strip in strip_props:
-                ticket.pop(prop_to_strip, None)
             action_result.add_data(ticket)
 
         if not summary_text:
@@ -1600,6 +2700,389 @@ class ServicenowConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
+    def _get_query_cache(self):
+        if self._query_cache is None and self._query_cache_ttl:
+            self._query_cache = QueryCache(os.path.join(self.get_state_dir(), f"{self.get_asset_id()}_query_cache.db"), self._query_cache_ttl)
+        return self._query_cache
+
+    def _get_cached_result(self, action_result, key):
+        """Return the cached records of a read-only query or None, the summary tells whether the cache answered
+        :param key: cache_key of the query
+        """
+        if not self._query_cache_ttl:
+            return None
+
+        try:
+            records = self._get_query_cache().get(key)
+        except Exception as e:
+            # A broken cache only costs the REST calls it would have saved
+            self.debug_print(SERVICENOW_ERROR_QUERY_CACHE.format(self._get_error_message_from_exception(e)))
+            records = None
+
+        action_result.update_summary({"cache_hit": records is not None})
+        return records
+
+    def _cache_result(self, key, table, records):
+        if not self._query_cache_ttl:
+            return
+
+        try:
+            self._get_query_cache().put(key, self._get_base_table(table), records)
+        except Exception as e:
+            self.debug_print(SERVICENOW_ERROR_QUERY_CACHE.format(self._get_error_message_from_exception(e)))
+
+    def _invalidate_query_cache(self, table):
+        """Drop the cached results of the tables of the hierarchy of a table after a write to it. The results of
+        the table itself are dropped too, they are stored under it when its hierarchy could not be read.
+        """
+        if not self._query_cache_ttl:
+            return
+
+        try:
+            query_cache = self._get_query_cache()
+            for cached_table in {table.lower(), self._get_base_table(table)}:
+                query_cache.invalidate(cached_table)
+        except Exception as e:
+            self.debug_print(SERVICENOW_ERROR_QUERY_CACHE.format(self._get_error_message_from_exception(e)))
+
+    def _get_table_hierarchy(self, action_result, table, auth, headers):
+        """Return the table followed by the tables it extends, e.g. incident then task, read from sys_db_object.
+        The list is empty when the table is not in sys_db_object and None when the lookup fails.
+        """
+        tables = []
+        name = table
+        while name and name not in tables and len(tables) < SERVICENOW_SCHEMA_MAX_DEPTH:
+            ret_val, response = self._make_rest_call_helper(
+                action_result,
+                SERVICENOW_TABLE_ENDPOINT.format("sys_db_object"),
+                params={"sysparm_query": f"name={name}", "sysparm_fields": "name,super_class.name", "sysparm_limit": 1},
+                auth=auth,
+                headers=headers,
+            )
+            if phantom.is_fail(ret_val):
+                return None
+            records = self._get_result_list(response)
+            if not records:
+                break
+            tables.append(name)
+            name = records[0].get("super_class.name")
+        return tables
+
+    def _get_schema_cache(self):
+        if self._schema_cache is None:
+            self._schema_cache = QueryCache(os.path.join(self.get_state_dir(), f"{self.get_asset_id()}_schema.db"), self._schema_cache_ttl)
+        return self._schema_cache
+
+    def _get_cached_table_hierarchy(self, action_result, table):
+        """Return the hierarchy of a table like _get_table_hierarchy, cached in the schema cache for
+        schema_cache_ttl seconds, or a day when the schema cache is disabled. None when it cannot be read.
+        """
+        table = table.lower()
+        key = cache_key("table_hierarchy", table, "")
+        try:
+            tables = self._get_schema_cache().get(key)
+        except Exception as e:
+            self.debug_print(SERVICENOW_ERROR_QUERY_CACHE.format(self._get_error_message_from_exception(e)))
+            tables = None
+        if tables is not None:
+            return tables
+
+        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        if phantom.is_fail(ret_val):
+            return None
+        tables = self._get_table_hierarchy(action_result, table, auth, headers)
+        if tables is None:
+            return None
+
+        try:
+            self._get_schema_cache().put(
+                key,
+                SERVICENOW_TABLE_HIERARCHY_CACHE_TABLE,
+                tables,
+                ttl=self._schema_cache_ttl or SERVICENOW_DEFAULT_TABLE_HIERARCHY_CACHE_TTL,
+            )
+        except Exception as e:
+            self.debug_print(SERVICENOW_ERROR_QUERY_CACHE.format(self._get_error_message_from_exception(e)))
+        return tables
+
+    def _get_base_table(self, table):
+        """Return the table at the root of the hierarchy of a table, e.g. task for incident. The cached results are
+        stored under it, so a write to a table drops the results of the tables it extends and of the ones extending it.
+        The table itself is returned when its hierarchy cannot be read.
+        """
+        lookup_result = ActionResult()
+        tables = self._get_cached_table_hierarchy(lookup_result, table)
+        if tables is None:
+            self.debug_print(SERVICENOW_ERROR_TABLE_HIERARCHY.format(table, lookup_result.get_message()))
+            return table.lower()
+        return tables[-1] if tables else table.lower()
+
+    def _get_table_schema(self, action_result, table):
+        """Fields of a table and of the tables it extends, read from sys_db_object, sys_dictionary and sys_choice
+        and cached for schema_cache_ttl seconds. Returns None when the schema cannot be read, e.g. without the
+        rights on sys_dictionary.
+        """
+        from servicenow_schema import build_schema
+
+        key = cache_key("schema", table, "")
+        try:
+            schema = self._get_schema_cache().get(key)
+        except Exception as e:
+            self.debug_print(SERVICENOW_ERROR_QUERY_CACHE.format(self._get_error_message_from_exception(e)))
+            schema = None
+        if schema is not None:
+            return schema
+
+        # The fields of a table include the fields of the tables it extends, e.g. incident extends task
+        lookup_result = ActionResult()
+        tables = self._get_cached_table_hierarchy(lookup_result, table)
+        if tables is None:
+            self.debug_print(SERVICENOW_ERROR_SCHEMA.format(table, lookup_result.get_message()))
+            return None
+
+        if not tables:
+            self.debug_print(SERVICENOW_ERROR_SCHEMA.format(table, "The table was not found in sys_db_object"))
+            return None
+
+        queries = [
+            {
+                "endpoint": SERVICENOW_TABLE_ENDPOINT.format("sys_dictionary"),
+                "params": {
+                    "sysparm_query": "nameIN{}^elementISNOTEMPTY".format(",".join(tables)),
+                    "sysparm_fields": "name,element,internal_type,choice",
+                },
+                "limit": SERVICENOW_DEFAULT_LIMIT,
+                "action_result": ActionResult(),
+            },
+            {
+                "endpoint": SERVICENOW_TABLE_ENDPOINT.format("sys_choice"),
+                "params": {"sysparm_query": "nameIN{}^inactive=false".format(",".join(tables)), "sysparm_fields": "name,element,value,label"},
+                "limit": SERVICENOW_DEFAULT_LIMIT,
+                "action_result": ActionResult(),
+            },
+        ]
+        dictionary, choices = self._paginate_many(action_result, queries)
+        if dictionary is None or choices is None:
+            failed_query = queries[0] if dictionary is None else queries[1]
+            self.debug_print(SERVICENOW_ERROR_SCHEMA.format(table, failed_query["action_result"].get_message()))
+            return None
+
+        schema = build_schema(tables, dictionary, choices)
+        try:
+            self._get_schema_cache().put(key, table, schema)
+        except Exception as e:
+            self.debug_print(SERVICENOW_ERROR_QUERY_CACHE.format(self._get_error_message_from_exception(e)))
+        return schema
+
+    def _validate_fields(self, action_result, table, fields):
+        """Check the field names and choice values of a write against the cached schema of the table before sending it.
+        The write goes ahead unchecked when the schema cache is disabled or the schema cannot be read.
+        """
+        if not self._schema_cache_ttl or not fields:
+            return phantom.APP_SUCCESS
+
+        from servicenow_schema import validate_fields
+
+        schema = self._get_table_schema(action_result, table)
+        if schema is None:
+            return phantom.APP_SUCCESS
+
+        errors = validate_fields(schema, fields)
+        if errors:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_FIELDS.format(table, "; ".join(errors)))
+        return phantom.APP_SUCCESS
+
+    def _get_mirror(self):
+        from servicenow_mirror import TableMirror
+
+        if self._mirror is None:
+            self._mirror = TableMirror(os.path.join(self.get_state_dir(), f"{self.get_asset_id()}_mirror.db"))
+        return self._mirror
+
+    def _run_local_query(self, action_result, table, query, limit, summary_text=None, strip_props=[]):
+        """Answer run query and query users from the local mirror, the summary tells how old the data is"""
+        from servicenow_mirror import MirrorQueryError, sync_age_seconds
+
+        try:
+            mirror = self._get_mirror()
+            sync_state = mirror.get_sync_state(table)
+            if not sync_state:
+                return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_TABLE_NOT_MIRRORED.format(table))
+            tickets = mirror.query(table, query, limit)
+        except MirrorQueryError as e:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_MIRROR_QUERY.format(e))
+        except Exception as e:
+            error_message = self._get_error_message_from_exception(e)
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_MIRROR.format(error_message))
+
+        for ticket in tickets:
+            for prop_to_strip in strip_props:
+                ticket.pop(prop_to_strip, None)
+            action_result.add_data(ticket)
+
+        action_result.update_summary(
+            {
+                summary_text or SERVICENOW_JSON_TOTAL_TICKETS: action_result.get_data_size(),
+                "source": SERVICENOW_SOURCE_LOCAL,
+                "mirror_synced_at": sync_state["synced_at"],
+                "mirror_age_seconds": sync_age_seconds(sync_state),
+            }
+        )
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
+    def _get_all_sys_ids(self, action_result, table, auth, headers):
+        """List the sys_id of every record of a table. The pages follow the sys_id order rather than offsets,
+        so a record deleted while they are read does not shift the next page over a record that still exists.
+        """
+        sys_ids = []
+        while True:
+            query = "ORDERBYsys_id"
+            if sys_ids:
+                query = f"sys_id>{sys_ids[-1]}^{query}"
+            params = {"sysparm_query": query, "sysparm_fields": "sys_id", "sysparm_limit": SERVICENOW_DEFAULT_LIMIT}
+            ret_val, response = self._make_rest_call_helper(
+                action_result, SERVICENOW_TABLE_ENDPOINT.format(table), auth=auth, headers=headers, params=params
+            )
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.get_status(), None)
+
+            page = [record["sys_id"] for record in self._get_result_list(response)]
+            sys_ids.extend(page)
+            if len(page) < SERVICENOW_DEFAULT_LIMIT:
+                return RetVal(phantom.APP_SUCCESS, sys_ids)
+
+    def _sync_mirror_table(self, action_result, table, full=False):
+        """Copy the records of a table updated since the last sync into the mirror, page by page. A full sync copies
+        every record aside and only replaces the mirrored ones once all of them are read, the mirror keeps answering
+        with the previous copy until then. The records deleted in ServiceNow are removed by a full sync, and by an
+        incremental one when the last removal is mirror_reconcile_hours old: listing every sys_id costs a request
+        per 10000 records, too much for every poll.
+        Returns the number of records synced, the number of records deleted and the new sync state.
+        """
+        from servicenow_mirror import STAGING_SUFFIX, sync_age_seconds
+
+        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        if phantom.is_fail(ret_val):
+            return RetVal(action_result.set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE), None)
+
+        mirror = self._get_mirror()
+        target_table = table
+        sync_state = {}
+        if full:
+            target_table = f"{table}{STAGING_SUFFIX}"
+            # Records left aside by a full sync that did not finish
+            mirror.clear(target_table)
+        else:
+            sync_state = mirror.get_sync_state(table) or {}
+        last_updated_on = sync_state.get("last_updated_on")
+        # A record updated while the pages are read can shift the offsets and be skipped, its new sys_updated_on
+        # is after this time so the next sync starts from here at the latest (with a minute of slack for clock skew)
+        sync_started = (datetime.now(timezone.utc) - timedelta(minutes=1)).strftime(SERVICENOW_DATETIME_FORMAT)
+
+        # Records updated in the same second as the last synced one are fetched again, replacing them is harmless
+        # The dates of the records are in UTC, gs.dateGenerate reads them in the timezone of the user like the cursor of On Poll
+        query = "ORDERBYsys_updated_on"
+        if last_updated_on:
+            query = "sys_updated_on>=javascript:gs.dateGenerate('{}','{}')^{}".format(
+                *self._get_cursor_time(self.get_config(), last_updated_on).split(" "), query
+            )
+        params = {"sysparm_query": query, "sysparm_exclude_reference_link": "true"}
+
+        synced = {"count": 0, "last_updated_on": last_updated_on}
+
+        def store(records):
+            for record in records:
+                record.pop(SERVICENOW_JSON_USER_PASSWORD, None)
+            mirror.upsert(target_table, records)
+            synced["count"] += len(records)
+            if records and records[-1].get("sys_updated_on"):
+                synced["last_updated_on"] = max(synced["last_updated_on"] or "", records[-1]["sys_updated_on"])
+
+        ret_val = self._stream_pages(action_result, SERVICENOW_TABLE_ENDPOINT.format(table), params, 0, auth, headers, store)
+        if phantom.is_fail(ret_val):
+            if full:
+                mirror.clear(target_table)
+            return RetVal(action_result.get_status(), None)
+
+        deleted = 0
+        # The first sync of a table copies all its records, there is nothing to remove yet
+        reconciled = full or not sync_state
+        if full:
+            deleted = mirror.replace(table, target_table)
+        elif not reconciled and self._mirror_reconcile_hours:
+            reconciled_at = sync_state.get("reconciled_at")
+            if not reconciled_at or sync_age_seconds(sync_state, "reconciled_at") >= self._mirror_reconcile_hours * 3600:
+                # Deleted records are not returned by the query on sys_updated_on, the records left are compared by sys_id
+                ret_val, sys_ids = self._get_all_sys_ids(action_result, table, auth, headers)
+                if phantom.is_fail(ret_val):
+                    return RetVal(action_result.get_status(), None)
+                deleted = mirror.delete_missing(table, sys_ids)
+                reconciled = True
+
+        if synced["last_updated_on"]:
+            synced["last_updated_on"] = min(synced["last_updated_on"], sync_started)
+        return RetVal(phantom.APP_SUCCESS, (synced["count"], deleted, mirror.set_sync_state(table, synced["last_updated_on"], reconciled)))
+
+    def _sync_mirror_tables(self, action_result, tables, full=False):
+        """Sync every table, returns the data of each table for the action result"""
+        results = []
+        for table in tables:
+            self.save_progress(f"Syncing table {table} to the local mirror")
+            table_action_result = ActionResult()
+            try:
+                ret_val, synced = self._sync_mirror_table(table_action_result, table, full)
+            except Exception as e:
+                ret_val = table_action_result.set_status(
+                    phantom.APP_ERROR, SERVICENOW_ERROR_MIRROR.format(self._get_error_message_from_exception(e))
+                )
+
+            if phantom.is_fail(ret_val):
+                results.append({"table": table, "status": "failed", "message": table_action_result.get_message()})
+                continue
+
+            synced_records, deleted_records, sync_state = synced
+            results.append(
+                {
+                    "table": table,
+                    "status": "success",
+                    "synced_records": synced_records,
+                    "deleted_records": deleted_records,
+                    "total_records": sync_state["record_count"],
+                    "last_updated_on": sync_state["last_updated_on"],
+                    "synced_at": sync_state["synced_at"],
+                    "reconciled_at": sync_state["reconciled_at"],
+                }
+            )
+        return results
+
+    def _sync_mirror(self, param):
+        self.save_progress(f"In action handler for: {self.get_action_identifier()}")
+        action_result = self.add_action_result(ActionResult(dict(param)))
+
+        tables = self.csv_to_list(param.get(SERVICENOW_JSON_TABLES) or self.get_config().get(SERVICENOW_JSON_MIRROR_TABLES) or "")
+        if not tables:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_NO_MIRROR_TABLES)
+
+        results = self._sync_mirror_tables(action_result, [table.lower() for table in tables], param.get("full", False))
+        for result in results:
+            action_result.add_data(result)
+
+        failed = [result for result in results if result["status"] == "failed"]
+        action_result.update_summary(
+            {
+                "total_tables": len(results),
+                "synced_records": sum(result.get("synced_records", 0) for result in results),
+                "deleted_records": sum(result.get("deleted_records", 0) for result in results),
+                "failed_tables": len(failed),
+            }
+        )
+
+        if failed:
+            return action_result.set_status(phantom.APP_ERROR, "; ".join(f"{result['table']}: {result['message']}" for result in failed))
+
+        return action_result.set_status(phantom.APP_SUCCESS)
+
     def _query_users(self, param):
         action_result_param = param.copy()
         query = param.get(SERVICENOW_JSON_QUERY, "")
@@ -1688,60 +3171,53 @@ class ServicenowConnector(BaseConnector):
 
         return action_result.set_status(phantom.APP_SUCCESS)
 
-    def _on_poll(self, param):
-        URI_REGEX = "[Hh][Tt][Tt][Pp][Ss]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+#]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+"
-        HASH_REGEX = "\\b[0-9a-fA-F]{32}\\b|\\b[0-9a-fA-F]{40}\\b|\\b[0-9a-fA-F]{64}\\b"
-        IP_REGEX = "\\d{1,3}\\.\\d{1,3}\\.\\d{1,3}\\.\\d{1,3}"
-        IPV6_REGEX = "\\s*((([0-9A-Fa-f]{1,4}:){7}([0-9A-Fa-f]{1,4}|:))|"
-        IPV6_REGEX += (
-            "(([0-9A-Fa-f]{1,4}:){6}(:[0-9A-Fa-f]{1,4}|((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\.(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3})|:))"
-        )
-        IPV6_REGEX += (
-            "|(([0-9A-Fa-f]{1,4}:){5}(((:[0-9A-Fa-f]{1,4}){1,2})|:"
-            "((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\.(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3})|:))|"
-        )
-        IPV6_REGEX += (
-            "(([0-9A-Fa-f]{1,4}:){4}(((:[0-9A-Fa-f]{1,4}){1,3})|((:[0-9A-Fa-f]{1,4})?:"
-            "((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\."
-            "(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:))|"
-        )
-        IPV6_REGEX += (
-            "(([0-9A-Fa-f]{1,4}:){3}(((:[0-9A-Fa-f]{1,4}){1,4})|((:"
-            "[0-9A-Fa-f]{1,4}){0,2}:((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\."
-            "(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:))|"
-        )
-        IPV6_REGEX += (
-            "(([0-9A-Fa-f]{1,4}:){2}(((:[0-9A-Fa-f]{1,4}){1,5})|"
-            "((:[0-9A-Fa-f]{1,4}){0,3}:((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\."
-            "(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:))|"
-        )
-        IPV6_REGEX += (
-            "(([0-9A-Fa-f]{1,4}:){1}(((:[0-9A-Fa-f]{1,4}){1,6})|"
-            "((:[0-9A-Fa-f]{1,4}){0,4}:((25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)(\\."
-            "(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:))|"
-        )
-        IPV6_REGEX += (
-            "(:(((:[0-9A-Fa-f]{1,4}){1,7})|((:[0-9A-Fa-f]{1,4}){0,5}:((25[0-5]|2[0-4]\\d|1\\d\\d|"
-            "[1-9]?\\d)(\\.(25[0-5]|2[0-4]\\d|1\\d\\d|[1-9]?\\d)){3}))|:)))(%.+)?\\s*"
-        )
-        uri_regexc = re.compile(URI_REGEX)
-        hash_regexc = re.compile(HASH_REGEX)
-        ip_regexc = re.compile(IP_REGEX)
-        ipv6_regexc = re.compile(IPV6_REGEX)
-        # Progress
-        self.save_progress(SERVICENOW_USING_BASE_URL, base_url=self._base_url)
-
-        # Connectivity
-        self.save_progress(phantom.APP_PROG_CONNECTING_TO_ELLIPSES, self._host)
+    def _get_poll_tables(self, action_result, config):
+        """Return the (table, filter) pairs to poll, the filter of a table defaults to the on_poll_filter"""
+        tables = self.csv_to_list(config.get(SERVICENOW_JSON_ON_POLL_TABLE) or SERVICENOW_DEFAULT_TABLE)
+        default_filter = config.get(SERVICENOW_JSON_ON_POLL_FILTER, "")
 
-        # Get config
-        config = self.get_config()
-
-        # Add action result
-        action_result = self.add_action_result(phantom.ActionResult(param))
+        table_filters = {}
+        if config.get(SERVICENOW_JSON_ON_POLL_TABLE_FILTERS):
+            try:
+                table_filters = json.loads(config[SERVICENOW_JSON_ON_POLL_TABLE_FILTERS])
+            except Exception as e:
+                error_message = self._get_error_message_from_exception(e)
+                return RetVal(action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_TABLE_FILTERS.format(error_message)), None)
 
+            if not isinstance(table_filters, dict):
+                return RetVal(
+                    action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_TABLE_FILTERS.format("Not a JSON object")), None
+                )
+            table_filters = {table.strip().lower(): table_filter for table, table_filter in table_filters.items()}
+
+        tables = list(dict.fromkeys(table.lower() for table in tables))
+        return RetVal(phantom.APP_SUCCESS, [(table, table_filters.get(table, default_filter)) for table in tables])
+
+    def _get_poll_cursor(self, table, is_first_table):
+        """Return the polling cursor of a table, stored in the state under table_cursors"""
+        cursors = self._state.setdefault("table_cursors", {})
+        if table not in cursors:
+            cursor = {}
+            # The first table takes over the cursor from before several tables could be polled
+            if is_first_table and "first_run" in self._state:
+                cursor["first_run"] = self._state.pop("first_run")
+                if "last_time" in self._state:
+                    cursor["last_time"] = self._state.pop("last_time")
+            cursors[table] = cursor
+        return cursors[table]
+
+    def _reset_state(self):
+        """Drop everything from the state except the polling cursors"""
+        # In place, the On Poll pipeline keeps references to the cursors while its fetch thread may reset the state
+        with self._state_lock:
+            for key in list(self._state):
+                if key not in SERVICENOW_POLL_STATE_KEYS:
+                    del self._state[key]
+
+    def _build_poll_query(self, param, table, table_filter, cursor):
+        """Return the query and the maximum number of tickets to fetch for one table"""
         # Get time from last poll, save now as time for this poll
-        last_time = self._state.get("last_time")
+        last_time = cursor.get("last_time")
 
         if last_time and isinstance(last_time, float):
             last_time = datetime.strftime(datetime.fromtimestamp(last_time), SERVICENOW_DATETIME_FORMAT)
@@ -1749,17 +3225,14 @@ class ServicenowConnector(BaseConnector):
         # Build the query for the issue search (sysparm_query)
         query = "ORDERBYsys_updated_on"
 
-        action_query = config.get(SERVICENOW_JSON_ON_POLL_FILTER, "")
-
-        if len(action_query) > 0:
-            query += f"^{action_query}"
+        if len(table_filter) > 0:
+            query += f"^{table_filter}"
 
         # If it's a poll now don't filter based on update time
         if self.is_poll_now():
             max_tickets = param.get(phantom.APP_JSON_CONTAINER_COUNT)
         # If it's the first poll, don't filter based on update time
-        elif self._state.get("first_run", True):
-            self._state["first_run"] = False
+        elif cursor.get("first_run", True):
             max_tickets = self._first_run_container
         # If it's scheduled polling add a filter for update time being greater than the last poll time
         else:
@@ -1771,7 +3244,7 @@ class ServicenowConnector(BaseConnector):
             else:
                 self.debug_print(
                     f"Either 'last_time' is None or empty or it is not \
-                    in the expected format of %Y-%m-%d %H:%M:%S. last_time: {last_time}"
+                    in the expected format of %Y-%m-%d %H:%M:%S. table: {table} last_time: {last_time}"
                 )
                 self.debug_print(
                     "Considering this as the first scheduled|interval \
@@ -1782,28 +3255,620 @@ class ServicenowConnector(BaseConnector):
 
                 self.debug_print(f"Setting the 'max_tickets' to the value of 'first_run_container'. max_tickets: {max_tickets}")
 
-        self.debug_print(f"Polling with this query: {query}")
+        return query, max_tickets
+
+    def _build_table_query(self, table, query, limit):
+        return {
+            "table": table,
+            "endpoint": SERVICENOW_TABLE_ENDPOINT.format(table),
+            "params": {"sysparm_query": query, "sysparm_exclude_reference_link": "true"},
+            "limit": limit,
+            "action_result": ActionResult(),
+        }
+
+    def _build_priority_projection(self, query):
+        """Turn a poll query into the scan of the keys of all its pending tickets, ranked by _select_priority_issues"""
+        fields = ["sys_id", "sys_updated_on"] + [field for field, _ in self._ingestion_priority]
+        query["max_tickets"] = query["limit"]
+        query["limit"] = SERVICENOW_PRIORITY_SCAN_LIMIT
+        query["params"] = dict(query["params"], sysparm_fields=",".join(dict.fromkeys(fields)))
+        return query
+
+    @staticmethod
+    def _priority_value(value):
+        """Sort key of a field value: numbers before text, empty values last"""
+        if isinstance(value, dict):
+            value = value.get("value")
+        if value in (None, ""):
+            return (2, 0, "")
+        try:
+            return (0, float(value), "")
+        except (TypeError, ValueError):
+            return (1, 0, str(value))
+
+    def _rank_issues(self, keys):
+        """Order the keys by the ingestion_priority fields, the oldest update first between equals"""
+        ranked = sorted(keys, key=lambda key: key.get("sys_updated_on", ""))
+        # Stable sorts from the least to the most significant field
+        for field, descending in reversed(self._ingestion_priority):
+            empty = [key for key in ranked if self._priority_value(key.get(field))[0] == 2]
+            ranked = sorted(
+                (key for key in ranked if self._priority_value(key.get(field))[0] != 2),
+                key=lambda key, field=field: self._priority_value(key.get(field)),
+                reverse=descending,
+            )
+            ranked.extend(empty)
+        return ranked
 
-        on_poll_table_name = config.get(SERVICENOW_JSON_ON_POLL_TABLE, SERVICENOW_DEFAULT_TABLE)
-        endpoint = SERVICENOW_TABLE_ENDPOINT.format(on_poll_table_name.lower())
-        params = {"sysparm_query": query, "sysparm_exclude_reference_link": "true"}
+    def _select_priority_issues(self, action_result, queries, keys_lists):
+        """Fetch the full records of the highest priority pending tickets of every scanned query.
+        The keys of the tickets left out stay in the query, so the cursor does not move past them.
+        """
+        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        issues_lists = []
+        for query, keys in zip(queries, keys_lists):
+            if keys is None or "max_tickets" not in query:
+                issues_lists.append(keys)
+                continue
 
-        limit = max_tickets
+            # Tickets ingested ahead of the cursor by an earlier poll are skipped until they change again
+            ahead = {}
+            if not self.is_poll_now():
+                ahead = self._state["table_cursors"][query["table"]].get("ingested_ahead", {})
+            keys = [key for key in keys if ahead.get(key["sys_id"]) != key.get("sys_updated_on")]
+            query["projection"] = keys
 
-        issues = self._paginator(endpoint, action_result, payload=params, limit=limit)
+            selected = [key["sys_id"] for key in self._rank_issues(keys)[: query["max_tickets"]]]
+            if not selected:
+                issues_lists.append([])
+                continue
 
-        if issues is None:
-            self.debug_print(action_result.get_message())
-            action_result.set_status(phantom.APP_ERROR, action_result.get_message())
-            return phantom.APP_ERROR
+            if phantom.is_fail(ret_val):
+                query["action_result"].set_status(phantom.APP_ERROR, SERVICENOW_AUTH_ERROR_MESSAGE)
+                issues_lists.append(None)
+                continue
 
-        if not issues:
-            return action_result.set_status(phantom.APP_SUCCESS, "No issues found. Nothing to ingest.")
+            ret_val, records = self._query_in(query["action_result"], query["table"], "sys_id", selected, auth=auth, headers=headers)
+            if phantom.is_fail(ret_val):
+                issues_lists.append(None)
+                continue
 
-        # TODO: handle cases where we go over the ingestions limit
+            self.debug_print(f"Ingesting {len(selected)} of the {len(keys)} pending tickets of table {query['table']} by priority")
+            records_by_id = {record["sys_id"]: record for record in records}
+            issues_lists.append([records_by_id[sys_id] for sys_id in selected if sys_id in records_by_id])
+
+        return issues_lists
+
+    def _advance_priority_cursor(self, config, cursor, query, issues):
+        """Move the cursor of a priority poll up to the oldest pending ticket left out, or past every ticket scanned.
+        The tickets ingested ahead of the cursor are remembered with their update time, so the next poll skips them.
+        """
+        ingested = {issue["sys_id"] for issue in issues}
+        projection = query["projection"]
+        deferred = [key["sys_updated_on"] for key in projection if key["sys_id"] not in ingested and key.get("sys_updated_on")]
+        if deferred:
+            resume_time = min(deferred)
+        elif projection:
+            resume_time = max(key.get("sys_updated_on", "") for key in projection)
+        else:
+            return
+
+        # The scan stops at its limit or at the time budget, the tickets past the last one scanned are still pending
+        if not query["complete"] or len(projection) >= query["limit"]:
+            resume_time = min(resume_time, max(key.get("sys_updated_on", "") for key in projection))
+
+        ahead = {sys_id: updated for sys_id, updated in cursor.get("ingested_ahead", {}).items() if updated >= resume_time}
+        ahead.update({issue["sys_id"]: issue["sys_updated_on"] for issue in issues if issue.get("sys_updated_on", "") >= resume_time})
+        cursor["ingested_ahead"] = ahead
+        cursor["last_time"] = self._get_cursor_time(config, resume_time)
+
+    def _build_backfill_queries(self, config, table, table_filter, cursor):
+        """Split the backfill window of a table into time slices and return the queries of the next unfinished ones.
+        The window is fixed on the first run, so the backfill resumes at the same slices over several polls.
+        """
+        backfill = cursor.get("backfill")
+        if not backfill:
+            window_end = datetime.strptime(
+                self._get_cursor_time(config, datetime.now(timezone.utc).strftime(SERVICENOW_DATETIME_FORMAT)), SERVICENOW_DATETIME_FORMAT
+            )
+            window_start = window_end - timedelta(days=self._backfill_days)
+            backfill = cursor["backfill"] = {
+                "start": window_start.strftime(SERVICENOW_DATETIME_FORMAT),
+                "end": window_end.strftime(SERVICENOW_DATETIME_FORMAT),
+                "slice_hours": self._backfill_slice_hours,
+                "completed": [],
+            }
+            self.debug_print(f"Starting the backfill of table {table} from {backfill['start']} to {backfill['end']}")
+
+        slices = self._get_backfill_slices(backfill)
+        completed = set(backfill["completed"])
+        pending = [index for index in range(len(slices)) if index not in completed][: self._backfill_slices_per_poll]
+
+        queries = []
+        for index in pending:
+            slice_start, slice_end = slices[index]
+            # A slice cut short by the time budget of a poll resumes after its last ingested record
+            slice_start = max(slice_start, backfill.get("resume", {}).get(str(index), slice_start))
+            query = "ORDERBYsys_updated_on"
+            if len(table_filter) > 0:
+                query += f"^{table_filter}"
+            query += "^sys_updated_on>=javascript:gs.dateGenerate('{}','{}')".format(*slice_start.split(" "))
+            query += "^sys_updated_on<javascript:gs.dateGenerate('{}','{}')".format(*slice_end.split(" "))
+            self.debug_print(f"Backfilling table {table}, slice {index + 1} of {len(slices)}, with this query: {query}")
+
+            # A slice is only complete once all its records are ingested, so it is not capped
+            table_query = self._build_table_query(table, query, sys.maxsize)
+            table_query["slice"] = index
+            queries.append(table_query)
+
+        return queries
+
+    @staticmethod
+    def _get_backfill_slices(backfill):
+        """Return the (start, end) times of every slice of the backfill window"""
+        window_start = datetime.strptime(backfill["start"], SERVICENOW_DATETIME_FORMAT)
+        window_end = datetime.strptime(backfill["end"], SERVICENOW_DATETIME_FORMAT)
+        slice_length = timedelta(hours=backfill["slice_hours"])
+
+        slices = []
+        slice_start = window_start
+        while slice_start < window_end:
+            slice_end = min(slice_start + slice_length, window_end)
+            slices.append((slice_start.strftime(SERVICENOW_DATETIME_FORMAT), slice_end.strftime(SERVICENOW_DATETIME_FORMAT)))
+            slice_start = slice_end
+        return slices
+
+    def _complete_backfill_slice(self, cursor, index):
+        """Record a finished slice, once every slice is done the table continues with regular polling from the end of the window"""
+        backfill = cursor["backfill"]
+        if index not in backfill["completed"]:
+            backfill["completed"].append(index)
+        backfill.get("resume", {}).pop(str(index), None)
+
+        if len(backfill["completed"]) < len(self._get_backfill_slices(backfill)):
+            return
+
+        self.debug_print(f"Backfill complete, polling continues from {backfill['end']}")
+        cursor["last_time"] = backfill["end"]
+        cursor["first_run"] = False
+        del cursor["backfill"]
+
+    def _get_cursor_time(self, config, updated_time):
+        """Convert the sys_updated_on of the last ingested ticket to the time stored in the cursor"""
+        if "timezone" in config:
+            from zoneinfo import ZoneInfo
+
+            dt = datetime.strptime(updated_time, SERVICENOW_DATETIME_FORMAT)
+            tz = ZoneInfo(config["timezone"])
+            new_dt = dt + (tz.utcoffset(dt) or timedelta(0))
+            updated_time = new_dt.strftime(SERVICENOW_DATETIME_FORMAT)
+
+        return updated_time
+
+    def _get_enrichment_fields(self, action_result, config):
+        """Return the reference fields to resolve at ingestion as a dict of field to referenced table"""
+        enrichment_fields = {}
+        for pair in self.csv_to_list(config.get(SERVICENOW_JSON_ENRICH_REFERENCES) or ""):
+            field, _, table = pair.partition(":")
+            if not field.strip() or not table.strip():
+                return RetVal(action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_INVALID_ENRICH_REFERENCES), None)
+            enrichment_fields[field.strip()] = table.strip().lower()
+
+        return RetVal(phantom.APP_SUCCESS, enrichment_fields)
+
+    def _build_in_query_calls(self, table, field, values, fields=None, condition=None):
+        """Return the calls that look up the records of a table whose field is one of the values.
+        Long lists of values are split in chunks so the URL stays short, the chunks can be sent concurrently.
+        :param condition: encoded query the records must also match
+        """
+        calls = []
+        for index in range(0, len(values), SERVICENOW_IN_QUERY_CHUNK_SIZE):
+            chunk = values[index : index + SERVICENOW_IN_QUERY_CHUNK_SIZE]
+            params = {
+                "sysparm_query": "{}IN{}".format(field, ",".join(chunk)) + (f"^{condition}" if condition else ""),
+                "sysparm_exclude_reference_link": "true",
+                "sysparm_limit": len(chunk),
+            }
+            if fields:
+                params["sysparm_fields"] = fields
+            calls.append({"endpoint": SERVICENOW_TABLE_ENDPOINT.format(table), "params": params, "action_result": ActionResult()})
+        return calls
+
+    def _query_in(self, action_result, table, field, values, fields=None, auth=None, headers=None, condition=None):
+        """Return the records of a table whose field is one of the values, with one IN query per chunk of values"""
+        records = []
+        calls = self._build_in_query_calls(table, field, values, fields, condition)
+        for call, (ret_val, response) in zip(calls, self._make_rest_calls_helper(action_result, calls, auth=auth, headers=headers)):
+            if phantom.is_fail(ret_val):
+                return RetVal(action_result.set_status(phantom.APP_ERROR, call["action_result"].get_message()), None)
+            records.extend(self._get_result_list(response))
+        return RetVal(phantom.APP_SUCCESS, records)
+
+    def _resolve_references(self, action_result, issues, enrichment_fields):
+        """Resolve the reference fields of all the issues with one sys_idIN query per referenced table.
+        :return: dict of field to a dict of sys_id to the referenced record
+        """
+        table_sys_ids = {}
+        for issue in issues:
+            for field, table in enrichment_fields.items():
+                value = issue.get(field)
+                if isinstance(value, dict):
+                    value = value.get("value")
+                if value:
+                    table_sys_ids.setdefault(table, set()).add(value)
+
+        calls = []
+        for table, sys_ids in table_sys_ids.items():
+            for call in self._build_in_query_calls(table, "sys_id", sorted(sys_ids)):
+                call["table"] = table
+                calls.append(call)
+
+        if not calls:
+            return {}
+
+        ret_val, auth, headers = self._get_authorization_credentials(action_result)
+        if phantom.is_fail(ret_val):
+            self.debug_print(f"Skipping the enrichment of the references. {SERVICENOW_AUTH_ERROR_MESSAGE}")
+            return {}
+
+        table_records = {}
+        for call, (ret_val, response) in zip(calls, self._make_rest_calls_helper(action_result, calls, auth=auth, headers=headers)):
+            if phantom.is_fail(ret_val):
+                self.debug_print(f"Unable to resolve references to table {call['table']}. {call['action_result'].get_message()}")
+                continue
+            records = table_records.setdefault(call["table"], {})
+            for record in self._get_result_list(response):
+                records[record["sys_id"]] = record
+
+        self.debug_print(f"Resolved {sum(len(records) for records in table_records.values())} references with {len(calls)} requests")
+        return {field: table_records.get(table, {}) for field, table in enrichment_fields.items()}
+
+    @staticmethod
+    def _get_issue_references(issue, references):
+        if not references:
+            return {}
+
+        issue_references = {}
+        for field, records in references.items():
+            value = issue.get(field)
+            if isinstance(value, dict):
+                value = value.get("value")
+            if value in records:
+                issue_references[field] = records[value]
+        return issue_references
+
+    def _truncate_fields(self, record):
+        """Cut the text fields longer than max_field_length, such as description or close_notes"""
+        if not self._max_field_length:
+            return record
+
+        truncated = {}
+        for key, value in record.items():
+            if isinstance(value, str) and len(value) > self._max_field_length:
+                value = value[: self._max_field_length] + SERVICENOW_TRUNCATED_SUFFIX.format(len(value) - self._max_field_length)
+            truncated[key] = value
+        return truncated
+
+    def _build_payloads(self, issue, issue_data):
+        """Return the container data, artifact data and artifact cef of an issue.
+        The full profile stores the record in all three. The compact profile stores the record once, in the
+        artifact data, with its long text fields truncated, and only the cef_fields in the cef.
+        """
+        if self._ingestion_profile == SERVICENOW_INGESTION_PROFILE_FULL:
+            return issue_data, issue_data, issue
+
+        artifact_data = self._truncate_fields(issue_data)
+        container_data = {field: issue[field] for field in SERVICENOW_COMPACT_CONTAINER_FIELDS if field in issue}
+        cef = {field: artifact_data[field] for field in self._cef_fields if field in artifact_data}
+        return container_data, artifact_data, cef
+
+    @staticmethod
+    def _indicator_sdi(issue, cef_key, value):
+        """Stable source data identifier of an indicator extracted from a ticket/record"""
+        return f"{issue['sys_id']}_{cef_key}_{hashlib.sha256(value.encode('utf-8')).hexdigest()[:32]}"
+
+    def _extract_values(self, regex, text):
+        """Values of the ticket/record matching an IOC regex, each value once since it is one artifact per indicator"""
+        return list(dict.fromkeys(match.group() for match in regex.finditer(text)))
+
+    def _build_issue_payloads(self, issue, label, severity, config, references=None):
+        """Build the container and the artifacts of an issue, without container ids. Only CPU work, no request is made
+        :param references: records resolved by _resolve_references, attached to the container or as artifacts
+        :return: the container and the list of artifacts
+        """
+        sd = issue.get("short_description")
+        if not sd:
+            sd = "Phantom added container name (short description of the ticket/record found empty)"
+
+        issue_references = self._get_issue_references(issue, references)
+        issue_data = issue
+        if issue_references and self._enrichment_mode == SERVICENOW_ENRICHMENT_MODE_CONTAINER:
+            issue_data = dict(issue, references=issue_references)
+        container_data, artifact_data, issue_cef = self._build_payloads(issue, issue_data)
+
+        desc = issue.get("description", "")
+        if self._ingestion_profile == SERVICENOW_INGESTION_PROFILE_COMPACT:
+            desc = artifact_data.get("description", "")
+        container = dict(
+            data=container_data, description=desc, label=label, severity=severity, name=f"{sd}", source_data_identifier=issue["sys_id"]
+        )
+
+        artifacts = []
+        artifact_dict = dict(
+            data=artifact_data,
+            description=sd,
+            cef=issue_cef,
+            label="issue",
+            severity=severity,
+            name=issue.get("number", "Phantom added artifact name (number of the ticket/record found empty)"),
+            source_data_identifier=issue["sys_id"],
+        )
+        artifacts.append(artifact_dict)
+        if issue_references and self._enrichment_mode == SERVICENOW_ENRICHMENT_MODE_ARTIFACT:
+            for field, record in issue_references.items():
+                reference_cef = record
+                if self._ingestion_profile == SERVICENOW_INGESTION_PROFILE_COMPACT:
+                    reference_cef = {key: record[key] for key in SERVICENOW_COMPACT_REFERENCE_FIELDS if key in record}
+                artifacts.append(
+                    {
+                        "label": "reference",
+                        "name": f"{field}: {record.get('name') or record.get('number') or record['sys_id']}",
+                        "severity": severity,
+                        "data": record,
+                        "cef": reference_cef,
+                        "source_data_identifier": f"{issue['sys_id']}_{field}_{record['sys_id']}",
+                    }
+                )
+
+        issue_text = str(issue)
+        extractions = []
+        if config.get(SERVICENOW_JSON_EXTRACT_IPS):
+            extractions.extend([(IP_REGEXC, "IP Address", "ip_address"), (IPV6_REGEXC, "IPV6 Address", "ipv6_address")])
+        if config.get(SERVICENOW_JSON_EXTRACT_HASHES):
+            extractions.append((HASH_REGEXC, "Hash", "hash"))
+        if config.get(SERVICENOW_JSON_EXTRACT_URLS):
+            extractions.append((URI_REGEXC, "URL", "URL"))
+        for regex, artifact_label, cef_key in extractions:
+            for value in self._extract_values(regex, issue_text):
+                art = {
+                    "label": artifact_label,
+                    "cef": {cef_key: value},
+                    "source_data_identifier": self._indicator_sdi(issue, cef_key, value),
+                }
+                artifacts.append(art)
+
+        return container, artifacts
+
+    def _save_issue(self, issue, container, artifacts, label):
+        """Save the container of an issue, unless one exists, and its new or changed artifacts. Returns 1 on failure"""
+        container_id, existing_label, _, _ = self._check_for_existing_container(issue["sys_id"], label)
+        existing_artifacts = {}
+        if container_id and existing_label == label:
+            existing_artifacts = self._get_existing_artifacts(container_id)
+
+        if not container_id or existing_label != label:
+            ret_val, _, container_id = self.save_container(container)
+            if phantom.is_fail(ret_val):
+                return 1
+
+        for artifact in artifacts:
+            artifact["container_id"] = container_id
+        if existing_artifacts:
+            artifacts = self._upsert_artifacts(artifacts, existing_artifacts)
+        if artifacts:
+            self.save_artifacts(artifacts)
+        return 0
+
+    def _find_containers(self, sdis, label):
+        """Return the ids of the containers with the label of the given source data identifiers, oldest container first"""
+        containers = {}
+        for index in range(0, len(sdis), SERVICENOW_IN_QUERY_CHUNK_SIZE):
+            chunk = sdis[index : index + SERVICENOW_IN_QUERY_CHUNK_SIZE]
+            request_str = (
+                f"{self.get_phantom_base_url()}rest/container?page_size=0&_filter_source_data_identifier__in={json.dumps(chunk)}"
+                f'&_filter_label="{label}"&sort=create_time&order=desc'
+            )
+            try:
+                resp_json = self._make_local_rest_call("get", request_str).json()
+            except Exception as e:
+                self.error_print(f"Error making local rest call: {self._get_error_message_from_exception(e)}")
+                continue
+
+            for container in resp_json.get("data", []):
+                containers[container["source_data_identifier"]] = container["id"]
+        return containers
+
+    def _ingest_journal_entries(self, action_result, config, tables, label, severity):
+        """Add the comments and work notes written since the previous poll to the containers of their tickets.
+        One query for the journal of all the polled tables, with its own cursor. Returns an error message or None.
+        """
+        cursor = self._state.setdefault("journal_cursor", {})
+        if "last_time" not in cursor:
+            # The journal is ingested from the first poll with the option on, the history is in get ticket
+            cursor["last_time"] = datetime.now(timezone.utc).strftime(SERVICENOW_DATETIME_FORMAT)
+            cursor["seen"] = []
+            self.debug_print(f"Ingesting the journal entries created from {cursor['last_time']}")
+            return None
+
+        query_time = self._get_cursor_time(config, cursor["last_time"])
+        query = "nameIN{}^elementIN{}".format(",".join(tables), ",".join(SERVICENOW_JOURNAL_ARTIFACT_NAMES))
+        query += "^sys_created_on>=javascript:gs.dateGenerate('{}','{}')^ORDERBYsys_created_on".format(*query_time.split(" "))
+        journal_result = ActionResult()
+        entries = self._paginator(
+            SERVICENOW_SYS_JOURNAL_FIELD_ENDPOINT,
+            journal_result,
+            payload={"sysparm_query": query, "sysparm_fields": SERVICENOW_JOURNAL_FIELDS},
+            limit=SERVICENOW_DEFAULT_LIMIT,
+        )
+        if entries is None:
+            return journal_result.get_message()
+
+        # The query includes the second of the cursor, the entries of that second already ingested are skipped
+        seen = set(cursor.get("seen", []))
+        entries = [entry for entry in entries if entry.get("sys_id") not in seen]
+        # Entries of the previous polls whose ticket had no container yet, e.g. a ticket left for the next poll
+        pending = [entry for entry in cursor.get("pending", []) if time.time() - entry["queued_at"] < SERVICENOW_JOURNAL_PENDING_SECONDS]
+        if not entries and not pending:
+            cursor.pop("pending", None)
+            return None
+
+        containers = self._find_containers(sorted({entry["element_id"] for entry in pending + entries}), label)
+        artifacts = []
+        unmatched = []
+        for entry in pending + entries:
+            container_id = containers.get(entry["element_id"])
+            if not container_id:
+                unmatched.append({"queued_at": time.time(), **entry})
+                continue
+            artifacts.append(
+                {
+                    "container_id": container_id,
+                    "label": SERVICENOW_JOURNAL_ARTIFACT_LABEL,
+                    "name": SERVICENOW_JOURNAL_ARTIFACT_NAMES.get(entry.get("element"), entry.get("element")),
+                    "severity": severity,
+                    "cef": {key: entry.get(key) for key in SERVICENOW_JOURNAL_FIELDS.split(",") if key != "sys_id"},
+                    "source_data_identifier": entry["sys_id"],
+                }
+            )
+
+        if artifacts:
+            self.save_progress(f"Adding {len(artifacts)} journal entries to {len({art['container_id'] for art in artifacts})} containers")
+            ret_val, message, _ = self.save_artifacts(artifacts)
+            if phantom.is_fail(ret_val):
+                return message
+
+        if unmatched:
+            self.debug_print(f"{len(unmatched)} journal entries have no container yet, they are retried at the next poll")
+        cursor["pending"] = unmatched[-SERVICENOW_JOURNAL_MAX_PENDING:]
+
+        if entries:
+            newest = entries[-1]["sys_created_on"]
+            newest_ids = [entry["sys_id"] for entry in entries if entry["sys_created_on"] == newest]
+            cursor["seen"] = newest_ids + (list(seen) if newest == cursor["last_time"] else [])
+            cursor["last_time"] = newest
+        return None
+
+    @staticmethod
+    def _get_record_version(record):
+        """Version of a ticket/record for the de-duplication of push mode, its update count then its update time"""
+        mod_count = str(record.get("sys_mod_count") or "")
+        return [int(mod_count) if mod_count.isdigit() else -1, record.get("sys_updated_on") or ""]
+
+    def _is_version_ingested(self, record):
+        """Whether push mode already ingested this version of the ticket/record or a newer one"""
+        if self._push_versions is None:
+            return False
+        ingested = self._push_versions.get(record.get("sys_id"))
+        version = self._get_record_version(record)
+        return ingested is not None and version != [-1, ""] and ingested >= version
+
+    def _remember_version(self, record):
+        if self._push_versions is not None:
+            self._push_versions[record["sys_id"]] = self._get_record_version(record)
+
+    def _drain_event_spool(self, action_result, config, poll_tables, enrichment_fields, label, severity, deadline):
+        """Ingest the tickets/records of the events pushed by ServiceNow to the spool, in batches of events.
+        The events of a batch are reduced to the newest version of every record and the versions already ingested
+        are skipped. The current records are fetched with one query per table, so a late or repeated event never
+        ingests stale data. A batch stays in the spool until its records are saved.
+        :return: the number of tickets/records ingested, the number of failures and an error message or None
+        """
+        from servicenow_spool import EventSpool
+
+        push = self._state["push"]
+        table_filters = dict(poll_tables)
+        ingested = failed = 0
+        try:
+            spool = EventSpool(config[SERVICENOW_JSON_PUSH_SPOOL_DIRECTORY])
+            self._push_versions = spool.load_versions()
+            while not deadline or time.monotonic() < deadline:
+                events, position, malformed = spool.read(SERVICENOW_PUSH_DRAIN_BATCH_SIZE)
+                if malformed:
+                    # Events may have been lost, the tables are polled to close the gap
+                    self.debug_print(f"Skipped {malformed} unreadable events of the spool, the polled tables are queried")
+                    push["last_poll"] = 0
+
+                latest = {}
+                for event in events:
+                    key = (event.get("table"), event.get("sys_id"))
+                    if key[0] not in table_filters or not key[1] or self._is_version_ingested(event):
+                        continue
+                    if key not in latest or self._get_record_version(event) > self._get_record_version(latest[key]):
+                        latest[key] = event
+
+                table_sys_ids = {}
+                for table, sys_id in latest:
+                    table_sys_ids.setdefault(table, []).append(sys_id)
+
+                issues = []
+                for table, sys_ids in table_sys_ids.items():
+                    drain_result = ActionResult()
+                    ret_val, records = self._query_in(drain_result, table, "sys_id", sys_ids, condition=table_filters[table])
+                    if phantom.is_fail(ret_val):
+                        return ingested, failed, drain_result.get_message()
+                    issues.extend(record for record in records if not self._is_version_ingested(record))
+
+                if issues:
+                    issues.sort(key=lambda issue: issue.get("sys_updated_on", ""))
+                    self.save_progress(f"Ingesting {len(issues)} issues pushed by ServiceNow")
+                    references = None
+                    if enrichment_fields:
+                        references = self._resolve_references(action_result, issues, enrichment_fields)
+                    for issue in issues:
+                        container, artifacts = self._build_issue_payloads(issue, label, severity, config, references)
+                        issue_failed = self._save_issue(issue, container, artifacts, label)
+                        if not issue_failed:
+                            self._remember_version(issue)
+                        failed += issue_failed
+                    ingested += len(issues)
+
+                spool.ack(position)
+                # The events pushed while the spool is drained wait for the next poll
+                if len(events) + malformed < SERVICENOW_PUSH_DRAIN_BATCH_SIZE:
+                    break
+        except OSError as e:
+            return ingested, failed, self._get_error_message_from_exception(e)
+
+        return ingested, failed, None
+
+    def _save_push_versions(self, config):
+        """Save the versions ingested in push mode to the spool, the newest SERVICENOW_PUSH_MAX_VERSIONS of them.
+        Returns an error message or None.
+        """
+        from servicenow_spool import EventSpool
+
+        if self._push_versions is None:
+            return None
+
+        newest = sorted(self._push_versions.items(), key=lambda item: item[1][1], reverse=True)
+        try:
+            EventSpool(config[SERVICENOW_JSON_PUSH_SPOOL_DIRECTORY]).save_versions(dict(newest[:SERVICENOW_PUSH_MAX_VERSIONS]))
+        except OSError as e:
+            return self._get_error_message_from_exception(e)
+        return None
+
+    def _on_poll(self, param):
+        # Progress
+        self.save_progress(SERVICENOW_USING_BASE_URL, base_url=self._base_url)
+
+        # Connectivity
+        self.save_progress(phantom.APP_PROG_CONNECTING_TO_ELLIPSES, self._host)
+
+        # Get config
+        config = self.get_config()
+
+        # Add action result
+        action_result = self.add_action_result(phantom.ActionResult(param))
+
+        ret_val, poll_tables = self._get_poll_tables(action_result, config)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
+
+        ret_val, enrichment_fields = self._get_enrichment_fields(action_result, config)
+        if phantom.is_fail(ret_val):
+            return action_result.get_status()
 
         # Ingest the issues
-        failed = 0
         label = self.get_config().get("ingest", {}).get("container_label")
 
         if config.get("severity"):
@@ -1817,90 +3882,140 @@ class ServicenowConnector(BaseConnector):
                 return action_result.get_status()
             severity = config.get("severity", default_severity).lower()
 
-        for issue in issues:
-            sdi = issue["sys_id"]
-            sd = issue.get("short_description")
-            desc = issue.get("description", "")
-            existing_label = None
-            existing_sd = None
-            existing_desc = None
-
-            container_id, existing_label, existing_sd, existing_desc = self._check_for_existing_container(sdi, label)
-            if not sd:
-                sd = "Phantom added container name (short description of the ticket/record found empty)"
-
-            if not container_id or existing_label != label:
-                desc = issue.get("description", "")
-                container = dict(
-                    data=issue, description=desc, label=label, severity=severity, name=f"{sd}", source_data_identifier=issue["sys_id"]
-                )
-                ret_val, _, container_id = self.save_container(container)
+        # The time budget covers the whole poll, fetching and ingesting overlap so both stop at the deadline
+        deadline = None
+        if self._poll_time_budget:
+            deadline = time.monotonic() + self._poll_time_budget
+
+        # In push mode the events spooled by the receiver are ingested first, the tables are only polled
+        # every push_fallback_poll_interval minutes to close the gaps, e.g. events lost while the receiver was down
+        drained = failed = 0
+        push_error = None
+        push_mode = config.get(SERVICENOW_JSON_PUSH_SPOOL_DIRECTORY) and not self.is_poll_now()
+        poll_tables_due = True
+        if push_mode:
+            push = self._state.setdefault("push", {})
+            drained, failed, push_error = self._drain_event_spool(
+                action_result, config, poll_tables, enrichment_fields, label, severity, deadline
+            )
+            if drained:
+                action_result.update_summary({"pushed_issues_ingested": drained})
+            last_poll = push.get("last_poll")
+            poll_tables_due = bool(push_error) or not last_poll or time.time() - last_poll >= self._push_fallback_poll_interval * 60
+
+        # Every table has its own query and cursor, the pages of all the tables are fetched concurrently
+        queries = []
+        for index, (table, table_filter) in enumerate(poll_tables if poll_tables_due else []):
+            cursor = self._get_poll_cursor(table, index == 0)
+            if not self.is_poll_now() and self._backfill_days and (cursor.get("first_run", True) or "backfill" in cursor):
+                queries.extend(self._build_backfill_queries(config, table, table_filter, cursor))
+                continue
 
-                if phantom.is_fail(ret_val):
-                    failed += 1
-                    continue
+            query, max_tickets = self._build_poll_query(param, table, table_filter, cursor)
+            self.debug_print(f"Polling table {table} with this query: {query}")
+            table_query = self._build_table_query(table, query, max_tickets)
+            # With a priority order, the keys of all the pending tickets are scanned first and only the top ones are fetched
+            if self._ingestion_priority:
+                table_query = self._build_priority_projection(table_query)
+            queries.append(table_query)
 
-            artifacts = []
-            artifact_dict = dict(
-                container_id=container_id,
-                data=issue,
-                description=sd,
-                cef=issue,
-                label="issue",
-                severity=severity,
-                name=issue.get("number", "Phantom added artifact name (number of the ticket/record found empty)"),
-                source_data_identifier=issue["sys_id"],
-            )
-            artifacts.append(artifact_dict)
-            extract_ips = config.get(SERVICENOW_JSON_EXTRACT_IPS)
-            extract_hashes = config.get(SERVICENOW_JSON_EXTRACT_HASHES)
-            extract_url = config.get(SERVICENOW_JSON_EXTRACT_URLS)
-            if extract_ips:
-                for match in ip_regexc.finditer(str(issue)):
-                    cef = {}
-                    cef["ip_address"] = match.group()
-                    art = {"container_id": container_id, "label": "IP Address", "cef": cef}
-                    artifacts.append(art)
-
-                for match in ipv6_regexc.finditer(str(issue)):
-                    cef = {}
-                    cef["ipv6_address"] = match.group()
-                    art = {"container_id": container_id, "label": "IPV6 Address", "cef": cef}
-                    artifacts.append(art)
-
-            if extract_hashes:
-                for match in hash_regexc.finditer(str(issue)):
-                    cef = {}
-                    cef["hash"] = match.group()
-                    art = {"container_id": container_id, "label": "Hash", "cef": cef}
-                    artifacts.append(art)
-
-            if extract_url:
-                for match in uri_regexc.finditer(str(issue)):
-                    cef = {}
-                    cef["URL"] = match.group()
-                    art = {"container_id": container_id, "label": "URL", "cef": cef}
-                    artifacts.append(art)
-            self.save_artifacts(artifacts)
+        # TODO: handle cases where we go over the ingestions limit
 
-        action_result.set_status(phantom.APP_SUCCESS, "Containers created")
+        # The tables share the ingestion, each cursor moves once the issues of its table are saved.
+        # The issues come in the order of sys_updated_on, so a poll cut short resumes after the last issue it ingested
+        issues_lists, poll_failed = [], 0
+        if queries:
+            issues_lists, poll_failed = self._run_poll_pipeline(action_result, queries, label, severity, config, enrichment_fields, deadline)
+        failed += poll_failed
+
+        errors = []
+        # Loaded from the spool by the drain, with the versions ingested by the drain and the poll
+        versions_error = self._save_push_versions(config)
+        if versions_error:
+            self.debug_print(f"Unable to save the versions ingested in push mode. {versions_error}")
+            errors.append(f"{config[SERVICENOW_JSON_PUSH_SPOOL_DIRECTORY]}: {versions_error}")
+        for query in queries:
+            if query.get("failed"):
+                self.debug_print(f"Unable to poll table {query['table']}. {query['action_result'].get_message()}")
+                errors.append(f"{query['table']}: {query['action_result'].get_message()}")
+        if push_error:
+            self.debug_print(f"Unable to drain the spool of pushed events. {push_error}")
+            errors.append(f"{config[SERVICENOW_JSON_PUSH_SPOOL_DIRECTORY]}: {push_error}")
+
+        if queries and all(query.get("failed") for query in queries) and not any(issues_lists) and not drained:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_POLL_TABLES.format("; ".join(errors)))
+
+        # The next fallback poll is due once the tables were polled to the end, a backfill goes on at every poll
+        if push_mode and queries and not errors and all(query["complete"] and "slice" not in query for query in queries):
+            push["last_poll"] = time.time()
+
+        # The journal entries of the tickets ingested before are added even when no ticket changed
+        ingest_journal = config.get(SERVICENOW_JSON_INGEST_JOURNAL) and not self.is_poll_now()
+        if (
+            not drained
+            and not any(query["fetched"] for query in queries)
+            and not any("slice" in query for query in queries)
+            and not ingest_journal
+        ):
+            if errors:
+                return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_POLL_TABLES.format("; ".join(errors)))
+            return action_result.set_status(phantom.APP_SUCCESS, "No issues found. Nothing to ingest.")
 
-        if not self.is_poll_now():
-            if "sys_updated_on" not in issues[-1]:
-                return action_result.set_status(phantom.APP_ERROR, "No updated time in last ingested incident.")
+        for query, issues in zip(queries, issues_lists):
+            table = query["table"]
+            if issues:
+                self.save_progress(f"Ingested {len(issues)} issues from table {table}")
 
-            updated_time = issues[-1]["sys_updated_on"]
+            if not query["complete"] and not query.get("failed"):
+                self.save_progress(f"Time budget reached, {len(issues)} issues ingested from table {table}")
+                action_result.update_summary({"time_budget_reached": True})
 
-            if "timezone" in config:
-                dt = datetime.strptime(updated_time, SERVICENOW_DATETIME_FORMAT)
-                tz = ZoneInfo(config["timezone"])
-                new_dt = dt + (tz.utcoffset(dt) or timedelta(0))
-                updated_time = new_dt.strftime(SERVICENOW_DATETIME_FORMAT)
+            if self.is_poll_now():
+                continue
 
-            self._state["last_time"] = updated_time
+            # The pages of a failed query saved before the failure still move its cursor
+            cursor = self._state["table_cursors"][table]
+            if "slice" in query:
+                if query["complete"]:
+                    self._complete_backfill_slice(cursor, query["slice"])
+                elif issues and "sys_updated_on" in issues[-1]:
+                    cursor["backfill"].setdefault("resume", {})[str(query["slice"])] = self._get_cursor_time(
+                        config, issues[-1]["sys_updated_on"]
+                    )
+                continue
 
-            if self._state.get("first_run", True):
-                self._state["first_run"] = False
+            if not issues and not query["complete"]:
+                continue
+
+            if "projection" in query:
+                self._advance_priority_cursor(config, cursor, query, issues)
+            elif issues:
+                if "sys_updated_on" not in issues[-1]:
+                    errors.append(f"{table}: No updated time in last ingested incident.")
+                    continue
+                cursor["last_time"] = self._get_cursor_time(config, issues[-1]["sys_updated_on"])
+
+            if cursor.get("first_run", True):
+                cursor["first_run"] = False
+
+        if ingest_journal:
+            if deadline and time.monotonic() >= deadline:
+                self.debug_print("Time budget of the poll reached, the journal entries are ingested on the next poll")
+            else:
+                journal_error = self._ingest_journal_entries(action_result, config, [table for table, _ in poll_tables], label, severity)
+                if journal_error:
+                    errors.append(f"sys_journal_field: {journal_error}")
+
+        # Scheduled polls keep the local mirror up to date, a failed sync is retried on the next poll
+        mirror_tables = self.csv_to_list(config.get(SERVICENOW_JSON_MIRROR_TABLES) or "")
+        if mirror_tables and deadline and time.monotonic() >= deadline:
+            self.debug_print("Time budget of the poll reached, the mirror is synced on the next poll")
+        elif mirror_tables and not self.is_poll_now():
+            for result in self._sync_mirror_tables(action_result, [table.lower() for table in mirror_tables]):
+                self.debug_print(f"Mirror sync of table {result['table']}: {result}")
+
+        if errors:
+            return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_POLL_TABLES.format("; ".join(errors)))
 
         if failed:
             return action_result.set_status(phantom.APP_ERROR, SERVICENOW_ERROR_FAILURES)
@@ -1909,7 +4024,7 @@ class ServicenowConnector(BaseConnector):
 
     def _find_default_severity(self, action_result):
         try:
-            r = requests.get(f"{self._get_phantom_base_url()}rest/severity", verify=False)  # nosemgrep
+            r = self._make_local_rest_call("get", f"{self._get_phantom_base_url()}rest/severity")
             resp_json = r.json()
         except Exception as e:
             self._dump_error_log(e, "Error occurred while finding default severity")
@@ -1939,7 +4054,7 @@ class ServicenowConnector(BaseConnector):
 
     def _validate_custom_severity(self, action_result, severity):
         try:
-            r = requests.get(f"{self._get_phantom_base_url()}rest/severity", verify=False)  # nosemgrep
+            r = self._make_local_rest_call("get", f"{self._get_phantom_base_url()}rest/severity")
             resp_json = r.json()
         except Exception as e:
             self._dump_error_log(e, "Error occurred while finding custom severity")
@@ -1984,44 +4099,78 @@ class ServicenowConnector(BaseConnector):
         # Get the action that we are supposed to carry out, set it in the connection result object
         action = self.get_action_identifier()
 
-        ret_val = phantom.APP_SUCCESS
-
-        if action == self.ACTION_ID_CREATE_TICKET:
-            ret_val = self._create_ticket(param)
-        elif action == self.ACTION_ID_ADD_WORK_NOTE:
-            ret_val = self._add_work_note(param)
-        elif action == self.ACTION_ID_ORDER_ITEM:
-            ret_val = self._request_catalog_item(param)
-        elif action == self.ACTION_ID_ADD_COMMENT:
-            ret_val = self._add_comment(param)
-        elif action == self.ACTION_ID_DESCRIBE_SERVICE_CATALOG:
-            ret_val = self._describe_service_catalog(param)
-        elif action == self.ACTION_ID_DESCRIBE_CATALOG_ITEM:
-            ret_val = self._describe_catalog_item(param)
-        elif action == self.ACTION_ID_LIST_SERVICES:
-            ret_val = self._list_services(param)
-        elif action == self.ACTION_ID_LIST_CATEGORIES:
-            ret_val = self._list_categories(param)
-        elif action == self.ACTION_ID_LIST_SERVICE_CATALOGS:
-            ret_val = self._list_service_catalogs(param)
-        elif action == self.ACTION_ID_LIST_TICKETS:
-            ret_val = self._list_tickets(param)
-        elif action == self.ACTION_ID_GET_TICKET:
-            ret_val = self._get_ticket(param)
-        elif action == self.ACTION_ID_UPDATE_TICKET:
-            ret_val = self._update_ticket(param)
-        elif action == self.ACTION_ID_GET_VARIABLES:
-            ret_val = self._get_variables(param)
-        elif action == self.ACTION_ID_SEARCH_SOURCES:
-            ret_val = self._search_sources(param)
-        elif action == self.ACTION_ID_ON_POLL:
-            ret_val = self._on_poll(param)
-        elif action == phantom.ACTION_ID_TEST_ASSET_CONNECTIVITY:
-            ret_val = self._test_connectivity(param)
-        elif action == self.ACTION_ID_RUN_QUERY:
-            ret_val = self._run_query(param)
-        elif action == self.ACTION_ID_QUERY_USERS:
-            ret_val = self._query_users(param)
+        profiler = None
+        if profiling_requested(self.get_config().get(SERVICENOW_JSON_PROFILE_ACTIONS)):
+            profiler = ActionProfiler(
+                os.path.join(self.get_state_dir(), f"{self.get_asset_id()}_profiles"),
+                action,
+                self._profile_top_functions,
+                SERVICENOW_MAX_PROFILES,
+            )
+            profiler.start()
+
+        try:
+            ret_val = phantom.APP_SUCCESS
+
+            if action == self.ACTION_ID_CREATE_TICKET:
+                ret_val = self._create_ticket(param)
+            elif action == self.ACTION_ID_ADD_WORK_NOTE:
+                ret_val = self._add_work_note(param)
+            elif action == self.ACTION_ID_ORDER_ITEM:
+                ret_val = self._request_catalog_item(param)
+            elif action == self.ACTION_ID_ADD_COMMENT:
+                ret_val = self._add_comment(param)
+            elif action == self.ACTION_ID_DESCRIBE_SERVICE_CATALOG:
+                ret_val = self._describe_service_catalog(param)
+            elif action == self.ACTION_ID_DESCRIBE_CATALOG_ITEM:
+                ret_val = self._describe_catalog_item(param)
+            elif action == self.ACTION_ID_LIST_SERVICES:
+                ret_val = self._list_services(param)
+            elif action == self.ACTION_ID_LIST_CATEGORIES:
+                ret_val = self._list_categories(param)
+            elif action == self.ACTION_ID_LIST_SERVICE_CATALOGS:
+                ret_val = self._list_service_catalogs(param)
+            elif action == self.ACTION_ID_LIST_TICKETS:
+                ret_val = self._list_tickets(param)
+            elif action == self.ACTION_ID_GET_TICKET:
+                ret_val = self._get_ticket(param)
+            elif action == self.ACTION_ID_UPDATE_TICKET:
+                ret_val = self._update_ticket(param)
+            elif action == self.ACTION_ID_GET_VARIABLES:
+                ret_val = self._get_variables(param)
+            elif action == self.ACTION_ID_SEARCH_SOURCES:
+                ret_val = self._search_sources(param)
+            elif action == self.ACTION_ID_ON_POLL:
+                ret_val = self._on_poll(param)
+            elif action == phantom.ACTION_ID_TEST_ASSET_CONNECTIVITY:
+                ret_val = self._test_connectivity(param)
+            elif action == self.ACTION_ID_RUN_QUERY:
+                ret_val = self._run_query(param)
+            elif action == self.ACTION_ID_QUERY_USERS:
+                ret_val = self._query_users(param)
+            elif action == self.ACTION_ID_EXPORT_RECORDS:
+                ret_val = self._export_records(param)
+            elif action == self.ACTION_ID_ADD_BULK_NOTE:
+                ret_val = self._add_bulk_note(param)
+            elif action == self.ACTION_ID_CHECK_TICKETS_CHANGED:
+                ret_val = self._check_tickets_changed(param)
+            elif action == self.ACTION_ID_SYNC_MIRROR:
+                ret_val = self._sync_mirror(param)
+            elif action == self.ACTION_ID_BULK_CREATE_TICKETS:
+                ret_val = self._bulk_create_tickets(param)
+        finally:
+            if profiler:
+                profile_summary = profiler.stop()
+                self.debug_print(f"Profile of {action} written to {profile_summary['profile_file']}")
+                if self.get_action_results():
+                    self.get_action_results()[-1].update_summary({"profile": profile_summary})
+
+        if self.get_action_results():
+            if self.get_config().get(SERVICENOW_JSON_REQUEST_METRICS):
+                self.get_action_results()[-1].update_summary({"request_metrics": self._request_metrics.to_summary()})
+            else:
+                self.get_action_results()[-1].update_summary({"rest_calls": self._request_metrics.to_counters()})
+
         return ret_val
 
 
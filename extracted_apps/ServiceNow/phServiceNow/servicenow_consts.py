@@ -35,6 +35,12 @@ SERVICENOW_JSON_VAULT_ID = "vault_id"
 SERVICENOW_JSON_FILTER = "filter"
 SERVICENOW_JSON_ON_POLL_FILTER = "on_poll_filter"
 SERVICENOW_JSON_ON_POLL_TABLE = "on_poll_table"
+SERVICENOW_JSON_ON_POLL_TABLE_FILTERS = "on_poll_table_filters"
+SERVICENOW_JSON_BACKFILL_DAYS = "backfill_days"
+SERVICENOW_JSON_BACKFILL_SLICE_HOURS = "backfill_slice_hours"
+SERVICENOW_JSON_BACKFILL_SLICES_PER_POLL = "backfill_slices_per_poll"
+SERVICENOW_JSON_POLL_TIME_BUDGET = "poll_time_budget"
+SERVICENOW_JSON_POLL_PAGE_SECONDS = "poll_page_seconds"
 SERVICENOW_JSON_QUERY_TABLE = "query_table"
 SERVICENOW_JSON_SYSPARM_SYS_ID_QUERY = "sysparm_query=sys_id={}"
 SERVICENOW_JSON_SYSPARM_USER_NAME_QUERY = "sysparm_query=user_name={}"
@@ -45,6 +51,40 @@ SERVICENOW_JSON_EXTRACT_URLS = "extract_urls"
 SERVICENOW_JSON_SYSPARM_TERM = "sysparm_term"
 SERVICENOW_JSON_SYSPARM_SEARCH_SOURCES = "sysparm_search_sources"
 SERVICENOW_JSON_TOTAL_RECORDS = "total_records"
+SERVICENOW_JSON_TRANSPORT = "transport"
+SERVICENOW_JSON_MAX_CONCURRENT_REQUESTS = "max_concurrent_requests"
+SERVICENOW_JSON_REQUEST_METRICS = "request_metrics"
+SERVICENOW_JSON_EXPORT_FORMAT = "format"
+SERVICENOW_JSON_COMPRESS = "compress"
+SERVICENOW_JSON_FILE_NAME = "file_name"
+SERVICENOW_JSON_MAX_JOURNAL_ENTRIES = "max_journal_entries"
+SERVICENOW_JSON_JOURNAL_SINCE = "journal_since"
+SERVICENOW_JSON_ENRICH_REFERENCES = "enrich_references"
+SERVICENOW_JSON_ENRICHMENT_MODE = "enrichment_mode"
+SERVICENOW_JSON_IDS = "ids"
+SERVICENOW_JSON_NOTE = "note"
+SERVICENOW_JSON_NOTE_TYPE = "note_type"
+SERVICENOW_JSON_TICKETS = "tickets"
+SERVICENOW_JSON_TABLES = "tables"
+SERVICENOW_JSON_SOURCE = "source"
+SERVICENOW_JSON_MIRROR_TABLES = "mirror_tables"
+SERVICENOW_JSON_MIRROR_RECONCILE_HOURS = "mirror_reconcile_hours"
+SERVICENOW_JSON_QUERY_CACHE_TTL = "query_cache_ttl"
+SERVICENOW_JSON_STAGING_TABLE = "staging_table"
+SERVICENOW_JSON_PROFILE_ACTIONS = "profile_actions"
+SERVICENOW_JSON_PROFILE_TOP_FUNCTIONS = "profile_top_functions"
+SERVICENOW_JSON_INGESTION_PROFILE = "ingestion_profile"
+SERVICENOW_JSON_CEF_FIELDS = "cef_fields"
+SERVICENOW_JSON_MAX_FIELD_LENGTH = "max_field_length"
+SERVICENOW_JSON_INGESTION_PRIORITY = "ingestion_priority"
+SERVICENOW_JSON_CIRCUIT_FAILURE_THRESHOLD = "circuit_failure_threshold"
+SERVICENOW_JSON_SCHEMA_CACHE_TTL = "schema_cache_ttl"
+SERVICENOW_JSON_INGEST_JOURNAL = "ingest_journal"
+SERVICENOW_JSON_CIRCUIT_RESET_TIMEOUT = "circuit_reset_timeout"
+SERVICENOW_JSON_REQUEST_CONNECT_TIMEOUT = "request_connect_timeout"
+SERVICENOW_JSON_REQUEST_READ_TIMEOUT = "request_read_timeout"
+SERVICENOW_JSON_PUSH_SPOOL_DIRECTORY = "push_spool_directory"
+SERVICENOW_JSON_PUSH_FALLBACK_POLL_INTERVAL = "push_fallback_poll_interval"
 
 SERVICENOW_ERROR_CONNECTIVITY_TEST = "Test Connectivity Failed"
 SERVICENOW_SUCCESS_CONNECTIVITY_TEST = "Test Connectivity Passed"
@@ -72,6 +112,39 @@ SERVICENOW_ERROR_ONE_PARAM_REQ = (
     "Please specify at least one of the parameters short_description, description, or fields to create the ticket with"
 )
 SERVICENOW_ERROR_FAILURES = "Some tickets had issues during ingestion, see logs for details"
+SERVICENOW_ERROR_INVALID_EXPORT_FORMAT = "Please provide one of the following values in the format parameter: {}"
+SERVICENOW_ERROR_EXPORT_VAULT = "Unable to add the export to the vault. {}"
+SERVICENOW_ERROR_INVALID_JOURNAL_SINCE = "Please provide a UTC date-time in the format YYYY-MM-DD HH:MM:SS in the journal_since parameter"
+SERVICENOW_ERROR_INVALID_ENRICH_REFERENCES = (
+    "Please provide comma-separated field:table pairs in the enrich_references parameter (e.g. caller_id:sys_user)"
+)
+SERVICENOW_ERROR_INVALID_ENRICHMENT_MODE = "Please provide one of the following values in the enrichment_mode parameter: {}"
+SERVICENOW_ERROR_INVALID_INGESTION_PROFILE = "Please provide one of the following values in the ingestion_profile parameter: {}"
+SERVICENOW_ERROR_INVALID_FIELDS = "The fields are not valid for table {}: {}"
+SERVICENOW_ERROR_SCHEMA = "Unable to read the schema of table {}, the fields are not validated. {}"
+SERVICENOW_ERROR_INVALID_INGESTION_PRIORITY = (
+    "Please provide a comma-separated list of field names, each optionally prefixed with '-' for a descending order, "
+    "in the ingestion_priority parameter. Invalid entry: {}"
+)
+SERVICENOW_ERROR_INVALID_NOTE_TYPE = "Please provide one of the following values in the note_type parameter: {}"
+SERVICENOW_ERROR_TICKET_NOT_FOUND = "No ticket found with this number"
+SERVICENOW_ERROR_BULK_NOTE = "Unable to add the note to any of the tickets"
+SERVICENOW_SUCCESS_NOTE_ADDED = "Added the note successfully"
+SERVICENOW_ERROR_INVALID_KNOWN_TICKETS = (
+    "Please provide a JSON list of tickets with their sys_id and sys_mod_count or sys_updated_on in the tickets parameter. {}"
+)
+SERVICENOW_ERROR_INVALID_SOURCE = "Please provide one of the following values in the source parameter: {}"
+SERVICENOW_ERROR_TABLE_NOT_MIRRORED = "Table {} is not in the local mirror, add it to the mirror_tables of the asset and run sync mirror"
+SERVICENOW_ERROR_MIRROR_QUERY = "The local mirror cannot answer this query, use the remote source instead. Details: {}"
+SERVICENOW_ERROR_MIRROR = "Error occurred while accessing the local mirror. {}"
+SERVICENOW_ERROR_QUERY_CACHE = "Error occurred while accessing the query cache. {}"
+SERVICENOW_ERROR_TABLE_HIERARCHY = "Unable to read the tables extended by table {}, only its own cached results are dropped on writes. {}"
+SERVICENOW_ERROR_BULK_ROWS = "Please provide a vault file with a JSON list of objects or a CSV file with a header row. {}"
+SERVICENOW_ERROR_BULK_CREATE = "Unable to create any of the tickets"
+SERVICENOW_ERROR_IMPORT_ROW_MISSING = "The import set response has no result for this row"
+SERVICENOW_ERROR_NO_MIRROR_TABLES = "Please provide the tables to sync in the tables parameter or the mirror_tables of the asset"
+SERVICENOW_ERROR_POLL_TABLES = "Unable to poll some of the tables. {}"
+SERVICENOW_ERROR_INVALID_TABLE_FILTERS = "Please provide a JSON object of table names to filters in the on_poll_table_filters parameter. {}"
 SERVICENOW_ERROR_CODE_MESSAGE = "Error code unavailable"
 SERVICENOW_ERROR_MESSAGE = "Unknown error occurred. Please check the asset configuration and|or action parameters"
 PARSE_ERROR_MESSAGE = "Unable to parse the error message. Please check the asset configuration and|or action parameters"
@@ -84,6 +157,7 @@ SERVICENOW_TICKET_ID_MESSAGE = "Please provide a valid Ticket Number in the 'id'
                                 parameter and provide a valid 'sys_id' in the 'id' parameter"
 SERVICENOW_INVALID_PARAMETER_MESSAGE = "Please provide valid input parameters"
 SERVICENOW_SEVERITY_MESSAGE = "Could not get severities from platform: {}"
+SERVICENOW_ERROR_INVALID_TRANSPORT = "Please provide a valid value in the 'transport' asset configuration parameter. Valid values: {}"
 
 SERVICENOW_USING_BASE_URL = "Using url: {base_url}"
 SERVICENOW_BASE_QUERY_URI = "/table/"
@@ -91,6 +165,8 @@ SERVICENOW_BASE_QUERY_URI = "/table/"
 DEFAULT_MAX_RESULTS = 100
 SERVICENOW_TICKET_FOOTNOTE = "Added by Phantom for container id: "
 SERVICENOW_DEFAULT_TABLE = "incident"
+# State keys that survive a reset of the stored OAuth token
+SERVICENOW_POLL_STATE_KEYS = ("first_run", "last_time", "table_cursors", "journal_cursor", "push")
 
 SERVICENOW_ITEM_OPT_MTOM_TABLE = "sc_item_option_mtom"
 SERVICENOW_ITEM_OPT_TABLE = "sc_item_option"
@@ -104,6 +180,86 @@ SERVICENOW_DEFAULT_OFFSET = 0
 SERVICENOW_DEFAULT_LIMIT = 10000
 SERVICENOW_DEFAULT_MAX_LIMIT = 100
 
+SERVICENOW_DEFAULT_TRANSPORT = "sync"
+SERVICENOW_TRANSPORTS = ["sync", "async"]
+SERVICENOW_DEFAULT_MAX_CONCURRENT_REQUESTS = 5
+SERVICENOW_DEFAULT_BACKFILL_SLICE_HOURS = 24
+SERVICENOW_DEFAULT_BACKFILL_SLICES_PER_POLL = 10
+# Adaptive page size of On Poll, the size reached is kept in the cursor of each table
+SERVICENOW_POLL_INITIAL_PAGE_SIZE = 1000
+SERVICENOW_POLL_MIN_PAGE_SIZE = 50
+SERVICENOW_POLL_MAX_PAGE_BYTES = 16 * 1024 * 1024
+SERVICENOW_DEFAULT_POLL_PAGE_SECONDS = 10
+# Tables a table extends that are looked up for its schema, task based tables have two or three
+SERVICENOW_SCHEMA_MAX_DEPTH = 10
+# Table name the cached hierarchies of the tables are stored under in the schema cache, kept for schema_cache_ttl
+# seconds or a day when the schema cache is disabled, since tables seldom change the table they extend
+SERVICENOW_TABLE_HIERARCHY_CACHE_TABLE = "sys_db_object"
+SERVICENOW_DEFAULT_TABLE_HIERARCHY_CACHE_TTL = 24 * 3600
+# Journal entries added to the containers of their ticket by On Poll
+SERVICENOW_JOURNAL_ARTIFACT_LABEL = "journal"
+SERVICENOW_JOURNAL_ARTIFACT_NAMES = {"comments": "Comment", "work_notes": "Work note"}
+SERVICENOW_JOURNAL_FIELDS = "sys_id,name,element,element_id,value,sys_created_on,sys_created_by"
+# Entries whose ticket has no container yet are retried at the next polls, up to this many for up to a day
+SERVICENOW_JOURNAL_MAX_PENDING = 1000
+SERVICENOW_JOURNAL_PENDING_SECONDS = 24 * 60 * 60
+# Pending tickets ranked by a priority poll, the key projection of each is a few hundred bytes
+SERVICENOW_PRIORITY_SCAN_LIMIT = 10000
+# Issues ingested between two checks of the time budget, the unit the On Poll pipeline passes between its stages
+SERVICENOW_POLL_INGEST_CHUNK_SIZE = 25
+# Chunks the fetch stage of the On Poll pipeline gets ahead of the saving, two default pages
+SERVICENOW_POLL_PIPELINE_CHUNKS = 80
+SERVICENOW_POLL_PIPELINE_WAIT_SECONDS = 1
+# Push mode, the events of the spool are drained in batches and the versions ingested are kept for the newest records
+SERVICENOW_DEFAULT_PUSH_FALLBACK_POLL_INTERVAL = 60
+SERVICENOW_PUSH_DRAIN_BATCH_SIZE = 500
+SERVICENOW_PUSH_MAX_VERSIONS = 10000
+# Hours between two listings of every sys_id of a mirrored table to remove the records deleted in ServiceNow
+SERVICENOW_DEFAULT_MIRROR_RECONCILE_HOURS = 24
+# Records per page of an export, small enough that the pages in flight stay in a few MB
+SERVICENOW_EXPORT_PAGE_SIZE = 1000
+SERVICENOW_DEFAULT_MAX_JOURNAL_ENTRIES = 100
+SERVICENOW_ENRICHMENT_MODE_ARTIFACT = "artifact"
+SERVICENOW_ENRICHMENT_MODE_CONTAINER = "container"
+SERVICENOW_ENRICHMENT_MODES = [SERVICENOW_ENRICHMENT_MODE_ARTIFACT, SERVICENOW_ENRICHMENT_MODE_CONTAINER]
+SERVICENOW_INGESTION_PROFILE_FULL = "full"
+SERVICENOW_INGESTION_PROFILE_COMPACT = "compact"
+SERVICENOW_INGESTION_PROFILES = [SERVICENOW_INGESTION_PROFILE_FULL, SERVICENOW_INGESTION_PROFILE_COMPACT]
+SERVICENOW_DEFAULT_CEF_FIELDS = (
+    "number,sys_id,short_description,state,priority,urgency,impact,category,caller_id,opened_by,assigned_to,assignment_group,"
+    "cmdb_ci,opened_at,sys_updated_on"
+)
+SERVICENOW_DEFAULT_MAX_FIELD_LENGTH = 4096
+# Fields of the container data in the compact profile, the full record is in the issue artifact
+SERVICENOW_COMPACT_CONTAINER_FIELDS = ("sys_id", "number", "sys_class_name")
+# Fields of a resolved reference kept in the cef of its artifact in the compact profile
+SERVICENOW_COMPACT_REFERENCE_FIELDS = ("sys_id", "number", "name", "user_name", "email")
+SERVICENOW_TRUNCATED_SUFFIX = "... [truncated {} characters]"
+SERVICENOW_NOTE_TYPE_COMMENT = "comment"
+SERVICENOW_NOTE_TYPE_WORK_NOTE = "work note"
+# Field of the ticket each type of note is written to
+SERVICENOW_NOTE_TYPES = {SERVICENOW_NOTE_TYPE_COMMENT: "comments", SERVICENOW_NOTE_TYPE_WORK_NOTE: "work_notes"}
+SERVICENOW_SOURCE_REMOTE = "remote"
+SERVICENOW_SOURCE_LOCAL = "local"
+SERVICENOW_SOURCES = [SERVICENOW_SOURCE_REMOTE, SERVICENOW_SOURCE_LOCAL]
+# Values per IN query, keeps the URL well under the usual length limits
+SERVICENOW_IN_QUERY_CHUNK_SIZE = 100
+# Import set row states of a transformed row
+SERVICENOW_IMPORT_SUCCESS_STATES = ("inserted", "updated")
+SERVICENOW_DEFAULT_PROFILE_TOP_FUNCTIONS = 10
+# Profiles kept in the state directory, the oldest are removed
+SERVICENOW_MAX_PROFILES = 20
+SERVICENOW_DEFAULT_CIRCUIT_FAILURE_THRESHOLD = 5
+SERVICENOW_DEFAULT_CIRCUIT_RESET_TIMEOUT = 60
+# Seconds to connect to the instance and between two reads of a response, a request timing out counts as a failure
+SERVICENOW_DEFAULT_REQUEST_CONNECT_TIMEOUT = 10
+SERVICENOW_DEFAULT_REQUEST_READ_TIMEOUT = 120
+SERVICENOW_CIRCUIT_STATE_MESSAGE = "Circuit breaker state: {state}, consecutive failed requests: {failures}"
+# Rows rendered per table by the custom widgets, the rest is counted in a "showing N of M" line
+SERVICENOW_VIEW_MAX_ROWS = 100
+SERVICENOW_VIEW_MAX_ROWS_PER_ACTION = {"list services": 200, "get variables": 200}
+SERVICENOW_VIEW_MAX_ROWS_ENV_VAR = "SERVICENOW_VIEW_MAX_ROWS"
+
 SERVICENOW_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
 
 SERVICENOW_TOKEN_STRING = "oauth_token"
@@ -130,3 +286,4 @@ SERVICENOW_SC_CAT_ITEMS_ENDPOINT = "/table/sc_cat_item"
 SERVICENOW_CATALOG_OREDERNOW_ENDPOINT = "/servicecatalog/items/{}/order_now"
 SERVICENOW_API_ENDPOINT = "/api/now"
 SERVICENOW_SEARCH_SOURCE_ENDPOINT = "/search/sources/textsearch"
+SERVICENOW_IMPORT_ENDPOINT = "/import/{}"
@@ -0,0 +1,74 @@
+# File: servicenow_export.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import csv
+import gzip
+import json
+
+
+EXPORT_FORMAT_NDJSON = "ndjson"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMATS = [EXPORT_FORMAT_NDJSON, EXPORT_FORMAT_CSV]
+
+
+def export_file_name(table, export_format, compress):
+    file_name = f"{table}_export.{export_format}"
+    if compress:
+        file_name += ".gz"
+    return file_name
+
+
+class ExportWriter:
+    """Writes records to an NDJSON or CSV file, optionally gzipped, one page at a time so nothing is kept in memory.
+    The CSV columns are the requested fields or, when none were requested, the fields of the first record.
+    """
+
+    def __init__(self, path, export_format, compress=False, fields=None):
+        self.path = path
+        self.count = 0
+        self._format = export_format
+        self._fields = fields
+        self._csv_writer = None
+
+        if compress:
+            self._file = gzip.open(path, "wt", encoding="utf-8", newline="")
+        else:
+            self._file = open(path, "w", encoding="utf-8", newline="")
+
+    def write(self, records):
+        for record in records:
+            if self._format == EXPORT_FORMAT_CSV:
+                self._write_csv(record)
+            else:
+                self._file.write(json.dumps(record, separators=(",", ":")))
+                self._file.write("\n")
+            self.count += 1
+
+    def _write_csv(self, record):
+        if self._csv_writer is None:
+            self._csv_writer = csv.DictWriter(self._file, fieldnames=self._fields or list(record), restval="", extrasaction="ignore")
+            self._csv_writer.writeheader()
+
+        # Reference fields come back as objects unless the links are excluded, keep only their value
+        row = {key: value.get("value", "") if isinstance(value, dict) else value for key, value in record.items()}
+        self._csv_writer.writerow(row)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,134 @@
+# File: servicenow_metrics.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import re
+import threading
+from urllib.parse import urlparse
+
+
+API_PREFIXES = ("/api/now", "/api/sn_sc")
+SYS_ID_RE = re.compile(r"\b[0-9a-f]{32}\b")
+NUMERIC_ID_RE = re.compile(r"/\d+(?=/|$)")
+
+# Upper bounds of the latency histogram buckets in milliseconds, anything slower goes in the last bucket
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+def endpoint_template(url):
+    """Reduce a URL or endpoint to its template, e.g. /table/incident/{sys_id}, so calls can be grouped"""
+    path = urlparse(url).path
+    for prefix in API_PREFIXES:
+        if path.startswith(prefix):
+            path = path[len(prefix) :]
+            break
+    return NUMERIC_ID_RE.sub("/{id}", SYS_ID_RE.sub("{sys_id}", path))
+
+
+def _bucket_label(elapsed_ms):
+    for upper in LATENCY_BUCKETS_MS:
+        if elapsed_ms <= upper:
+            return f"<={upper}ms"
+    return f">{LATENCY_BUCKETS_MS[-1]}ms"
+
+
+class RequestMetrics:
+    """Aggregates call count, latency histogram, bytes in/out, retries and status codes per endpoint template.
+    The transports call record() from their worker threads, so updates are serialized with a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def _entry(self, method, url):
+        key = f"{method.upper()} {endpoint_template(url)}"
+        entry = self._endpoints.get(key)
+        if entry is None:
+            entry = self._endpoints[key] = {
+                "count": 0,
+                "errors": 0,
+                "retries": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "bytes_in": 0,
+                "bytes_out": 0,
+                "status_codes": {},
+                "latency_histogram": {},
+            }
+        return entry
+
+    def record(self, method, url, elapsed, response=None, error=None, request_size=0):
+        elapsed_ms = elapsed * 1000.0
+        bytes_in = len(response.content or b"") if response is not None else 0
+
+        with self._lock:
+            entry = self._entry(method, url)
+            entry["count"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["bytes_in"] += bytes_in
+            entry["bytes_out"] += request_size or 0
+
+            bucket = _bucket_label(elapsed_ms)
+            entry["latency_histogram"][bucket] = entry["latency_histogram"].get(bucket, 0) + 1
+
+            if error is not None or response is None:
+                entry["errors"] += 1
+            else:
+                status = str(response.status_code)
+                entry["status_codes"][status] = entry["status_codes"].get(status, 0) + 1
+
+    def record_retry(self, method, url):
+        with self._lock:
+            self._entry(method, url)["retries"] += 1
+
+    def to_summary(self):
+        """Return the aggregated metrics, busiest endpoints first, in a form that fits in an action summary"""
+        with self._lock:
+            endpoints = sorted(self._endpoints.items(), key=lambda item: (-item[1]["count"], -item[1]["total_ms"]))
+            summary = {
+                "total_calls": sum(entry["count"] for _, entry in endpoints),
+                "total_ms": round(sum(entry["total_ms"] for _, entry in endpoints), 1),
+                "endpoints": {},
+            }
+            for key, entry in endpoints:
+                endpoint = dict(entry, status_codes=dict(entry["status_codes"]), latency_histogram=dict(entry["latency_histogram"]))
+                endpoint["total_ms"] = round(entry["total_ms"], 1)
+                endpoint["max_ms"] = round(entry["max_ms"], 1)
+                endpoint["avg_ms"] = round(entry["total_ms"] / entry["count"], 1) if entry["count"] else 0.0
+                summary["endpoints"][key] = endpoint
+            return summary
+
+    def to_counters(self):
+        """Return the totals over all the endpoints, small enough for the summary of every action"""
+        with self._lock:
+            entries = list(self._endpoints.values())
+            return {
+                "calls": sum(entry["count"] for entry in entries),
+                "retries": sum(entry["retries"] for entry in entries),
+                "errors": sum(entry["errors"] for entry in entries),
+                "total_ms": round(sum(entry["total_ms"] for entry in entries), 1),
+            }
+
+    def format_lines(self):
+        """One line per endpoint template, for the debug log"""
+        summary = self.to_summary()
+        lines = [f"REST calls: {summary['total_calls']}, total time: {summary['total_ms']}ms"]
+        for key, entry in summary["endpoints"].items():
+            lines.append(
+                f"{entry['count']:>6} x {key} avg {entry['avg_ms']}ms max {entry['max_ms']}ms "
+                f"in {entry['bytes_in']}B out {entry['bytes_out']}B retries {entry['retries']} "
+                f"errors {entry['errors']} status {entry['status_codes']}"
+            )
+        return lines
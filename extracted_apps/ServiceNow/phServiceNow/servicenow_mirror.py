@@ -0,0 +1,279 @@
+# File: servicenow_mirror.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import json
+import re
+import sqlite3
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl
+
+
+# Fields stored in their own indexed column, the usual lookup keys of sys_user, cmdb_ci and the task tables
+INDEXED_FIELDS = ("number", "name", "user_name", "email", "sys_updated_on")
+
+CONDITION_RE = re.compile(r"^([a-z0-9_]+)(ISNOTEMPTY|ISEMPTY|NOT IN|IN|NOTLIKE|LIKE|STARTSWITH|ENDSWITH|!=|>=|<=|=|>|<)(.*)$")
+DATE_GENERATE_RE = re.compile(r"^javascript:gs\.dateGenerate\('([^']*)','([^']*)'\)$")
+COMPARISON_OPERATORS = {"=": "=", "!=": "!=", ">": ">", ">=": ">=", "<": "<", "<=": "<="}
+
+SYNC_TIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+# The records of a full sync are stored under this suffix until they replace the mirrored ones, table names have no '#'
+STAGING_SUFFIX = "#staging"
+
+
+class MirrorQueryError(Exception):
+    """Raised for queries the mirror cannot answer, the action should query ServiceNow instead"""
+
+
+def _column(field):
+    if field == "sys_id" or field in INDEXED_FIELDS:
+        return field, []
+    return "json_extract(data, ?)", [f'$."{field}"']
+
+
+def _like_value(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _condition_sql(term):
+    """Translate one condition of an encoded query to SQL"""
+    match = CONDITION_RE.match(term)
+    if not match:
+        raise MirrorQueryError(f"Unsupported condition: {term}")
+
+    field, operator, value = match.groups()
+    if value.startswith("javascript:"):
+        date_match = DATE_GENERATE_RE.match(value)
+        if not date_match:
+            raise MirrorQueryError(f"Unsupported value: {value}")
+        value = f"{date_match.group(1)} {date_match.group(2)}"
+
+    column, params = _column(field)
+    if operator in COMPARISON_OPERATORS:
+        # Integer fields are strings in the API responses, compare them as numbers like ServiceNow does
+        if operator not in ("=", "!=") and value.lstrip("-").isdigit():
+            return f"CAST({column} AS INTEGER) {operator} ?", [*params, int(value)]
+        if operator == "!=":
+            return f"({column} IS NULL OR {column} != ?)", [*params, *params, value]
+        return f"{column} {operator} ?", [*params, value]
+
+    if operator in ("IN", "NOT IN"):
+        values = value.split(",")
+        placeholders = ", ".join("?" for _ in values)
+        return f"{column} {operator} ({placeholders})", [*params, *values]
+
+    if operator in ("LIKE", "NOTLIKE", "STARTSWITH", "ENDSWITH"):
+        pattern = {
+            "LIKE": "%{}%",
+            "NOTLIKE": "%{}%",
+            "STARTSWITH": "{}%",
+            "ENDSWITH": "%{}",
+        }[operator].format(_like_value(value))
+        negate = "NOT " if operator == "NOTLIKE" else ""
+        return f"{column} {negate}LIKE ? ESCAPE '\\'", [*params, pattern]
+
+    if operator == "ISEMPTY":
+        return f"({column} IS NULL OR {column} = '')", [*params, *params]
+
+    return f"({column} IS NOT NULL AND {column} != '')", [*params, *params]
+
+
+def parse_table_query(query):
+    """Split the URL parameters given to run query into the encoded query, the filters on single fields, the fields and the limit"""
+    encoded_query = ""
+    field_filters = []
+    fields = None
+    limit = None
+    for key, value in parse_qsl(query.lstrip("?"), keep_blank_values=True):
+        if key == "sysparm_query":
+            encoded_query = value
+        elif key == "sysparm_fields":
+            fields = [field.strip() for field in value.split(",") if field.strip()]
+        elif key == "sysparm_limit":
+            limit = int(value)
+        elif key.startswith("sysparm_"):
+            continue
+        else:
+            # The Table API treats any other parameter as an equality filter on that field
+            field_filters.append(f"{key}={value}")
+    return encoded_query, field_filters, fields, limit
+
+
+def encoded_query_sql(encoded_query, field_filters=()):
+    """Translate an encoded query to a WHERE and an ORDER BY clause with their parameters.
+    Supports ^, ^OR, ORDERBY/ORDERBYDESC and the common operators, anything else raises MirrorQueryError.
+    """
+    groups = []
+    orderings = []
+    terms = [term for term in encoded_query.split("^") if term] + list(field_filters)
+    for term in terms:
+        if term.startswith("ORDERBYDESC"):
+            orderings.append((term[len("ORDERBYDESC") :], "DESC"))
+        elif term.startswith("ORDERBY"):
+            orderings.append((term[len("ORDERBY") :], "ASC"))
+        elif term.startswith("NQ"):
+            raise MirrorQueryError("New query (^NQ) conditions are not supported")
+        elif term.startswith("OR") and groups:
+            groups[-1].append(_condition_sql(term[2:]))
+        else:
+            groups.append([_condition_sql(term)])
+
+    where_parts = []
+    where_params = []
+    for group in groups:
+        where_parts.append("(" + " OR ".join(sql for sql, _ in group) + ")")
+        for _, params in group:
+            where_params.extend(params)
+
+    order_parts = []
+    order_params = []
+    for field, direction in orderings:
+        column, params = _column(field)
+        order_parts.append(f"{column} {direction}")
+        order_params.extend(params)
+
+    return " AND ".join(where_parts), where_params, ", ".join(order_parts), order_params
+
+
+class TableMirror:
+    """On-disk copy of ServiceNow tables, kept in sync by sys_updated_on.
+    Every record is stored as JSON, with the common lookup keys copied to indexed columns.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.row_factory = sqlite3.Row
+        # Readers in other action processes are not blocked while a sync writes
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        columns = "".join(f", {field} TEXT" for field in INDEXED_FIELDS)
+        with self._connection:
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS records (table_name TEXT NOT NULL, sys_id TEXT NOT NULL{columns}, data TEXT NOT NULL, "
+                "PRIMARY KEY (table_name, sys_id))"
+            )
+            for field in INDEXED_FIELDS:
+                self._connection.execute(f"CREATE INDEX IF NOT EXISTS records_{field} ON records (table_name, {field})")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state (table_name TEXT PRIMARY KEY, last_updated_on TEXT, synced_at TEXT, record_count INTEGER, "
+                "reconciled_at TEXT)"
+            )
+            # Mirrors created before the deleted records were reconciled on an interval
+            columns = [row["name"] for row in self._connection.execute("PRAGMA table_info(sync_state)")]
+            if "reconciled_at" not in columns:
+                self._connection.execute("ALTER TABLE sync_state ADD COLUMN reconciled_at TEXT")
+
+    def upsert(self, table, records):
+        rows = []
+        for record in records:
+            rows.append((table, record["sys_id"], *(_text(record.get(field)) for field in INDEXED_FIELDS), json.dumps(record)))
+        if not rows:
+            return
+
+        placeholders = ", ".join("?" for _ in range(len(INDEXED_FIELDS) + 3))
+        with self._connection:
+            self._connection.executemany(f"INSERT OR REPLACE INTO records VALUES ({placeholders})", rows)
+
+    def clear(self, table):
+        with self._connection:
+            self._connection.execute("DELETE FROM records WHERE table_name = ?", (table,))
+            self._connection.execute("DELETE FROM sync_state WHERE table_name = ?", (table,))
+
+    def replace(self, table, staging_table):
+        """Replace the records of a table by the ones stored under staging_table, in one transaction.
+        Returns the number of records that were mirrored but are not in the staging table.
+        """
+        with self._connection:
+            deleted = self._connection.execute(
+                "SELECT COUNT(*) FROM records WHERE table_name = ? AND sys_id NOT IN (SELECT sys_id FROM records WHERE table_name = ?)",
+                (table, staging_table),
+            ).fetchone()[0]
+            self._connection.execute("DELETE FROM records WHERE table_name = ?", (table,))
+            self._connection.execute("UPDATE records SET table_name = ? WHERE table_name = ?", (table, staging_table))
+        return deleted
+
+    def delete_missing(self, table, sys_ids):
+        """Delete the records of a table whose sys_id is not in sys_ids, the ones deleted in ServiceNow.
+        Returns the number of records deleted.
+        """
+        with self._connection:
+            self._connection.execute("CREATE TEMP TABLE IF NOT EXISTS existing_sys_ids (sys_id TEXT PRIMARY KEY)")
+            self._connection.execute("DELETE FROM existing_sys_ids")
+            self._connection.executemany("INSERT OR IGNORE INTO existing_sys_ids VALUES (?)", ((sys_id,) for sys_id in sys_ids))
+            deleted = self._connection.execute(
+                "DELETE FROM records WHERE table_name = ? AND sys_id NOT IN (SELECT sys_id FROM existing_sys_ids)", (table,)
+            ).rowcount
+            self._connection.execute("DELETE FROM existing_sys_ids")
+        return deleted
+
+    def get_sync_state(self, table):
+        row = self._connection.execute("SELECT * FROM sync_state WHERE table_name = ?", (table,)).fetchone()
+        return dict(row) if row else None
+
+    def set_sync_state(self, table, last_updated_on, reconciled=False):
+        """Save the state of a sync, reconciled tells that the mirror no longer has records deleted in ServiceNow"""
+        record_count = self._connection.execute("SELECT COUNT(*) FROM records WHERE table_name = ?", (table,)).fetchone()[0]
+        synced_at = datetime.now(timezone.utc).strftime(SYNC_TIME_FORMAT)
+        reconciled_at = synced_at if reconciled else (self.get_sync_state(table) or {}).get("reconciled_at")
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sync_state (table_name, last_updated_on, synced_at, record_count, reconciled_at) VALUES (?, ?, ?, ?, ?)",
+                (table, last_updated_on, synced_at, record_count, reconciled_at),
+            )
+        return self.get_sync_state(table)
+
+    def query(self, table, query, limit=None):
+        """Answer the URL parameters of run query from the mirror, returns the records"""
+        encoded_query, field_filters, fields, query_limit = parse_table_query(query)
+        where, where_params, order_by, order_params = encoded_query_sql(encoded_query, field_filters)
+
+        sql = "SELECT data FROM records WHERE table_name = ?"
+        params = [table]
+        if where:
+            sql += f" AND {where}"
+            params.extend(where_params)
+        if order_by:
+            sql += f" ORDER BY {order_by}"
+            params.extend(order_params)
+
+        limits = [value for value in (limit, query_limit) if value]
+        if limits:
+            sql += " LIMIT ?"
+            params.append(min(limits))
+
+        try:
+            rows = self._connection.execute(sql, params).fetchall()
+        except sqlite3.Error as e:
+            raise MirrorQueryError(str(e))
+
+        records = [json.loads(row["data"]) for row in rows]
+        if fields:
+            records = [{field: record.get(field, "") for field in fields} for record in records]
+        return records
+
+    def close(self):
+        self._connection.close()
+
+
+def _text(value):
+    if isinstance(value, dict):
+        value = value.get("value")
+    return None if value is None else str(value)
+
+
+def sync_age_seconds(sync_state, key="synced_at"):
+    synced_at = datetime.strptime(sync_state[key], SYNC_TIME_FORMAT).replace(tzinfo=timezone.utc)
+    return int((datetime.now(timezone.utc) - synced_at).total_seconds())
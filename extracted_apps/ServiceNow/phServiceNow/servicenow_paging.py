@@ -0,0 +1,50 @@
+# File: servicenow_paging.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+
+
+class PageSizeController:
+    """Page size of a paged query, adjusted after every page from its latency and size.
+    The next page aims at target_seconds and at most max_bytes, growing at most twofold per page so one fast
+    page does not jump straight to a size the instance cannot serve. A failed page halves the size.
+    """
+
+    def __init__(self, page_size, min_size, max_size, target_seconds, max_bytes):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.max_bytes = max_bytes
+        self.page_size = self._clamp(page_size)
+
+    def _clamp(self, page_size):
+        return max(self.min_size, min(self.max_size, int(page_size)))
+
+    def observe(self, records, elapsed, size):
+        """Adjust the page size after a page of records that took elapsed seconds and size bytes"""
+        if not records:
+            return
+
+        page_size = self.page_size * 2
+        if elapsed > 0:
+            page_size = min(page_size, self.target_seconds * records / elapsed)
+        if size > 0:
+            page_size = min(page_size, self.max_bytes * records / size)
+        self.page_size = self._clamp(page_size)
+
+    def shrink(self):
+        """Halve the page size after a failed page, returns False when it is already the smallest"""
+        if self.page_size <= self.min_size:
+            return False
+        self.page_size = self._clamp(self.page_size // 2)
+        return True
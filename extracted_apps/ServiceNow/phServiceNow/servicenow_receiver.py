@@ -0,0 +1,200 @@
+# File: servicenow_receiver.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Receiver of the events pushed by a ServiceNow Business Rule, appended to the spool drained by On Poll.
+
+An event tells which record changed, the record itself is fetched by On Poll:
+{"table": "incident", "sys_id": "<sys_id>", "sys_mod_count": "3", "sys_updated_on": "2025-01-01 10:00:00"}
+A request carries one event or a list of events, with the token in an "Authorization: Bearer <token>" header.
+
+Run it next to SOAR, as the user running the app, with
+`SERVICENOW_RECEIVER_TOKEN=<token> python servicenow_receiver.py --spool-dir <push_spool_directory> --port 8443 --certfile <cert>`
+Without a certificate it serves plain HTTP on a loopback address only, e.g. behind a reverse proxy terminating TLS.
+"""
+
+import argparse
+import hmac
+import ipaddress
+import json
+import logging
+import os
+import re
+import socket
+import ssl
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from servicenow_spool import EventSpool
+
+
+EVENTS_PATH = "/events"
+HEALTH_PATH = "/health"
+TOKEN_ENV_VAR = "SERVICENOW_RECEIVER_TOKEN"
+MAX_BODY_BYTES = 1024 * 1024
+EVENT_FIELDS = ("table", "sys_id", "sys_mod_count", "sys_updated_on", "operation")
+SYS_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+TABLE_RE = re.compile(r"^[a-z0-9_]+$")
+# A client that stalls the TLS handshake only holds its own thread, for at most this long
+HANDSHAKE_TIMEOUT = 10
+
+logger = logging.getLogger("servicenow_receiver")
+
+
+def is_loopback(host):
+    """Whether the listening address only accepts connections from the host itself"""
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+
+def parse_event(payload):
+    """Keep the fields of an event that On Poll uses, returns None when the payload is not an event"""
+    if not isinstance(payload, dict):
+        return None
+
+    # A Business Rule may send the class name of the record instead of the table
+    table = str(payload.get("table") or payload.get("sys_class_name") or "").lower()
+    sys_id = str(payload.get("sys_id") or "")
+    if not TABLE_RE.match(table) or not SYS_ID_RE.match(sys_id):
+        return None
+
+    event = {key: str(payload[key]) for key in EVENT_FIELDS if payload.get(key) not in (None, "")}
+    event["table"] = table
+    return event
+
+
+class EventReceiverHandler(BaseHTTPRequestHandler):
+    server_version = "ServiceNowEventReceiver"
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        header = self.headers.get("Authorization", "")
+        scheme, _, token = header.partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(token.strip().encode("utf-8"), self.server.token.encode("utf-8"))
+
+    def do_GET(self):
+        if self.path.rstrip("/") != HEALTH_PATH:
+            return self._send(404, {"message": "Not found"})
+        return self._send(200, {"status": "ok"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != EVENTS_PATH:
+            return self._send(404, {"message": "Not found"})
+        if not self._authorized():
+            return self._send(401, {"message": "Invalid or missing token"})
+
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            return self._send(400, {"message": "Invalid Content-Length"})
+        if length > MAX_BODY_BYTES:
+            return self._send(413, {"message": f"Request body larger than {MAX_BODY_BYTES} bytes"})
+
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            return self._send(400, {"message": "The request body is not valid JSON"})
+
+        payloads = payload if isinstance(payload, list) else [payload]
+        events = [parse_event(item) for item in payloads]
+        if not events or None in events:
+            return self._send(400, {"message": "Every event needs a table and the 32 character sys_id of the record"})
+
+        try:
+            self.server.spool.append(events)
+        except OSError as e:
+            logger.error("Unable to write to the spool: %s", e)
+            # ServiceNow retries the outbound requests that fail
+            return self._send(503, {"message": "Unable to write to the spool"})
+        return self._send(202, {"accepted": len(events)})
+
+
+class EventReceiver(ThreadingHTTPServer):
+    """HTTP server appending the events pushed by ServiceNow to the spool"""
+
+    daemon_threads = True
+
+    def __init__(self, address, spool_directory, token, certfile=None, keyfile=None):
+        # The bearer token would cross the network in clear text
+        if not certfile and not is_loopback(address[0]):
+            raise ValueError(f"Plain HTTP is only served on a loopback address, give a certificate to listen on {address[0]}")
+
+        super().__init__(address, EventReceiverHandler)
+        self.spool = EventSpool(spool_directory)
+        self.token = token
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            # The handshake is done by the thread of each request, see finish_request
+            self.socket = context.wrap_socket(self.socket, server_side=True, do_handshake_on_connect=False)
+
+    def finish_request(self, request, client_address):
+        """Runs in the thread of the request, so a slow handshake does not hold up the accepting thread"""
+        if isinstance(request, ssl.SSLSocket):
+            request.settimeout(HANDSHAKE_TIMEOUT)
+            try:
+                request.do_handshake()
+            except (OSError, ValueError) as e:
+                logger.warning("TLS handshake with %s failed: %s", client_address[0], e)
+                return
+            request.settimeout(None)
+        super().finish_request(request, client_address)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        scheme = "https" if isinstance(self.socket, ssl.SSLSocket) else "http"
+        return f"{scheme}://{host}:{port}"
+
+
+def main():
+    argparser = argparse.ArgumentParser(description="Receiver of the events pushed by ServiceNow for On Poll")
+    argparser.add_argument("--host", help="Address to listen on, all addresses with --certfile and 127.0.0.1 without it")
+    argparser.add_argument("--port", type=int, default=8443)
+    argparser.add_argument("--spool-dir", required=True, help="The push_spool_directory of the asset")
+    argparser.add_argument("--certfile", help="Certificate of the HTTPS listener, plain HTTP on a loopback address without it")
+    argparser.add_argument("--keyfile", help="Private key of the certificate, when not in the certificate file")
+    args = argparser.parse_args()
+
+    token = os.environ.get(TOKEN_ENV_VAR)
+    if not token:
+        argparser.error(f"Set the token expected from ServiceNow in the {TOKEN_ENV_VAR} environment variable")
+
+    host = args.host or ("0.0.0.0" if args.certfile else "127.0.0.1")  # nosemgrep
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    try:
+        receiver = EventReceiver((host, args.port), args.spool_dir, token, args.certfile, args.keyfile)
+    except ValueError as e:
+        argparser.error(str(e))
+    logger.info("Receiving ServiceNow events on %s%s, spooled to %s", receiver.url, EVENTS_PATH, args.spool_dir)
+    try:
+        receiver.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.server_close()
+
+
+if __name__ == "__main__":
+    main()
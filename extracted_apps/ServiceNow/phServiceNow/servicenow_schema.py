@@ -0,0 +1,76 @@
+# File: servicenow_schema.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import difflib
+
+
+# sys_dictionary choice values of the fields restricted to their choice list, 2 (suggestion) accepts any value
+RESTRICTED_CHOICE_TYPES = ("1", "3")
+# Valid values listed in the message of an invalid choice
+MAX_LISTED_CHOICES = 20
+
+
+def build_schema(tables, dictionary, choices):
+    """Fields of a table from its sys_dictionary and sys_choice records.
+    :param tables: the table followed by the tables it extends, a child table overrides the fields and choices of its parents
+    :return: dict with the tables and, for each field, its type and the values of a restricted choice list
+    """
+    rank = {table: index for index, table in enumerate(tables)}
+
+    fields = {}
+    for row in sorted(dictionary, key=lambda row: rank.get(row.get("name"), len(tables))):
+        element = row.get("element")
+        if not element or element in fields:
+            continue
+        fields[element] = {"type": row.get("internal_type"), "restricted": row.get("choice") in RESTRICTED_CHOICE_TYPES, "choices": None}
+
+    choice_ranks = {}
+    for row in choices:
+        field = fields.get(row.get("element"))
+        if not field or not field["restricted"]:
+            continue
+
+        table_rank = rank.get(row.get("name"), len(tables))
+        current_rank = choice_ranks.get(row["element"])
+        if current_rank is None or table_rank < current_rank:
+            choice_ranks[row["element"]] = table_rank
+            field["choices"] = {}
+        if table_rank == choice_ranks[row["element"]]:
+            field["choices"][row.get("value")] = row.get("label")
+
+    return {"tables": tables, "fields": fields}
+
+
+def validate_fields(schema, fields):
+    """Check the names and the choice values of the fields of a write, returns the list of problems found"""
+    errors = []
+    known_fields = schema["fields"]
+    for name, value in fields.items():
+        field = known_fields.get(name)
+        if field is None:
+            suggestions = difflib.get_close_matches(name, known_fields, n=1)
+            errors.append(f"unknown field '{name}'" + (f", did you mean '{suggestions[0]}'?" if suggestions else ""))
+            continue
+
+        choices = field.get("choices")
+        if not choices or value in ("", None):
+            continue
+        if str(value) in choices:
+            continue
+
+        valid = ", ".join(f"{choice} ({label})" for choice, label in list(choices.items())[:MAX_LISTED_CHOICES])
+        if len(choices) > MAX_LISTED_CHOICES:
+            valid += ", ..."
+        errors.append(f"invalid value '{value}' for field '{name}', valid values: {valid}")
+    return errors
@@ -0,0 +1,142 @@
+# File: servicenow_spool.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+
+
+ACTIVE_FILE = "events.jsonl"
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".jsonl"
+POSITION_FILE = "position.json"
+VERSIONS_FILE = "versions.json"
+LOCK_FILE = ".lock"
+
+
+class EventSpool:
+    """On-disk spool of the events pushed by ServiceNow, written by the receiver and drained by On Poll.
+    The receiver appends one JSON line per event to the active file. A drain moves the active file aside as a
+    segment, so the receiver never writes to a file being read, and reads the segments oldest first. The position
+    after the last event ingested is saved by ack: the events of an interrupted drain are read again.
+    The versions of the records ingested are kept next to the events, out of the state of the asset that every
+    action of the asset loads and saves.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @contextmanager
+    def _locked(self):
+        with open(self._path(LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _segments(self):
+        return sorted(name for name in os.listdir(self.directory) if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+
+    def _load_position(self):
+        try:
+            with open(self._path(POSITION_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def append(self, events):
+        """Append the events to the active file, they are on disk when it returns"""
+        data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in events).encode("utf-8")
+        with self._locked(), open(self._path(ACTIVE_FILE), "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def read(self, max_events):
+        """Read up to max_events events after the saved position
+        :return: the events, the position to pass to ack once they are ingested, and the number of unreadable lines skipped
+        """
+        with self._locked():
+            segments = self._segments()
+            active = self._path(ACTIVE_FILE)
+            if not segments and os.path.exists(active) and os.path.getsize(active):
+                segment = f"{SEGMENT_PREFIX}{time.time_ns():020d}{SEGMENT_SUFFIX}"
+                os.rename(active, self._path(segment))
+                segments = [segment]
+
+        saved = self._load_position()
+        events = []
+        position = None
+        malformed = 0
+        for segment in segments:
+            offset = saved.get("offset", 0) if saved.get("segment") == segment else 0
+            with open(self._path(segment), "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    offset += len(line)
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        malformed += 1
+                        continue
+                    if isinstance(event, dict):
+                        events.append(event)
+                    else:
+                        malformed += 1
+                    if len(events) >= max_events:
+                        return events, {"segment": segment, "offset": offset}, malformed
+            position = {"segment": segment, "offset": offset}
+        return events, position, malformed
+
+    def ack(self, position):
+        """Save the position reached, the segments read to the end are deleted"""
+        if not position:
+            return
+
+        with self._locked():
+            for segment in self._segments():
+                path = self._path(segment)
+                if segment < position["segment"] or (segment == position["segment"] and position["offset"] >= os.path.getsize(path)):
+                    os.remove(path)
+                    continue
+                break
+
+            if os.path.exists(self._path(position["segment"])):
+                with open(self._path(POSITION_FILE), "w") as f:
+                    json.dump(position, f)
+            elif os.path.exists(self._path(POSITION_FILE)):
+                os.remove(self._path(POSITION_FILE))
+
+    def load_versions(self):
+        """Version ingested of every record, by sys_id, an empty dict when none were saved"""
+        try:
+            with open(self._path(VERSIONS_FILE)) as f:
+                versions = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return versions if isinstance(versions, dict) else {}
+
+    def save_versions(self, versions):
+        """Replace the versions saved, a crash while writing them keeps the previous ones"""
+        path = self._path(VERSIONS_FILE)
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(versions, f, separators=(",", ":"))
+        os.replace(f"{path}.tmp", path)
@@ -0,0 +1,215 @@
+# File: servicenow_transport.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+SUPPORTED_METHODS = ("get", "post", "put", "patch", "delete")
+
+
+def _body_size(json_body, data):
+    if data is not None:
+        if isinstance(data, (bytes, str)):
+            return len(data)
+        return len(urlencode(data))
+    if json_body is not None:
+        return len(json.dumps(json_body))
+    return 0
+
+
+def _is_healthy(response):
+    """Whether a request tells that the instance is up: a response other than a server error"""
+    return response is not None and response.status_code < 500
+
+
+class TransportResponse:
+    """Minimal stand-in for requests.Response, exposing only what the connector reads"""
+
+    def __init__(self, status_code, headers, content, encoding=None):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.encoding = encoding or "utf-8"
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding, errors="replace")
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class RequestsTransport:
+    """Blocking transport built on requests; several calls are spread over a small thread pool"""
+
+    name = "sync"
+
+    def __init__(self, max_concurrency=1, timeout=None):
+        self._max_concurrency = max(1, max_concurrency)
+        # (connect, read) seconds, a request that times out counts as a failure for the breaker
+        self._timeout = timeout
+        # Called with (method, url, elapsed, response, error, request_size) after every request
+        self.observer = None
+        # Optional CircuitBreaker asked before and told after every request
+        self.breaker = None
+
+    def request(self, method, url, auth=None, json=None, data=None, headers=None, params=None):
+        if self.breaker:
+            self.breaker.before_request()
+        start = time.perf_counter()
+        response = error = None
+        try:
+            response = requests.request(method, url, auth=auth, json=json, data=data, headers=headers, params=params, timeout=self._timeout)
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            if self.breaker:
+                self.breaker.record(_is_healthy(response))
+            if self.observer:
+                body = response.request.body if response is not None else None
+                self.observer(method, url, time.perf_counter() - start, response, error, len(body) if body else 0)
+
+    def _request_or_error(self, call):
+        try:
+            return self.request(**call)
+        except Exception as e:
+            return e
+
+    def request_many(self, calls):
+        """Send every call and return the responses (or the raised exceptions) in the order of the calls"""
+        if self._max_concurrency == 1 or len(calls) < 2:
+            return [self._request_or_error(call) for call in calls]
+
+        with ThreadPoolExecutor(max_workers=min(self._max_concurrency, len(calls))) as executor:
+            return list(executor.map(self._request_or_error, calls))
+
+    def close(self):
+        pass
+
+
+class AiohttpTransport:
+    """Transport that runs every request on one asyncio event loop, with a bounded number in flight"""
+
+    name = "async"
+
+    def __init__(self, max_concurrency=1, timeout=None):
+        import asyncio
+
+        import aiohttp
+
+        self._aiohttp = aiohttp
+        self._asyncio = asyncio
+        self._loop = asyncio.new_event_loop()
+        self._max_concurrency = max(1, max_concurrency)
+        # (connect, read) seconds like requests, the read timeout applies between two reads of the response
+        self._timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout[0], sock_read=timeout[1]) if timeout else None
+        # The session and semaphore bind to the running loop, so they are created on first use
+        self._semaphore = None
+        self._session = None
+        # Called with (method, url, elapsed, response, error, request_size) after every request
+        self.observer = None
+        # Optional CircuitBreaker asked before and told after every request
+        self.breaker = None
+
+    def _build_auth(self, auth):
+        if auth is None:
+            return None
+        return self._aiohttp.BasicAuth(auth.username, auth.password)
+
+    @staticmethod
+    def _build_params(params):
+        # aiohttp only accepts str, int and float values, requests silently renders booleans and drops None
+        if not params:
+            return None
+        return {key: str(value) for key, value in params.items() if value is not None}
+
+    async def _send(self, method, url, auth=None, json=None, data=None, headers=None, params=None):
+        if self._session is None:
+            self._semaphore = self._asyncio.Semaphore(self._max_concurrency)
+            self._session = self._aiohttp.ClientSession(timeout=self._timeout) if self._timeout else self._aiohttp.ClientSession()
+
+        async with self._semaphore:
+            # The breaker only locks and reads its state file while the circuit is not closed or after failures,
+            # that is done in a worker thread so the loop keeps serving the other requests
+            if self.breaker and not self.breaker.is_closed():
+                await self._loop.run_in_executor(None, self.breaker.before_request)
+            # Time spent waiting on the semaphore is not part of the request latency
+            start = time.perf_counter()
+            response = error = None
+            try:
+                async with self._session.request(
+                    method.upper(), url, auth=self._build_auth(auth), json=json, data=data, headers=headers, params=self._build_params(params)
+                ) as resp:
+                    content = await resp.read()
+                    try:
+                        encoding = resp.get_encoding()
+                    except Exception:
+                        encoding = None
+                    response = TransportResponse(resp.status, resp.headers, content, encoding)
+                    return response
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                healthy = _is_healthy(response)
+                if self.breaker and not (healthy and self.breaker.is_healthy()):
+                    await self._loop.run_in_executor(None, self.breaker.record, healthy)
+                if self.observer:
+                    self.observer(method, url, time.perf_counter() - start, response, error, _body_size(json, data))
+
+    async def _send_or_error(self, call):
+        try:
+            return await self._send(**call)
+        except Exception as e:
+            return e
+
+    async def _gather(self, calls):
+        return await self._asyncio.gather(*(self._send_or_error(call) for call in calls))
+
+    def request(self, method, url, auth=None, json=None, data=None, headers=None, params=None):
+        return self._loop.run_until_complete(self._send(method, url, auth=auth, json=json, data=data, headers=headers, params=params))
+
+    def request_many(self, calls):
+        """Send every call and return the responses (or the raised exceptions) in the order of the calls"""
+        if not calls:
+            return []
+        return self._loop.run_until_complete(self._gather(calls))
+
+    def close(self):
+        if self._session is not None:
+            self._loop.run_until_complete(self._session.close())
+            self._session = None
+        self._loop.close()
+
+
+def create_transport(name, max_concurrency=1, timeout=None):
+    """Return the transport configured on the asset, along with an error message if it had to fall back to requests.
+    aiohttp is not one of the dependencies shipped with the app, the async transport needs it installed on the instance.
+    :param timeout: (connect, read) timeout of the requests in seconds, None to wait forever
+    """
+    if name == AiohttpTransport.name:
+        try:
+            return AiohttpTransport(max_concurrency, timeout), None
+        except ImportError as e:
+            return RequestsTransport(max_concurrency, timeout), f"Unable to use the async transport, falling back to requests. Details: {e!s}"
+
+    return RequestsTransport(max_concurrency, timeout), None
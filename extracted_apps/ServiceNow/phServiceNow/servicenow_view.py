@@ -12,7 +12,41 @@
 # the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
 # either express or implied. See the License for the specific language governing permissions
 # and limitations under the License.
-def _get_ctx_result(result, provides):
+import os
+from itertools import islice
+
+from servicenow_consts import SERVICENOW_VIEW_MAX_ROWS, SERVICENOW_VIEW_MAX_ROWS_ENV_VAR, SERVICENOW_VIEW_MAX_ROWS_PER_ACTION
+
+
+# Lists nested in the data of an action that the widgets render as tables of their own
+NESTED_ROWS = {
+    "describe service catalog": ("categories", "items"),
+    "describe catalog item": ("variables",),
+}
+
+
+def _get_max_rows(provides):
+    try:
+        return max(int(os.environ[SERVICENOW_VIEW_MAX_ROWS_ENV_VAR]), 1)
+    except (KeyError, ValueError):
+        return SERVICENOW_VIEW_MAX_ROWS_PER_ACTION.get(provides, SERVICENOW_VIEW_MAX_ROWS)
+
+
+def _cap_rows(rows, max_rows, counts, key):
+    """First max_rows entries of a list or dict, adding the number shown and the total to counts[key]"""
+    if isinstance(rows, dict):
+        shown = dict(islice(rows.items(), max_rows))
+    else:
+        shown = rows[:max_rows]
+
+    count = counts.setdefault(key, {"shown": 0, "total": 0})
+    count["shown"] += len(shown)
+    count["total"] += len(rows)
+    count["truncated"] = count["total"] > count["shown"]
+    return shown
+
+
+def _get_ctx_result(result, provides, max_rows):
     ctx_result = {}
 
     param = result.get_param()
@@ -28,19 +62,51 @@ def _get_ctx_result(result, provides):
         ctx_result["data"] = {}
         return ctx_result
 
+    # Only the rows the widget shows are put in the context, the totals go in row_counts for the "showing N of M" line
+    counts = ctx_result["row_counts"] = {}
+    data = _cap_rows(data, max_rows, counts, "data")
+    if provides == "get variables":
+        data = [_cap_rows(item, max_rows, counts, "variables") if isinstance(item, dict) else item for item in data]
+
+    nested_fields = NESTED_ROWS.get(provides, ())
+    if nested_fields:
+        capped = []
+        for item in data:
+            if isinstance(item, dict):
+                item = dict(item)
+                for field in nested_fields:
+                    if isinstance(item.get(field), list):
+                        item[field] = _cap_rows(item[field], max_rows, counts, field)
+            capped.append(item)
+        data = capped
+
     ctx_result["data"] = data
 
     return ctx_result
 
 
+class _LazyResults:
+    """Results of the app runs, each built when the template reaches it so only one is held at a time"""
+
+    def __init__(self, provides, all_app_runs):
+        self._provides = provides
+        self._all_app_runs = all_app_runs
+        self._max_rows = _get_max_rows(provides)
+
+    def __iter__(self):
+        for _, action_results in self._all_app_runs:
+            for result in action_results:
+                ctx_result = _get_ctx_result(result, self._provides, self._max_rows)
+                if not ctx_result:
+                    continue
+                yield ctx_result
+
+    def __len__(self):
+        return sum(len(action_results) for _, action_results in self._all_app_runs)
+
+
 def display_view(provides, all_app_runs, context):
-    context["results"] = results = []
-    for summary, action_results in all_app_runs:
-        for result in action_results:
-            ctx_result = _get_ctx_result(result, provides)
-            if not ctx_result:
-                continue
-            results.append(ctx_result)
+    context["results"] = _LazyResults(provides, all_app_runs)
 
     if provides == "get variables":
         return "servicenow_get_variables.html"
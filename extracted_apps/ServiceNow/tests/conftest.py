@@ -0,0 +1,136 @@
+# File: conftest.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Fixtures running the app against the mock server of the benchmarks, with each transport.
+
+The connector tests need the `phantom` package and are skipped where the SOAR runtime is not importable,
+run them with `phenv python -m pytest` on a SOAR instance.
+"""
+
+import json
+import os
+import sys
+import types
+
+import pytest
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+APP_DIR = os.path.join(ROOT_DIR, "phServiceNow")
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, "benchmarks"))
+
+from mock_servicenow import MockServiceNow
+
+from servicenow_transport import create_transport
+
+
+TRANSPORTS = ["sync", "async"]
+
+
+@pytest.fixture
+def mock():
+    with MockServiceNow(records=30, journal_entries=3, attachments=1, variables=2) as server:
+        yield server
+
+
+@pytest.fixture(params=TRANSPORTS)
+def transport_name(request):
+    transport, error = create_transport(request.param, 4)
+    transport.close()
+    if error:
+        pytest.skip(error)
+    return request.param
+
+
+@pytest.fixture
+def transport(transport_name):
+    transport, _ = create_transport(transport_name, 4)
+    yield transport
+    transport.close()
+
+
+@pytest.fixture
+def run_action(mock, transport_name, tmp_path):
+    """Run an action through _handle_action, the SOAR side (REST, containers, vault, state) talks to the mock"""
+    pytest.importorskip("phantom")
+    import requests
+    from phantom.base_connector import BaseConnector
+
+    import servicenow_connector
+
+    vault_file = tmp_path / "attachment.bin"
+    vault_file.write_bytes(b"attachment content")
+
+    def vault_info(vault_id=None, **kwargs):
+        return True, "", [{"name": f"{vault_id}.bin", "path": str(vault_file)}]
+
+    def save_container(self, container, fail_on_duplicate=False):
+        r = requests.post(f"{mock.url}/rest/container", json=container, timeout=30)
+        return True, "", r.json()["id"]
+
+    def save_artifacts(self, artifacts):
+        r = requests.post(f"{mock.url}/rest/artifact", json=artifacts, timeout=30)
+        return True, "", r.json()
+
+    patches = {
+        "_get_phantom_base_url": staticmethod(lambda: f"{mock.url}/"),
+        "get_phantom_base_url": lambda self: f"{mock.url}/",
+    }
+    originals = {name: BaseConnector.__dict__.get(name) for name in patches}
+    for name, value in patches.items():
+        setattr(BaseConnector, name, value)
+    original_phrules = servicenow_connector.phrules
+    servicenow_connector.phrules = types.SimpleNamespace(vault_info=vault_info)
+
+    def run(action, parameters, config=None, state=None):
+        asset_config = {
+            "url": mock.url,
+            "username": "admin",
+            "password": "admin",  # pragma: allowlist secret
+            "transport": transport_name,
+        }
+        asset_config.update(config or {})
+        saved_states = []
+
+        connector = servicenow_connector.ServicenowConnector()
+        connector.get_state_dir = lambda: str(tmp_path)
+        connector.load_state = lambda: json.loads(json.dumps(state or {}))
+        connector.save_state = saved_states.append
+        connector.save_container = types.MethodType(save_container, connector)
+        connector.save_artifacts = types.MethodType(save_artifacts, connector)
+
+        in_json = {
+            "action": action,
+            "identifier": action.replace(" ", "_"),
+            "asset_id": "1",
+            "container_id": 1,
+            "config": asset_config,
+            "parameters": [parameters],
+            "debug_level": 0,
+            "environment_variables": {},
+        }
+        mock.state.reset_stats()
+        result = json.loads(connector._handle_action(json.dumps(in_json), None))
+        action_results = result if isinstance(result, list) else [result]
+        return action_results[-1], saved_states[-1] if saved_states else None
+
+    yield run
+
+    servicenow_connector.phrules = original_phrules
+    for name, value in originals.items():
+        if value is None:
+            delattr(BaseConnector, name)
+        else:
+            setattr(BaseConnector, name, value)
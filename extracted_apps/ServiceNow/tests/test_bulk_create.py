@@ -0,0 +1,32 @@
+# File: test_bulk_create.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import json
+
+
+def test_import_rows_map_to_the_created_records(mock, run_action, tmp_path):
+    rows = [{"short_description": "First"}, {"description": "No short description"}, {"short_description": "Third"}]
+    (tmp_path / "attachment.bin").write_text(json.dumps(rows))
+
+    result, _ = run_action("bulk create tickets", {"vault_id": "rows", "staging_table": "u_incident_import"})
+
+    assert result["status"] == "success"
+    assert result["summary"]["successful_rows"] == 2
+    assert result["summary"]["failed_rows"] == 1
+    first, second, third = sorted(result["data"], key=lambda row: row["row"])
+    assert mock.state.index["incident"][first["sys_id"]]["short_description"] == "First"
+    assert mock.state.index["incident"][third["sys_id"]]["short_description"] == "Third"
+    assert second["status"] == "failed"
+    assert second["message"] == "short_description is mandatory"
+    assert mock.state.snapshot()["endpoints"]["POST /api/now/import/u_incident_import"]["count"] == 3
@@ -0,0 +1,91 @@
+# File: test_circuit.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import threading
+
+import pytest
+
+from servicenow_circuit import CIRCUIT_OPEN, CircuitBreaker, CircuitOpenError
+
+
+class CountingBreaker(CircuitBreaker):
+    """Counts the times the state file is locked and read"""
+
+    file_reads = 0
+
+    def _locked_state(self):
+        self.file_reads += 1
+        return super()._locked_state()
+
+
+def test_healthy_requests_do_not_touch_the_state_file(tmp_path):
+    breaker = CountingBreaker(str(tmp_path / "circuit.json"), 3, 60)
+
+    for _ in range(10):
+        breaker.before_request()
+        breaker.record(True)
+
+    assert breaker.file_reads == 1
+
+
+def test_failures_open_the_circuit_of_every_process(tmp_path):
+    path = str(tmp_path / "circuit.json")
+    breaker = CircuitBreaker(path, 2, 60)
+
+    for _ in range(2):
+        breaker.before_request()
+        breaker.record(False)
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    # A new action process reads the open circuit from the file
+    with pytest.raises(CircuitOpenError):
+        CircuitBreaker(path, 2, 60).before_request()
+    assert CircuitBreaker(path, 2, 60).get_state()["state"] == CIRCUIT_OPEN
+
+
+def test_failures_of_the_processes_add_up(tmp_path):
+    path = str(tmp_path / "circuit.json")
+    breaker = CircuitBreaker(path, 2, 60)
+    breaker.before_request()
+
+    other = CircuitBreaker(path, 2, 60)
+    other.before_request()
+    other.record(False)
+
+    breaker.record(False)
+    assert breaker.get_state()["state"] == CIRCUIT_OPEN
+
+
+def test_async_transport_reads_the_state_file_off_the_event_loop(mock, tmp_path):
+    pytest.importorskip("aiohttp")
+    from servicenow_transport import AiohttpTransport
+
+    threads = []
+
+    class ThreadRecordingBreaker(CircuitBreaker):
+        def _locked_state(self):
+            threads.append(threading.get_ident())
+            return super()._locked_state()
+
+    transport = AiohttpTransport(4)
+    transport.breaker = ThreadRecordingBreaker(str(tmp_path / "circuit.json"), 3, 60)
+    try:
+        calls = [{"method": "get", "url": f"{mock.url}/api/now/table/incident"}, {"method": "get", "url": "http://127.0.0.1:1/api/now"}]
+        transport.request_many(calls)
+    finally:
+        transport.close()
+
+    assert threads
+    assert threading.get_ident() not in threads
@@ -0,0 +1,62 @@
+# File: test_get_ticket.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+from datetime import datetime, timedelta
+
+
+def add_comments(mock, incident, count):
+    created = datetime.strptime(incident["sys_created_on"], "%Y-%m-%d %H:%M:%S")
+    for index in range(count):
+        mock.state.insert(
+            "sys_journal_field",
+            {
+                "element_id": incident["sys_id"],
+                "name": "incident",
+                "element": "comments",
+                "value": f"Comment {index}",
+                "sys_created_on": (created + timedelta(minutes=1 + index)).strftime("%Y-%m-%d %H:%M:%S"),
+            },
+        )
+
+
+def test_newest_journal_entries_are_paged_and_listed_oldest_first(mock, run_action, monkeypatch):
+    import servicenow_connector
+
+    monkeypatch.setattr(servicenow_connector, "SERVICENOW_DEFAULT_LIMIT", 2)
+    incident = mock.state.tables["incident"][0]
+    add_comments(mock, incident, 4)
+
+    result, _ = run_action("get ticket", {"table": "incident", "id": incident["sys_id"], "is_sys_id": True, "max_journal_entries": 3})
+
+    assert result["status"] == "success"
+    ticket = result["data"][0]
+    assert ticket["comments_section"] == ["Comment 1", "Comment 2", "Comment 3"]
+    assert ticket["worknotes_section"] == []
+    assert result["summary"]["journal_entries"] == 3
+    # 3 entries from the mock plus the 4 comments
+    assert result["summary"]["total_journal_entries"] == 7
+    assert mock.state.snapshot()["endpoints"]["GET /api/now/table/sys_journal_field"]["count"] == 2
+
+
+def test_journal_since(mock, run_action):
+    incident = mock.state.tables["incident"][0]
+    entries = [entry for entry in mock.state.tables["sys_journal_field"] if entry["element_id"] == incident["sys_id"]]
+
+    result, _ = run_action(
+        "get ticket", {"table": "incident", "id": incident["sys_id"], "is_sys_id": True, "journal_since": entries[1]["sys_created_on"]}
+    )
+
+    assert result["status"] == "success"
+    assert result["data"][0]["comments_section"] == [entries[1]["value"]]
+    assert result["data"][0]["worknotes_section"] == [entries[2]["value"]]
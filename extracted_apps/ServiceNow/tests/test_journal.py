@@ -0,0 +1,54 @@
+# File: test_journal.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+CONFIG = {"ingest": {"container_label": "servicenow"}, "ingest_journal": True}
+# No ticket changes after the table cursor, the polls only ingest the journal
+STATE = {
+    "table_cursors": {"incident": {"last_time": "2099-01-01 00:00:00", "first_run": False}},
+    "journal_cursor": {"last_time": "2099-01-01 00:00:00", "seen": []},
+}
+
+
+def journal_artifacts(mock):
+    return [artifact for artifact in mock.state.artifacts if artifact.get("label") == "journal"]
+
+
+def test_entries_wait_for_the_container_of_their_ticket(mock, run_action):
+    incident = mock.state.tables["incident"][0]
+    mock.state.insert(
+        "sys_journal_field",
+        {
+            "element_id": incident["sys_id"],
+            "name": "incident",
+            "element": "comments",
+            "value": "Written before the ticket was ingested",
+            "sys_created_on": "2099-01-02 00:00:00",
+        },
+    )
+
+    result, state = run_action("on poll", {}, CONFIG, STATE)
+
+    assert result["status"] == "success"
+    assert journal_artifacts(mock) == []
+    assert state["journal_cursor"]["last_time"] == "2099-01-02 00:00:00"
+    assert [entry["element_id"] for entry in state["journal_cursor"]["pending"]] == [incident["sys_id"]]
+
+    with mock.state.lock:
+        mock.state.containers.append({"id": 1, "source_data_identifier": incident["sys_id"], "label": "servicenow"})
+    result, state = run_action("on poll", {}, CONFIG, state)
+
+    assert result["status"] == "success"
+    assert [artifact["cef"]["value"] for artifact in journal_artifacts(mock)] == ["Written before the ticket was ingested"]
+    assert journal_artifacts(mock)[0]["container_id"] == 1
+    assert state["journal_cursor"]["pending"] == []
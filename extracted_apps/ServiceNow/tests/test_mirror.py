@@ -0,0 +1,93 @@
+# File: test_mirror.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+from mock_servicenow import MockHandler
+
+
+def mirrored_sys_ids(tmp_path, table):
+    from servicenow_mirror import TableMirror
+
+    mirror = TableMirror(str(tmp_path / "1_mirror.db"))
+    try:
+        return {record["sys_id"] for record in mirror.query(table, "")}
+    finally:
+        mirror.close()
+
+
+def delete_record(mock, table, record):
+    with mock.state.lock:
+        mock.state.tables[table].remove(record)
+        del mock.state.index[table][record["sys_id"]]
+
+
+def age_reconciliation(tmp_path, table, hours):
+    import sqlite3
+
+    connection = sqlite3.connect(str(tmp_path / "1_mirror.db"))
+    with connection:
+        connection.execute(
+            "UPDATE sync_state SET reconciled_at = strftime('%Y-%m-%dT%H:%M:%SZ', 'now', ?) WHERE table_name = ?", (f"-{hours} hours", table)
+        )
+    connection.close()
+
+
+def test_sync_removes_deleted_records_once_the_interval_passed(mock, run_action, tmp_path):
+    result, _ = run_action("sync mirror", {"tables": "incident"})
+    assert result["status"] == "success"
+    assert result["summary"]["synced_records"] == 30
+
+    deleted = mock.state.tables["incident"][3]
+    delete_record(mock, "incident", deleted)
+    result, _ = run_action("sync mirror", {"tables": "incident"})
+
+    # The incremental sync only asks for the records updated since the previous one
+    assert result["status"] == "success"
+    assert result["summary"]["deleted_records"] == 0
+    assert mock.state.snapshot()["endpoints"]["GET /api/now/table/incident"]["count"] == 1
+    assert deleted["sys_id"] in mirrored_sys_ids(tmp_path, "incident")
+
+    age_reconciliation(tmp_path, "incident", 25)
+    result, _ = run_action("sync mirror", {"tables": "incident"})
+
+    assert result["status"] == "success"
+    assert result["summary"]["deleted_records"] == 1
+    assert mirrored_sys_ids(tmp_path, "incident") == {record["sys_id"] for record in mock.state.tables["incident"]}
+    assert result["data"][0]["reconciled_at"] == result["data"][0]["synced_at"]
+
+
+def test_failed_full_sync_keeps_the_mirror(mock, run_action, tmp_path, monkeypatch):
+    run_action("sync mirror", {"tables": "incident"})
+    mirrored = mirrored_sys_ids(tmp_path, "incident")
+
+    route_api = MockHandler._route_api
+
+    def fail_second_page(self, method, path, params, body):
+        if params.get("sysparm_offset") not in (None, "0"):
+            return 500, self._send(500, {"error": {"message": "Internal error", "detail": "Injected by the test"}})
+        return route_api(self, method, path, params, body)
+
+    monkeypatch.setattr(MockHandler, "_route_api", fail_second_page)
+    monkeypatch.setattr("servicenow_connector.SERVICENOW_EXPORT_PAGE_SIZE", 10)
+    result, _ = run_action("sync mirror", {"tables": "incident", "full": True})
+
+    assert result["status"] == "failed"
+    assert mirrored_sys_ids(tmp_path, "incident") == mirrored
+
+    monkeypatch.setattr(MockHandler, "_route_api", route_api)
+    delete_record(mock, "incident", mock.state.tables["incident"][0])
+    result, _ = run_action("sync mirror", {"tables": "incident", "full": True})
+
+    assert result["status"] == "success"
+    assert result["summary"]["deleted_records"] == 1
+    assert mirrored_sys_ids(tmp_path, "incident") == {record["sys_id"] for record in mock.state.tables["incident"]}
@@ -0,0 +1,34 @@
+# File: test_poll_pipeline.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+from datetime import datetime
+
+
+def test_token_refreshed_by_the_fetch_thread_and_page_size_are_saved(mock, run_action):
+    mock.state.oauth = True
+    state = {
+        "oauth_token": {"access_token": "expired", "refresh_token": "refresh", "expires_in": 1799},
+        "retrieval_time": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "table_cursors": {"incident": {"last_time": "2000-01-01 00:00:00", "first_run": False, "page_size": 10}},
+    }
+
+    result, saved_state = run_action(
+        "on poll", {}, {"client_id": "id", "client_secret": "secret", "ingest": {"container_label": "servicenow"}}, state
+    )
+
+    assert result["status"] == "success"
+    assert len(mock.state.containers) == 30
+    assert saved_state["oauth_token"]["access_token"] != "expired"
+    # Every page came back as fast as asked, the page size grew from the one in the cursor
+    assert saved_state["table_cursors"]["incident"]["page_size"] > 10
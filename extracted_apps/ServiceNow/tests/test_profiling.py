@@ -0,0 +1,54 @@
+# File: test_profiling.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import os
+import re
+
+import pytest
+from conftest import APP_DIR, ROOT_DIR
+
+
+BLOODHOUND_PROFILING = os.path.join(
+    ROOT_DIR,
+    os.pardir,
+    "BloodHound_Enterprise_for_Splunk_SOAR",
+    "phBloodHound Enterprise for Splunk SOAR",
+    "specteropsbloodhound_profiling.py",
+)
+
+
+def profiling_code(path):
+    """The module without its header comments and with the value of PROFILE_ENV_VAR blanked"""
+    with open(path) as f:
+        source = f.read()
+    source = source[source.index("\nimport ") :].lstrip("\n")
+    return re.sub(r'^PROFILE_ENV_VAR = ".*"$', 'PROFILE_ENV_VAR = ""', source, flags=re.MULTILINE)
+
+
+def test_bloodhound_copy_is_in_sync():
+    assert profiling_code(BLOODHOUND_PROFILING) == profiling_code(os.path.join(APP_DIR, "servicenow_profiling.py"))
+
+
+def test_profile_is_written_when_the_action_fails(mock, run_action, tmp_path, monkeypatch):
+    import servicenow_connector
+
+    def fail(self, param):
+        raise RuntimeError("Injected by the test")
+
+    monkeypatch.setattr(servicenow_connector.ServicenowConnector, "_list_tickets", fail)
+
+    with pytest.raises(RuntimeError):
+        run_action("list tickets", {"table": "incident"}, {"profile_actions": True})
+
+    assert len(list((tmp_path / "1_profiles").glob("list_tickets_*.prof"))) == 1
@@ -0,0 +1,42 @@
+# File: test_push.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import time
+
+from servicenow_spool import EventSpool
+
+
+def test_versions_ingested_are_kept_in_the_spool(mock, run_action, tmp_path):
+    spool = EventSpool(str(tmp_path / "spool"))
+    incident = mock.state.tables["incident"][0]
+    event = {key: incident[key] for key in ("sys_id", "sys_mod_count", "sys_updated_on")}
+    config = {"ingest": {"container_label": "servicenow"}, "push_spool_directory": spool.directory}
+    # The fallback poll of the tables is not due
+    state = {"push": {"last_poll": time.time()}}
+
+    spool.append([dict(event, table="incident")])
+    result, state = run_action("on poll", {}, config, state)
+
+    assert result["status"] == "success"
+    assert result["summary"]["pushed_issues_ingested"] == 1
+    assert "versions" not in state["push"]
+    assert list(spool.load_versions()) == [incident["sys_id"]]
+
+    # The same version pushed again is not fetched
+    spool.append([dict(event, table="incident")])
+    result, _ = run_action("on poll", {}, config, state)
+
+    assert result["status"] == "success"
+    assert "GET /api/now/table/incident" not in mock.state.snapshot()["endpoints"]
+    assert len(mock.state.containers) == 1
@@ -0,0 +1,45 @@
+# File: test_query_cache.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import time
+
+
+CACHE_CONFIG = {"query_cache_ttl": 300}
+
+
+def test_write_drops_the_results_of_the_tables_it_extends(run_action):
+    for table in ("task", "incident"):
+        result, _ = run_action("list tickets", {"table": table, "max_results": 5}, CACHE_CONFIG)
+        assert result["summary"]["cache_hit"] is False
+        result, _ = run_action("list tickets", {"table": table, "max_results": 5}, CACHE_CONFIG)
+        assert result["summary"]["cache_hit"] is True
+
+    result, _ = run_action("create ticket", {"table": "incident", "short_description": "Cached"}, CACHE_CONFIG)
+    assert result["status"] == "success"
+
+    for table in ("task", "incident"):
+        result, _ = run_action("list tickets", {"table": table, "max_results": 5}, CACHE_CONFIG)
+        assert result["summary"]["cache_hit"] is False
+
+
+def test_table_hierarchy_outlives_the_cached_results(mock, run_action):
+    config = {"query_cache_ttl": 1}
+    result, _ = run_action("create ticket", {"table": "incident", "short_description": "First"}, config)
+    assert result["status"] == "success"
+    assert mock.state.snapshot()["endpoints"]["GET /api/now/table/sys_db_object"]["count"] == 2
+
+    time.sleep(1.1)
+    result, _ = run_action("create ticket", {"table": "incident", "short_description": "Second"}, config)
+    assert result["status"] == "success"
+    assert "GET /api/now/table/sys_db_object" not in mock.state.snapshot()["endpoints"]
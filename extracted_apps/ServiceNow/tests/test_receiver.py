@@ -0,0 +1,57 @@
+# File: test_receiver.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+import shutil
+import socket
+import subprocess
+import threading
+
+import pytest
+import requests
+
+from servicenow_receiver import EventReceiver
+
+
+TOKEN = "token"  # pragma: allowlist secret
+
+
+def test_plain_http_only_on_loopback(tmp_path):
+    with pytest.raises(ValueError):
+        EventReceiver(("0.0.0.0", 0), str(tmp_path), TOKEN)  # nosemgrep
+
+
+def test_stalled_handshake_does_not_block_other_clients(tmp_path):
+    if not shutil.which("openssl"):
+        pytest.skip("openssl is needed to create the certificate")
+    certfile = tmp_path / "cert.pem"
+    subprocess.run(
+        [
+            *("openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-subj", "/CN=localhost", "-days", "1"),
+            *("-keyout", str(certfile), "-out", str(certfile)),
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+    receiver = EventReceiver(("127.0.0.1", 0), str(tmp_path / "spool"), TOKEN, str(certfile))
+    thread = threading.Thread(target=receiver.serve_forever, daemon=True)
+    thread.start()
+    try:
+        # Connects but never starts the handshake
+        with socket.create_connection(receiver.server_address):
+            r = requests.get(f"{receiver.url}/health", verify=False, timeout=5)  # nosemgrep
+        assert r.status_code == 200
+    finally:
+        receiver.shutdown()
+        receiver.server_close()
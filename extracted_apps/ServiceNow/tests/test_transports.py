@@ -0,0 +1,151 @@
+# File: test_transports.py
+#
+# Copyright (c) 2016-2025 Splunk Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software distributed under
+# the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND,
+# either express or implied. See the License for the specific language governing permissions
+# and limitations under the License.
+"""Every test runs once per transport, the sync and async transports must behave the same against the mock server"""
+
+from datetime import datetime
+
+import pytest
+import requests
+
+from servicenow_circuit import CircuitBreaker, CircuitOpenError
+from servicenow_transport import create_transport
+
+
+def incident_sys_ids(mock, count):
+    return [record["sys_id"] for record in mock.state.tables["incident"][:count]]
+
+
+def request_count(mock, endpoint, status="200"):
+    return mock.state.snapshot()["endpoints"].get(endpoint, {}).get("statuses", {}).get(status, 0)
+
+
+def test_page_headers(mock, transport):
+    r = transport.request("get", f"{mock.url}/api/now/table/incident", params={"sysparm_offset": 10, "sysparm_limit": 10})
+
+    assert r.status_code == 200
+    assert r.headers["X-Total-Count"] == "30"
+    assert "sysparm_offset=20" in r.headers["Link"]
+    assert [record["sys_id"] for record in r.json()["result"]] == incident_sys_ids(mock, 30)[10:20]
+
+
+def test_request_many_keeps_the_order_of_the_calls(mock, transport):
+    calls = [
+        {"method": "get", "url": f"{mock.url}/api/now/table/incident", "params": {"sysparm_offset": offset, "sysparm_limit": 7}}
+        for offset in (28, 21, 14, 7, 0)
+    ]
+
+    responses = transport.request_many(calls)
+
+    sys_ids = [record["sys_id"] for r in reversed(responses) for record in r.json()["result"]]
+    assert sys_ids == incident_sys_ids(mock, 30)
+
+
+def test_request_many_returns_connection_errors(mock, transport):
+    calls = [
+        {"method": "get", "url": f"{mock.url}/api/now/table/incident", "params": {"sysparm_limit": 1}},
+        {"method": "get", "url": "http://127.0.0.1:1/api/now/table/incident"},
+    ]
+
+    responses = transport.request_many(calls)
+
+    assert responses[0].status_code == 200
+    assert isinstance(responses[1], Exception)
+
+
+def test_error_body(mock, transport):
+    r = transport.request("get", f"{mock.url}/api/now/table/incident/{'0' * 32}")
+
+    assert r.status_code == 404
+    assert r.json()["error"]["message"] == "No Record found"
+
+
+def test_basic_auth_and_binary_body(mock, transport):
+    r = transport.request(
+        "post",
+        f"{mock.url}/api/now/attachment/file",
+        auth=requests.auth.HTTPBasicAuth("admin", "admin"),
+        data=b"\x00\x01binary",
+        headers={"Content-Type": "application/octet-stream"},
+        params={"table_name": "incident", "table_sys_id": incident_sys_ids(mock, 1)[0], "file_name": "a.bin"},
+    )
+
+    assert r.status_code == 201
+    assert r.json()["result"]["size_bytes"] == "8"
+    assert r.json()["result"]["content_type"] == "application/octet-stream"
+
+
+def test_list_tickets_pages_with_total_count(mock, run_action, monkeypatch):
+    import servicenow_connector
+
+    monkeypatch.setattr(servicenow_connector, "SERVICENOW_DEFAULT_LIMIT", 7)
+
+    result, _ = run_action("list tickets", {"table": "incident", "max_results": 25})
+
+    assert result["status"] == "success"
+    assert [ticket["sys_id"] for ticket in result["data"]] == incident_sys_ids(mock, 25)
+    # The first page tells the total, the 3 remaining pages of the 25 records follow
+    assert request_count(mock, "GET /api/now/table/incident") == 4
+    assert result["summary"]["rest_calls"]["calls"] == 4
+
+
+def test_get_ticket_error_message(mock, run_action):
+    result, _ = run_action("get ticket", {"table": "incident", "id": "0" * 32, "is_sys_id": True})
+
+    assert result["status"] == "failed"
+    assert "No Record found" in result["message"]
+    assert "Record doesn't exist or ACL restricts the record retrieval" in result["message"]
+
+
+def test_expired_oauth_token_is_refreshed(mock, run_action):
+    mock.state.oauth = True
+    state = {
+        "oauth_token": {"access_token": "expired", "refresh_token": "refresh", "expires_in": 1799},
+        "retrieval_time": datetime.now().strftime("%Y-%m-%dT%H:%M:%SZ"),
+    }
+
+    result, saved_state = run_action(
+        "list tickets", {"table": "incident", "max_results": 5}, {"client_id": "id", "client_secret": "secret"}, state
+    )
+
+    assert result["status"] == "success"
+    assert [ticket["sys_id"] for ticket in result["data"]] == incident_sys_ids(mock, 5)
+    assert request_count(mock, "GET /api/now/table/incident", "401") == 1
+    assert request_count(mock, "POST /oauth_token.do") == 1
+    assert saved_state["oauth_token"]["access_token"] != "expired"
+
+
+def test_create_ticket_uploads_attachments(mock, run_action):
+    result, _ = run_action("create ticket", {"table": "incident", "short_description": "Test ticket", "vault_id": "v1,v2"})
+
+    assert result["status"] == "success"
+    ticket = next(record for record in mock.state.tables["incident"] if record.get("short_description") == "Test ticket")
+    attachments = [record for record in mock.state.tables["sys_attachment"] if record["table_sys_id"] == ticket["sys_id"]]
+    assert sorted(attachment["file_name"] for attachment in attachments) == ["v1.bin", "v2.bin"]
+    assert all(attachment["size_bytes"] == str(len(b"attachment content")) for attachment in attachments)
+
+
+def test_timeouts_open_the_circuit(mock, transport_name, tmp_path):
+    transport, _ = create_transport(transport_name, 4, (5, 0.2))
+    transport.breaker = CircuitBreaker(str(tmp_path / "circuit.json"), 2, 60)
+    mock.state.latency_ms = 1000
+    try:
+        for _ in range(2):
+            with pytest.raises(Exception):
+                transport.request("get", f"{mock.url}/api/now/table/incident", params={"sysparm_limit": 1})
+
+        with pytest.raises(CircuitOpenError):
+            transport.request("get", f"{mock.url}/api/now/table/incident", params={"sysparm_limit": 1})
+    finally:
+        transport.close()